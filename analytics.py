@@ -0,0 +1,607 @@
+"""Cube agregat, filter index, memo, dan fungsi analisis dashboard, tanpa Streamlit.
+
+Dipakai oleh app.py (UI), batch_report.py (laporan batch), dan api.py (API JSON)
+sehingga ketiganya menghitung angka yang sama dari cube yang sama. Instance cache
+per proses (cube, index, memo) dibuat oleh pemanggil.
+"""
+import io
+import itertools
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cleaning import MONTH_ORDER
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+# ==========================================
+# AGGREGATE CUBE
+# ==========================================
+# Cube pra-agregasi: satu baris per kombinasi kunci dengan jumlah, banyak
+# transaksi, dan jumlah kuadrat biaya. Semua angka dashboard bisa di-roll-up dari
+# sini (sum/count/mean/varians), jadi rerun tidak perlu mengelompokkan data mentah.
+CUBE_KEYS = ['Tahun', 'Month_Num', 'Vendor_Clean', 'Type', 'Keterangan', 'Nopol']
+CUBE_MEASURES = ['Total Biaya', 'Jumlah', 'Kuadrat']
+
+
+def dataset_fingerprint(df):
+    """Sidik jari dataset sumber (kunci cache saat load); hash isi jika tidak tersedia."""
+    fingerprint = df.attrs.get('fingerprint')
+    if fingerprint:
+        return fingerprint
+    return f"hash_{int(pd.util.hash_pandas_object(df, index=False).sum()) & 0xFFFFFFFFFFFFFFFF:x}"
+
+
+def build_aggregate_cube(df):
+    """Bangun cube (sum, count, sum of squares) per kombinasi CUBE_KEYS dari data transaksi."""
+    biaya = df['Total Biaya'].astype('float64')
+    cube = (
+        df.assign(Kuadrat=biaya * biaya)
+        .groupby(CUBE_KEYS, observed=True, sort=False)
+        .agg(**{'Total Biaya': ('Total Biaya', 'sum'), 'Jumlah': ('Total Biaya', 'size'), 'Kuadrat': ('Kuadrat', 'sum')})
+        .reset_index()
+    )
+    cube['Bulan'] = pd.Categorical.from_codes(cube['Month_Num'].astype(int) - 1, dtype=pd.CategoricalDtype(MONTH_ORDER))
+    return cube
+
+
+def is_aggregate_cube(data):
+    return all(col in data.columns for col in CUBE_MEASURES)
+
+
+def as_cube(data):
+    """Fungsi analisis menerima data mentah maupun cube; data mentah diagregasi dulu."""
+    return data if is_aggregate_cube(data) else build_aggregate_cube(data)
+
+
+# ==========================================
+# FILTER INDEX
+# ==========================================
+FILTER_COLUMNS = ['Tahun', 'Vendor_Clean', 'Keterangan', 'Type', 'Nopol']
+
+
+class FilterIndex:
+    """Inverted index nilai → posisi baris (terurut) untuk kolom filter.
+
+    Per kolom disimpan posisi baris yang diurutkan per kode nilai beserta offset
+    tiap kode, sehingga baris untuk satu nilai adalah satu slice tanpa menyalin.
+    """
+
+    def __init__(self, frame, columns=FILTER_COLUMNS):
+        self.n_rows = len(frame)
+        self._columns = {}
+        for col in columns:
+            if col not in frame.columns:
+                continue
+            codes, uniques = pd.factorize(frame[col], sort=True)
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            offsets = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+            lookup = {value: code for code, value in enumerate(uniques.tolist())}
+            self._columns[col] = (lookup, order, offsets)
+
+    def rows_for(self, col, values):
+        """Posisi baris (terurut) yang kolom `col`-nya bernilai salah satu dari `values`."""
+        lookup, order, offsets = self._columns[col]
+        codes = sorted({lookup[v] for v in values if v in lookup})
+        if len(codes) == 1:
+            return np.sort(order[offsets[codes[0]]:offsets[codes[0] + 1]])
+        parts = [order[offsets[c]:offsets[c + 1]] for c in codes]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+    def select(self, **filters):
+        """Irisan semua filter aktif; None berarti tidak ada filter (semua baris)."""
+        rows = None
+        active = [(col, values) for col, values in filters.items() if values is not None]
+        # Mulai dari filter paling selektif supaya irisan berikutnya kecil
+        candidates = sorted(
+            (self.rows_for(col, values) for col, values in active),
+            key=len,
+        )
+        for part in candidates:
+            rows = part if rows is None else np.intersect1d(rows, part, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+
+def sidebar_filters(selected_years=None, selected_vendor='Semua'):
+    """Ubah pilihan sidebar menjadi argumen FilterIndex.select."""
+    return {
+        'Tahun': selected_years or None,
+        'Vendor_Clean': None if selected_vendor == 'Semua' else [selected_vendor],
+    }
+
+
+def filter_transactions(data, index, **filters):
+    """Ambil baris yang lolos filter dengan satu `take`, tanpa frame perantara."""
+    return take_rows(data, index.select(**filters))
+
+
+def take_rows(data, rows):
+    """Frame untuk row id `rows` (None = semua baris, tanpa salinan)."""
+    return data if rows is None else data.take(rows)
+
+# ==========================================
+# AGGREGATE MEMO
+# ==========================================
+# Hasil agregasi dipakai ulang lintas rerun dan lintas sesi pada worker yang sama.
+# Kunci: (fingerprint dataset, tahun terpilih, vendor, nama fungsi, argumen).
+MEMO_MAX_ENTRIES = int(os.environ.get("DASHBOARD_MEMO_ENTRIES", 256))
+MEMO_MAX_BYTES = int(os.environ.get("DASHBOARD_MEMO_MB", 64)) * 1024 * 1024
+
+
+def estimate_nbytes(value):
+    """Perkiraan ukuran hasil agregasi (DataFrame/Series) untuk batas memori memo.
+
+    pandas dicek lebih dulu: `Series.nbytes` tidak menghitung index maupun isi
+    string/objek, jadi memakai `memory_usage(deep=True)`.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, tuple):
+        return sum(estimate_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class AggregateMemo:
+    """Cache LRU thread-safe dengan batas jumlah entri dan total byte."""
+
+    def __init__(self, max_entries=MEMO_MAX_ENTRIES, max_bytes=MEMO_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Kunci yang sama sedang dihitung thread lain (mis. warm-up): tunggu
+            # hasilnya daripada menghitung dua kali, lalu periksa ulang.
+            pending.wait()
+
+        # Hitung di luar lock supaya sesi lain (kunci berbeda) tidak ikut menunggu
+        try:
+            value = compute()
+            size = estimate_nbytes(value)
+            with self._lock:
+                self._entries[key] = (value, size)
+                self.nbytes += size
+                self._evict()
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def values(self):
+        """Salinan daftar nilai yang sedang tersimpan (urutan LRU, terlama dulu)."""
+        with self._lock:
+            return [value for value, _ in self._entries.values()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+                'nbytes': self.nbytes,
+                'evictions': self.evictions,
+            }
+
+
+def make_aggregator(memo, cube, fingerprint, selected_years=None, selected_vendor='Semua', scope='cube'):
+    """Bungkus fungsi analisis agar hasilnya diambil dari `memo` sesuai filter aktif.
+
+    `scope` membedakan sumber data (cube atau baris mentah) untuk fungsi yang sama.
+    `cube` boleh berupa callable tanpa argumen; frame-nya baru diambil saat memo miss.
+    Hasil yang dikembalikan dipakai bersama, jadi pemanggil tidak boleh mengubahnya in-place.
+    """
+    filter_key = (fingerprint, tuple(sorted(selected_years or ())), selected_vendor)
+
+    def aggregate(func, *args):
+        return memo.get(filter_key + (scope, func.__name__, args), lambda: func(cube() if callable(cube) else cube, *args))
+
+    aggregate.filter_key = filter_key
+    return aggregate
+
+# ==========================================
+# ANALYSIS FUNCTIONS
+# ==========================================
+def calculate_yearly_summary(df):
+    totals = as_cube(df).groupby('Tahun', observed=True)[['Total Biaya', 'Jumlah']].sum()
+    summary = pd.DataFrame({
+        'Total_Pengeluaran': totals['Total Biaya'],
+        'Rata_Rata': totals['Total Biaya'] / totals['Jumlah'],
+        'Jumlah_Transaksi': totals['Jumlah'],
+    }).round(0)
+    return summary
+
+def get_top_vendors(df, top_n=10):
+    return as_cube(df).groupby('Vendor_Clean', observed=True)['Total Biaya'].sum().sort_values(ascending=False).head(top_n)
+
+def get_top_units(df, top_n=10):
+    top_units = as_cube(df).groupby(['Nopol', 'Type'], observed=True)[['Total Biaya', 'Jumlah']].sum()
+    top_units.columns = ['Total_Biaya', 'Frekuensi_Servis']
+    return top_units.sort_values(by='Total_Biaya', ascending=False).head(top_n)
+
+def complete_month_grid(totals, categories=None, value='Total Biaya'):
+    """Lengkapi total berindeks (Tahun, Month_Num[, kategori]) ke grid penuh 12 bulan.
+
+    Grid dibentuk dengan MultiIndex.from_product lalu reindex; kombinasi yang
+    tidak ada diisi 0. `categories` menentukan isi dan urutan level ketiga.
+    Hasil berupa frame datar dengan kolom Bulan, urut per Tahun/bulan.
+    """
+    names = list(totals.index.names)
+    levels = [
+        totals.index.get_level_values(names[0]).unique().sort_values(),
+        pd.RangeIndex(1, 13, name='Month_Num'),
+    ]
+    if len(names) > 2:
+        levels.append(pd.Index(categories) if categories is not None else totals.index.get_level_values(names[2]).unique())
+    grid = pd.MultiIndex.from_product(levels, names=names)
+    full = totals.reindex(grid, fill_value=0).astype('float64').reset_index(name=value)
+    full.insert(2, 'Bulan', np.asarray(MONTH_ORDER, dtype=object)[full['Month_Num'].to_numpy() - 1])
+    return full
+
+
+def calculate_monthly_trend(df):
+    totals = as_cube(df).groupby(['Tahun', 'Month_Num'], observed=True)['Total Biaya'].sum()
+    if totals.empty:
+        return totals.reset_index()
+    return complete_month_grid(totals)
+
+# ==========================================
+# TIME SERIES & DOWNSAMPLING
+# ==========================================
+# Granularitas timeline -> frekuensi periode pandas. Mingguan/Harian butuh kolom Tanggal.
+TIME_GRANULARITIES = {'Bulanan': 'M', 'Mingguan': 'W', 'Harian': 'D'}
+MAX_TIMELINE_POINTS = int(os.environ.get("DASHBOARD_TIMELINE_POINTS", 600))
+
+
+def has_daily_dates(df):
+    return 'Tanggal' in df.columns and bool(df['Tanggal'].notna().any())
+
+
+def date_bounds(df, granularity='Bulanan'):
+    """Rentang tanggal (date, date) data untuk slider timeline."""
+    if granularity != 'Bulanan' and has_daily_dates(df):
+        return df['Tanggal'].min().date(), df['Tanggal'].max().date()
+    years = df['Tahun']
+    return pd.Timestamp(int(years.min()), 1, 1).date(), pd.Timestamp(int(years.max()), 12, 31).date()
+
+
+def month_start_dates(frame):
+    return pd.to_datetime(frame['Tahun'].astype('int64') * 10000 + frame['Month_Num'].astype('int64') * 100 + 1, format='%Y%m%d')
+
+
+def calculate_time_series(df, granularity='Bulanan', date_range=None, by=None, top_n=None):
+    """Total biaya per periode (Bulanan dari cube, Mingguan/Harian dari kolom Tanggal).
+
+    Periode kosong diisi 0. `by` menambah satu dimensi (mis. Keterangan, dibatasi
+    top_n kategori terbesar). Hasil berisi kolom Date[, by], Total Biaya.
+    """
+    if granularity == 'Bulanan':
+        data = as_cube(df)
+    else:
+        data = df[df['Tanggal'].notna()] if 'Tanggal' in df.columns else df.iloc[0:0]
+        if date_range:
+            start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+            data = data[(data['Tanggal'] >= start) & (data['Tanggal'] <= end)]
+
+    top_cats = None
+    if by and top_n is not None:
+        top_cats = data.groupby(by, observed=True)['Total Biaya'].sum().nlargest(top_n).index
+        data = data[data[by].isin(top_cats)]
+    extra = [by] if by else []
+
+    if granularity == 'Bulanan':
+        totals = data.groupby(['Tahun', 'Month_Num'] + extra, observed=True)['Total Biaya'].sum()
+        if totals.empty:
+            return pd.DataFrame(columns=['Date'] + extra + ['Total Biaya'])
+        series = complete_month_grid(totals, top_cats)
+        series.insert(0, 'Date', month_start_dates(series))
+        if date_range:
+            start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+            series = series[(series['Date'] >= start.to_period('M').start_time) & (series['Date'] <= end)]
+        return series.reset_index(drop=True)
+
+    if data.empty:
+        return pd.DataFrame(columns=['Date'] + extra + ['Total Biaya'])
+    freq = TIME_GRANULARITIES[granularity]
+    period = data['Tanggal'].dt.to_period(freq).dt.start_time.rename('Date')
+    totals = data.groupby([period] + [data[col] for col in extra], observed=True)['Total Biaya'].sum()
+    dates = pd.date_range(period.min(), period.max(), freq='7D' if freq == 'W' else freq, name='Date')
+    if extra:
+        categories = pd.Index(top_cats if top_cats is not None else totals.index.get_level_values(1).unique(), name=by)
+        grid = pd.MultiIndex.from_product([dates, categories])
+    else:
+        grid = dates
+    return totals.reindex(grid, fill_value=0).astype('float64').reset_index(name='Total Biaya')
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: pilih n_out titik yang mempertahankan bentuk kurva."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Ambil titik minimum dan maksimum tiap bucket (puncak tidak pernah hilang)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    edges = np.linspace(0, n, (n_out - 2) // 2 + 1).astype(int)
+    picks = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            chunk = y[start:end]
+            picks += [start + int(chunk.argmin()), start + int(chunk.argmax())]
+    return np.unique(picks)
+
+
+def downsample_series(frame, max_points=MAX_TIMELINE_POINTS, method='lttb', x='Date', y='Total Biaya'):
+    """Batasi jumlah titik satu trace timeline di sisi server."""
+    if len(frame) <= max_points:
+        return frame
+    values = frame[y].to_numpy(dtype='float64')
+    if method == 'minmax':
+        indices = minmax_indices(values, max_points)
+    else:
+        indices = lttb_indices(frame[x].to_numpy().astype('int64').astype('float64'), values, max_points - 2)
+        # LTTB bisa melewatkan puncak global; titik tertinggi & terendah selalu ikut.
+        indices = np.union1d(indices, [values.argmax(), values.argmin()])
+    return frame.iloc[indices]
+
+
+def calculate_category_distribution(df):
+    category = as_cube(df).groupby('Keterangan', observed=True)[['Total Biaya', 'Jumlah']].sum()
+    category.columns = ['sum', 'count']
+    return category.sort_values('sum', ascending=False)
+
+def calculate_type_statistics(df):
+    type_stats = as_cube(df).groupby('Type', observed=True).agg(
+        Total_Biaya=('Total Biaya', 'sum'), Transaksi=('Jumlah', 'sum'), Jumlah_Unit=('Nopol', 'nunique')
+    )
+    type_stats.insert(1, 'Avg_Biaya', type_stats['Total_Biaya'] / type_stats['Transaksi'])
+    return type_stats.sort_values('Total_Biaya', ascending=False)
+
+def calculate_vehicle_efficiency(df):
+    eff = as_cube(df).groupby(['Nopol', 'Type'], observed=True)[['Total Biaya', 'Jumlah']].sum()
+    eff.insert(1, 'Rata_Rata', eff['Total Biaya'] / eff['Jumlah'])
+    eff.columns = ['Total_Biaya', 'Rata_Rata', 'Frekuensi']
+    return eff.sort_values('Total_Biaya', ascending=False)
+
+def calculate_monthly_costs(df):
+    return as_cube(df).groupby(['Tahun', 'Bulan'], observed=True)['Total Biaya'].sum()
+
+
+@dataclass(frozen=True)
+class AuditSummary:
+    """Statistik halaman Laporan Audit; dibaca oleh rekomendasi dan ekspor Excel."""
+    total_biaya: float
+    total_transaksi: int
+    yearly_summary: pd.DataFrame
+    vendor_costs: pd.Series
+    unit_costs: pd.Series
+    category_counts: pd.Series
+    monthly_costs: pd.Series
+    type_avg: pd.Series
+
+    @property
+    def avg_per_unit(self):
+        return self.unit_costs.mean() if not self.unit_costs.empty else 0
+
+    @property
+    def top_3_vendor_pct(self):
+        total = self.vendor_costs.sum()
+        return self.vendor_costs.head(3).sum() / total * 100 if total > 0 else 0
+
+    @property
+    def top_vendor(self):
+        return self.vendor_costs.index[0] if not self.vendor_costs.empty else '-'
+
+    @property
+    def top_unit(self):
+        if self.unit_costs.empty:
+            return ('-', '-'), 0
+        return self.unit_costs.index[0], self.unit_costs.iloc[0]
+
+    @property
+    def top_category(self):
+        if self.category_counts.empty:
+            return '-', 0
+        return self.category_counts.index[0], self.category_counts.iloc[0] / self.category_counts.sum() * 100
+
+    @property
+    def top_month(self):
+        if self.monthly_costs.empty:
+            return (0, '-'), 0
+        return self.monthly_costs.idxmax(), self.monthly_costs.max()
+
+    @property
+    def top_type(self):
+        if self.type_avg.empty:
+            return '-', 0
+        return self.type_avg.index[0], self.type_avg.iloc[0]
+
+    @property
+    def nbytes(self):
+        return sum(estimate_nbytes(getattr(self, name)) for name in
+                   ('yearly_summary', 'vendor_costs', 'unit_costs', 'category_counts', 'monthly_costs', 'type_avg'))
+
+
+def compute_audit_summary(df):
+    """Hitung semua statistik Laporan Audit dari satu cube (satu agregasi bersama)."""
+    cube = as_cube(df)
+
+    def rollup(keys):
+        return cube.groupby(keys, observed=True)[['Total Biaya', 'Jumlah']].sum()
+
+    by_year = rollup('Tahun')
+    by_type = rollup('Type')
+    yearly_summary = pd.DataFrame({
+        'Total_Pengeluaran': by_year['Total Biaya'],
+        'Rata_Rata': by_year['Total Biaya'] / by_year['Jumlah'],
+        'Jumlah_Transaksi': by_year['Jumlah'],
+    }).round(0)
+
+    return AuditSummary(
+        total_biaya=cube['Total Biaya'].sum(),
+        total_transaksi=int(cube['Jumlah'].sum()),
+        yearly_summary=yearly_summary,
+        vendor_costs=rollup('Vendor_Clean')['Total Biaya'].sort_values(ascending=False),
+        unit_costs=rollup(['Nopol', 'Type'])['Total Biaya'].sort_values(ascending=False),
+        category_counts=rollup('Keterangan')['Jumlah'].sort_values(ascending=False, kind='stable'),
+        monthly_costs=rollup(['Tahun', 'Bulan'])['Total Biaya'],
+        type_avg=(by_type['Total Biaya'] / by_type['Jumlah']).sort_values(ascending=False),
+    )
+
+
+def detect_duplicates(df):
+    return df[df.duplicated(subset=['Bulan', 'Tahun', 'Nopol', 'Total Biaya', 'Vendor_Clean'], keep=False)]
+
+# ==========================================
+# WORKBOOK
+# ==========================================
+# Dipakai oleh unduhan Laporan Audit (app.py) dan laporan batch (batch_report.py).
+EXPORT_CHUNK_ROWS = int(os.environ.get("DASHBOARD_EXPORT_CHUNK_ROWS", 50_000))
+
+
+def iter_row_chunks(data, rows, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Potongan `data[columns]` untuk row id `rows` (posisi), berurutan."""
+    for start in range(0, len(rows), chunk_rows):
+        yield data.take(rows[start:start + chunk_rows])[columns]
+
+
+EXCEL_MAX_ROWS = 1_048_576
+TRANSACTION_COLUMNS = ['Tahun', 'Bulan', 'Nopol', 'Type', 'Vendor_Clean', 'Keterangan', 'Total Biaya']
+
+
+def frame_rows(frame, index=True):
+    """Baris frame sebagai tuple nilai Python; NaN/NaT menjadi sel kosong."""
+    if index:
+        frame = frame.reset_index()
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+def audit_sheets(audit, cube, dataset, rows):
+    """Daftar (nama sheet, header, iterator baris) untuk workbook Laporan Audit."""
+    vehicles = calculate_vehicle_efficiency(cube)
+    types = calculate_type_statistics(cube)
+    categories = calculate_category_distribution(cube).rename(columns={'sum': 'Total_Biaya', 'count': 'Transaksi'})
+    vendors = cube.groupby('Vendor_Clean', observed=True)[['Total Biaya', 'Jumlah']].sum()
+    vendors.columns = ['Total_Biaya', 'Transaksi']
+    vendors = vendors.sort_values('Total_Biaya', ascending=False)
+    monthly = calculate_monthly_trend(cube)
+    monthly = monthly.drop(columns='Month_Num') if 'Month_Num' in monthly else monthly
+
+    columns = (['Tanggal'] if 'Tanggal' in dataset else []) + TRANSACTION_COLUMNS
+    transactions = (row for chunk in iter_row_chunks(dataset, rows, columns) for row in frame_rows(chunk, index=False))
+
+    return [
+        ('Ringkasan', ['Tahun'] + list(audit.yearly_summary.columns), frame_rows(audit.yearly_summary)),
+        ('Vendor', ['Vendor'] + list(vendors.columns), frame_rows(vendors)),
+        ('Kendaraan', ['Nopol', 'Type'] + list(vehicles.columns), frame_rows(vehicles)),
+        ('Tipe', ['Type'] + list(types.columns), frame_rows(types)),
+        ('Kategori', ['Keterangan'] + list(categories.columns), frame_rows(categories)),
+        ('Bulanan', list(monthly.columns), frame_rows(monthly, index=False)),
+        ('Transaksi', columns, transactions),
+    ]
+
+
+def split_sheet_rows(name, header, rows):
+    """Pecah sheet yang melebihi batas baris Excel menjadi 'Nama', 'Nama (2)', dst."""
+    rows = iter(rows)
+    first = next(rows, None)
+    part = 1
+    while part == 1 or first is not None:
+        title = name if part == 1 else f"{name} ({part})"
+        body = itertools.chain([first], itertools.islice(rows, EXCEL_MAX_ROWS - 2)) if first is not None else ()
+        yield title, header, body
+        first = next(rows, None)
+        part += 1
+
+
+def write_workbook(sheets, constant_memory=True):
+    """Tulis sheets ke bytes .xlsx; baris ditulis berurutan tanpa menahan frame per sheet.
+
+    constant_memory=False menyusun workbook sepenuhnya di memori (tanpa file
+    sementara), lebih cepat untuk workbook kecil seperti laporan batch.
+    """
+    buffer = io.BytesIO()
+    parts = (part for sheet in sheets for part in split_sheet_rows(*sheet))
+    if xlsxwriter is not None:
+        mode = {'constant_memory': True} if constant_memory else {'in_memory': True}
+        workbook = xlsxwriter.Workbook(buffer, {**mode, 'default_date_format': 'yyyy-mm-dd'})
+        bold = workbook.add_format({'bold': True})
+        for name, header, rows in parts:
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, header, bold)
+            for r, row in enumerate(rows, start=1):
+                worksheet.write_row(r, 0, row)
+        workbook.close()
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        for name, header, rows in parts:
+            worksheet = workbook.create_sheet(name)
+            worksheet.append(header)
+            for row in rows:
+                worksheet.append(row)
+        workbook.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,246 @@
+"""API JSON read-only untuk agregasi dashboard (ringkasan tahunan, vendor, unit, dll.).
+
+Endpoint memakai fungsi analisis (analytics.py), dataset bersama, dan memo agregat
+yang sama dengan app.py. Jika app.py dijalankan dengan DASHBOARD_API_PORT, server ini
+hidup di thread latar proses Streamlit sehingga cache-nya benar-benar dipakai bersama
+UI, termasuk dataset hasil upload; bisa juga dijalankan sendiri sebagai proses
+terpisah (cache sendiri, hanya dataset bawaan).
+
+Filter lewat query string, sama dengan sidebar: `tahun` (boleh berulang atau dipisah
+koma) dan `vendor`. `fingerprint` memilih dataset lain yang sudah dimuat (lihat
+/api/datasets); tanpa parameter ini yang dipakai adalah dataset bawaan. Contoh:
+    python api.py --port 8502
+    curl "http://127.0.0.1:8502/api/top-vendors?tahun=2024,2025&n=5"
+    curl "http://127.0.0.1:8502/api/monthly-trend?vendor=CV.%20ASRI%20(TOYOTA)"
+"""
+import argparse
+import json
+import sys
+import threading
+import types
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import analytics
+from analytics import (
+    AggregateMemo,
+    FilterIndex,
+    build_aggregate_cube,
+    dataset_fingerprint,
+    filter_transactions,
+    make_aggregator,
+    sidebar_filters,
+)
+from cleaning import DEFAULT_DATA_FILE, SHARED_DATASET_BYTES, SHARED_DATASET_ENTRIES, load_dataset_file
+
+# ==========================================
+# ENDPOINT
+# ==========================================
+# path -> (nama fungsi analisis di analytics.py, menerima parameter n?)
+ENDPOINTS = {
+    '/api/yearly-summary': ('calculate_yearly_summary', False),
+    '/api/top-vendors': ('get_top_vendors', True),
+    '/api/top-units': ('get_top_units', True),
+    '/api/monthly-trend': ('calculate_monthly_trend', False),
+    '/api/category-distribution': ('calculate_category_distribution', False),
+    '/api/type-statistics': ('calculate_type_statistics', False),
+}
+DEFAULT_TOP_N = 10
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def to_records(result):
+    """DataFrame/Series hasil agregasi -> list dict siap JSON (NaN -> null)."""
+    frame = result.to_frame() if hasattr(result, 'to_frame') else result
+    if frame.index.names != [None]:
+        frame = frame.reset_index()
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def parse_filters(query, years_available, vendors_available):
+    """Ubah query string menjadi (tahun, vendor) seperti pilihan sidebar."""
+    years = []
+    for value in query.get('tahun', []):
+        for part in value.split(','):
+            if part.strip():
+                try:
+                    years.append(int(part))
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, f"Tahun tidak valid: {part!r}")
+    unknown = sorted(set(years) - set(years_available))
+    if unknown:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Tahun tidak ada di data: {unknown}")
+
+    vendor = query.get('vendor', ['Semua'])[-1]
+    if vendor != 'Semua' and vendor not in vendors_available:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Vendor tidak dikenal: {vendor!r}")
+    # Tanpa tahun = semua tahun, sama dengan default sidebar (kunci memo ikut sama).
+    return sorted(set(years)) or list(years_available), vendor
+
+
+def parse_top_n(query):
+    try:
+        n = int(query.get('n', [DEFAULT_TOP_N])[-1])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Parameter n harus bilangan bulat")
+    if n < 1:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Parameter n minimal 1")
+    return n
+
+
+class AnalyticsApi:
+    """Jawab permintaan API memakai fungsi analytics.py dan cache milik `engine`.
+
+    `engine` menyediakan get_dataset_store, load_default_data, get_aggregate_cube,
+    get_filter_index, dan get_aggregate_memo: app.start_api_server() saat berjalan di proses
+    Streamlit, atau make_standalone_engine() saat berjalan sendiri.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def dataset(self, query):
+        """Dataset bawaan, atau dataset di store bersama yang sidik jarinya `fingerprint`."""
+        fingerprint = query.get('fingerprint', [None])[-1]
+        if fingerprint is None:
+            df, error = self.engine.load_default_data()
+            if error or df is None:
+                raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, error or "Data belum dimuat")
+            return df
+        for df in self.engine.get_dataset_store().values():
+            if dataset_fingerprint(df) == fingerprint:
+                return df
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Dataset tidak dikenal: {fingerprint!r}")
+
+    def filter_values(self, df, fingerprint, full_cube):
+        """(tahun terurut, vendor terurut, set vendor) satu dataset, dihitung sekali per fingerprint."""
+        def build():
+            vendors = sorted(full_cube['Vendor_Clean'].unique().tolist())
+            return tuple(int(year) for year in sorted(df['Tahun'].unique())), tuple(vendors), frozenset(vendors)
+
+        return self.engine.get_aggregate_memo().get((fingerprint, 'api_filters'), build)
+
+    def handle(self, path, query):
+        engine = self.engine
+        if path == '/api/datasets':
+            return {'datasets': [
+                {'fingerprint': dataset_fingerprint(df), 'rows': len(df)}
+                for df in engine.get_dataset_store().values()
+            ]}
+
+        df = self.dataset(query)
+        fingerprint = dataset_fingerprint(df)
+        full_cube = engine.get_aggregate_cube(df, fingerprint)
+        years_available, vendors, vendor_set = self.filter_values(df, fingerprint, full_cube)
+
+        if path == '/api/health':
+            return {'status': 'ok', 'rows': len(df), 'fingerprint': fingerprint}
+        if path == '/api/filters':
+            return {'tahun': list(years_available), 'vendor': list(vendors)}
+        if path not in ENDPOINTS:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Endpoint tidak dikenal: {path}")
+
+        func_name, takes_n = ENDPOINTS[path]
+        years, vendor = parse_filters(query, years_available, vendor_set)
+        args = (parse_top_n(query),) if takes_n else ()
+
+        cube_index = engine.get_filter_index(full_cube, f"{fingerprint}_cube")
+        cube = filter_transactions(full_cube, cube_index, **sidebar_filters(years, vendor))
+        aggregate = make_aggregator(engine.get_aggregate_memo(), cube, fingerprint, years, vendor)
+        return {
+            'filters': {'tahun': [int(year) for year in years], 'vendor': vendor},
+            'data': to_records(aggregate(getattr(analytics, func_name), *args)),
+        }
+
+
+def make_standalone_engine(data_file=DEFAULT_DATA_FILE):
+    """Cache proses untuk API yang berjalan tanpa Streamlit (padanan cache_resource di app.py)."""
+    store = AggregateMemo(max_entries=SHARED_DATASET_ENTRIES, max_bytes=SHARED_DATASET_BYTES)
+    memo = AggregateMemo()
+    # Cube & FilterIndex per fingerprint, seperti get_aggregate_cube / get_filter_index.
+    resources = AggregateMemo(max_entries=12, max_bytes=SHARED_DATASET_BYTES)
+    return types.SimpleNamespace(
+        get_dataset_store=lambda: store,
+        get_aggregate_memo=lambda: memo,
+        load_default_data=lambda: load_dataset_file(store, data_file),
+        get_aggregate_cube=lambda df, fingerprint: resources.get(('cube', fingerprint), lambda: build_aggregate_cube(df)),
+        get_filter_index=lambda frame, fingerprint: resources.get(('index', fingerprint), lambda: FilterIndex(frame)),
+    )
+
+
+# ==========================================
+# HTTP SERVER
+# ==========================================
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "DashboardAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, body = HTTPStatus.OK, self.server.api.handle(url.path.rstrip('/') or '/', parse_qs(url.query))
+        except ApiError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"Error: {e}"}
+
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=0, engine=None, quiet=False):
+    """Buat ThreadingHTTPServer (port=0 = port bebas, lihat server.server_address).
+
+    `engine` menyediakan cache proses (lihat AnalyticsApi); default make_standalone_engine().
+    """
+    if engine is None:
+        engine = make_standalone_engine()
+    server = ThreadingHTTPServer((host, port), ApiRequestHandler)
+    server.daemon_threads = True
+    server.api = AnalyticsApi(engine)
+    server.quiet = quiet
+    return server
+
+
+def serve_in_background(host='127.0.0.1', port=0, engine=None, quiet=True):
+    """Jalankan server di thread daemon; kembalikan server (panggil shutdown() untuk berhenti)."""
+    server = make_server(host, port, engine, quiet)
+    threading.Thread(target=server.serve_forever, name="dashboard-api", daemon=True).start()
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="API JSON agregasi dashboard biaya kendaraan.")
+    parser.add_argument('--host', default='127.0.0.1', help="Alamat bind (default hanya lokal).")
+    parser.add_argument('--port', type=int, default=8502, help="Port HTTP.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = make_server(args.host, args.port)
+    print(f"API berjalan di http://{args.host}:{server.server_address[1]}/api/health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,83 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import base64
+import gzip
 import io
+import json
+import mimetypes
+import os
+import threading
+import time
+import types
+from dataclasses import dataclass, field
+
+from analytics import (
+    AggregateMemo,
+    FilterIndex,
+    MAX_TIMELINE_POINTS,
+    TIME_GRANULARITIES,
+    as_cube,
+    audit_sheets,
+    build_aggregate_cube,
+    calculate_category_distribution,
+    calculate_monthly_costs,
+    calculate_monthly_trend,
+    calculate_time_series,
+    calculate_type_statistics,
+    calculate_vehicle_efficiency,
+    complete_month_grid,
+    compute_audit_summary,
+    dataset_fingerprint,
+    date_bounds,
+    downsample_series,
+    estimate_nbytes,
+    filter_transactions,
+    get_top_units,
+    get_top_vendors,
+    has_daily_dates,
+    iter_row_chunks,
+    make_aggregator,
+    sidebar_filters,
+    take_rows,
+    write_workbook,
+)
+from cleaning import (
+    DEFAULT_DATA_FILE,
+    MONTH_ORDER,
+    SHARED_DATASET_BYTES,
+    SHARED_DATASET_ENTRIES,
+    STREAMING_THRESHOLD_BYTES,
+    get_cache_key,
+    get_memory_report,
+    get_source_digest,
+    load_and_process_data,
+    load_csv_streaming,
+    load_dataset_file,
+    load_into_store,
+    read_cached_dataset,
+    write_cached_dataset,
+)
+from formatting import (
+    format_axis_amount,
+    format_currency,
+    format_currency_text,
+    format_short_amount,
+    format_with_pattern,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 # ==========================================
 # PAGE CONFIGURATION
@@ -18,17 +92,58 @@ st.set_page_config(
 # ==========================================
 # HELPER FUNCTION
 # ==========================================
-def get_image_as_base64(image_path):
-    """Convert local image to base64 string"""
+# Lebar maksimum aset logo (px): sekitar dua kali lebar tampilnya agar tetap tajam
+# di layar HiDPI tanpa mengirim gambar asli (bpkad.png ~300 KB) di setiap halaman.
+LOGO_MAX_WIDTHS = {'bpkad.png': 480, 'ITS.png': 400, 'SBY.png': 120}
+
+
+def recompress_image(raw, max_width=None):
+    """Perkecil gambar ke max_width lalu kompres ulang sebagai PNG dan WebP."""
+    image = Image.open(io.BytesIO(raw))
+    image.load()
+    if max_width and image.width > max_width:
+        image.thumbnail((max_width, image.height), Image.LANCZOS)
+
+    candidates = []
+    for fmt, mime, options in (('PNG', 'image/png', {'optimize': True}),
+                               ('WEBP', 'image/webp', {'quality': 90})):
+        buffer = io.BytesIO()
+        try:
+            image.save(buffer, fmt, **options)
+        except (KeyError, OSError):
+            continue  # Pillow tanpa dukungan WebP
+        candidates.append((buffer.getvalue(), mime))
+    return candidates
+
+
+@st.cache_resource(show_spinner=False)
+def get_image_data_uri(image_path, max_width=None):
+    """Data URI gambar lokal, dibaca dan di-encode sekali per proses.
+
+    Jika Pillow tersedia, gambar diperkecil dan dikompres ulang; yang dipakai adalah
+    hasil terkecil di antara file asli dan versi kompresnya.
+    """
     try:
         with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
+            raw = img_file.read()
     except FileNotFoundError:
         return None
 
+    candidates = [(raw, mimetypes.guess_type(image_path)[0] or 'image/png')]
+    if Image is not None:
+        try:
+            candidates += recompress_image(raw, max_width or LOGO_MAX_WIDTHS.get(os.path.basename(image_path)))
+        except OSError:
+            pass
+    data, mime = min(candidates, key=lambda candidate: len(candidate[0]))
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
 # ==========================================
 # CUSTOM CSS STYLING (LIGHT / DARK / AUTO)
 # ==========================================
+THEME_MODES = ["Ikuti Tema Pengguna", "Terang", "Gelap"]
+
+
 def get_theme_tokens(theme_mode="Ikuti Tema Pengguna"):
     """Return CSS tokens and Plotly template based on selected theme mode."""
     themes = {
@@ -81,7 +196,9 @@ def get_theme_tokens(theme_mode="Ikuti Tema Pengguna"):
     return themes.get(theme_mode, themes["Gelap"])
 
 
-def load_custom_css(theme_mode="Ikuti Tema Pengguna"):
+@st.cache_resource(show_spinner=False)
+def build_custom_css(theme_mode="Ikuti Tema Pengguna"):
+    """Stylesheet lengkap untuk satu mode tema; dirender sekali per proses per tema."""
     tokens = get_theme_tokens(theme_mode)
     auto_css = """
     @media (prefers-color-scheme: light) {
@@ -145,7 +262,7 @@ def load_custom_css(theme_mode="Ikuti Tema Pengguna"):
     }
     """ % tokens
 
-    st.markdown(f"""
+    return f"""
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700;800&display=swap');
 
@@ -529,85 +646,140 @@ def load_custom_css(theme_mode="Ikuti Tema Pengguna"):
     #MainMenu {{visibility: hidden;}}
     footer {{visibility: hidden;}}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+
+def load_custom_css(theme_mode="Ikuti Tema Pengguna"):
+    st.markdown(build_custom_css(theme_mode), unsafe_allow_html=True)
 
 # ==========================================
 # DATA LOADING & PROCESSING
 # ==========================================
-@st.cache_data
-def load_and_process_data(file_path=None):
-    try:
-        if file_path is None: 
-            file_path = 'Data_Kendaraan_Bersih.csv'
-            
-        try: 
-            df = pd.read_csv(file_path, sep=';')
-        except pd.errors.ParserError: 
-            try: 
-                df = pd.read_csv(file_path, sep=',')
-            except pd.errors.ParserError: 
-                df = pd.read_csv(file_path)
-        except Exception:
-            df = pd.read_csv(file_path)
-
-        df.columns = df.columns.str.strip()
-        
-        required_cols = ['Total Biaya', 'Nopol', 'Bulan', 'Tahun', 'Keterangan']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            return None, f"Data tidak valid: Kolom wajib yang hilang - {', '.join(missing_cols)}"
-            
-        df = df.dropna(subset=['Total Biaya', 'Nopol', 'Bulan', 'Tahun', 'Keterangan'])
-        df = df.drop_duplicates(subset=['Bulan', 'Tahun', 'Nopol', 'Total Biaya', 'Vendor_Clean'])
-        df['Bulan'] = df['Bulan'].str.strip().str.capitalize()
-        df['Keterangan'] = df['Keterangan'].str.strip().str.upper()
-        df['Nopol'] = df['Nopol'].str.strip().str.upper()
-
-        if 'Vendor_Clean' in df.columns:
-            df['Vendor_Clean'] = df['Vendor_Clean'].fillna(df.get('Vendor', '')).str.strip().str.upper()
-        elif 'Vendor' in df.columns:
-            df['Vendor_Clean'] = df['Vendor'].str.strip().str.upper()
-        else:
-            df['Vendor_Clean'] = 'UNKNOWN'
+# Pembersihan dan cache Feather ada di cleaning.py (dipakai juga oleh etl.py & batch_report.py).
+# Dataset bersih disimpan sekali per proses dan dipakai bersama semua sesi; sesi hanya
+# memegang row id hasil filter (lihat load_into_store di cleaning.py).
+@st.cache_resource
+def get_dataset_store():
+    """Penyimpanan dataset bersih per proses worker, dipakai bersama semua sesi."""
+    return AggregateMemo(max_entries=SHARED_DATASET_ENTRIES, max_bytes=SHARED_DATASET_BYTES)
 
-        month_map = {
-            'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4, 'Mei': 5, 'Juni': 6,
-            'Juli': 7, 'Agustus': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12, 'Nopember': 11
-        }
-        df['Bulan'] = df['Bulan'].replace({'Nopember': 'November'})
-        df['Month_Num'] = df['Bulan'].map(month_map)
-        df = df[df['Total Biaya'] > 1]
-        df['Tahun'] = df['Tahun'].astype(int)
-        
-        if 'Type' in df.columns:
-            df['Type'] = df.groupby('Nopol')['Type'].transform(lambda x: x.mode()[0] if not x.mode().empty else "UNKNOWN")
-        else: 
-            df['Type'] = 'UNKNOWN'
-            
-        return df, None
-    except Exception as e: 
-        return None, f"Error: {str(e)}"
+
+def load_default_data(prefer_specific_type=False, file_path=DEFAULT_DATA_FILE, store=None):
+    """Dataset bawaan dari store bersama; berganti otomatis jika file di disk berubah."""
+    return load_dataset_file(get_dataset_store() if store is None else store, file_path, prefer_specific_type)
+
+
+def get_upload_digest(uploaded_file):
+    """Hash isi file upload, dihitung sekali per upload per sesi."""
+    state_key = f"upload_digest_{uploaded_file.file_id}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = get_source_digest(uploaded_file)
+    return st.session_state[state_key]
+
+
+def load_uploaded_data(uploaded_file, prefer_specific_type=False):
+    """Load file upload: jalur biasa untuk file kecil, jalur streaming untuk file besar.
+
+    Hasilnya masuk store bersama berdasarkan isi file, jadi file yang sama dari
+    beberapa sesi hanya dimuat dan disimpan sekali.
+    """
+    digest = get_upload_digest(uploaded_file)
+    key = ('upload', digest, prefer_specific_type)
+    if uploaded_file.size < STREAMING_THRESHOLD_BYTES:
+        return load_into_store(get_dataset_store(), key, lambda: load_and_process_data(uploaded_file, prefer_specific_type))
+    return load_into_store(get_dataset_store(), key, lambda: load_large_upload(uploaded_file, digest, prefer_specific_type))
+
+
+def load_large_upload(uploaded_file, digest, prefer_specific_type=False):
+    cache_key = get_cache_key(digest, prefer_specific_type)
+    df, error = read_cached_dataset(cache_key), None
+    if df is None:
+        progress = st.progress(0.0, text="Memuat file besar secara bertahap...")
+        df, error = load_csv_streaming(
+            uploaded_file,
+            prefer_specific_type,
+            on_progress=lambda frac: progress.progress(frac, text=f"Memuat file besar... {frac:.0%}")
+        )
+        progress.empty()
+        if df is not None:
+            write_cached_dataset(df, cache_key)
+    if df is not None:
+        df.attrs['fingerprint'] = cache_key
+    return df, error
+
+
+def process_rss_bytes():
+    """RSS proses saat ini (Linux), None jika tidak tersedia."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
 
 # ==========================================
 # CHART HELPER (RESPONSIVE)
 # ==========================================
-def render_chart_card(title, fig, height=450):
+FIGURE_CACHE_ENTRIES = int(os.environ.get("DASHBOARD_FIGURE_ENTRIES", 128))
+FIGURE_CACHE_BYTES = int(os.environ.get("DASHBOARD_FIGURE_MB", 32)) * 1024 * 1024
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache spesifikasi figure (JSON) per proses worker, dipakai bersama semua sesi."""
+    return AggregateMemo(max_entries=FIGURE_CACHE_ENTRIES, max_bytes=FIGURE_CACHE_BYTES)
+
+
+def apply_chart_theme(fig, tokens, height):
+    """Terapkan layout tema (template, font, warna grid) ke figure Plotly."""
+    fig.update_layout(
+        template=tokens["plotly_template"],
+        separators=".,",
+        title_text="",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Poppins', color=tokens["plot_text"]),
+        margin=dict(l=40, r=40, t=20, b=40),
+        height=height,
+        xaxis=dict(showgrid=False, zeroline=False, color=tokens["plot_text"]),
+        yaxis=dict(showgrid=True, gridcolor=tokens["plot_grid"], zeroline=False, color=tokens["plot_text"]),
+        legend=dict(font=dict(family='Poppins', color=tokens["plot_text"]))
+    )
+
+
+def build_figure_spec(build, tokens, height):
+    """Bangun figure, terapkan tema, lalu serialisasi ke JSON (None jika tidak ada data)."""
+    fig = build()
+    if fig is None:
+        return None
+    apply_chart_theme(fig, tokens, height)
+    return fig.to_json()
+
+
+def get_figure_spec(build, cache_key, tokens, height=450, figures=None):
+    """Spesifikasi JSON bertema dari cache figure bersama (dibangun saat belum ada)."""
+    theme_key = tuple(sorted(tokens.items()))
+    return (get_figure_cache() if figures is None else figures).get((cache_key, theme_key, height), lambda: build_figure_spec(build, tokens, height))
+
+
+def render_chart_card(title, fig, height=450, cache_key=None):
+    """Render grafik dalam kartu bertema.
+
+    `fig` boleh berupa figure atau fungsi pembangun. Jika `cache_key` diberikan
+    (kunci data/filter + jenis grafik), spesifikasi JSON yang sudah bertema diambil
+    dari cache bersama sehingga rerun tanpa perubahan data/tema tidak membangun ulang.
+    """
+    current_theme = st.session_state.get("theme_mode", "Ikuti Tema Pengguna")
+    tokens = get_theme_tokens(current_theme)
+    if cache_key is not None:
+        spec = get_figure_spec(fig if callable(fig) else (lambda: fig), cache_key, tokens, height)
+        fig = json.loads(spec) if spec is not None else None
+    else:
+        if callable(fig):
+            fig = fig()
+        if fig is not None:
+            apply_chart_theme(fig, tokens, height)
+
     if fig:
-        current_theme = st.session_state.get("theme_mode", "Ikuti Tema Pengguna")
-        tokens = get_theme_tokens(current_theme)
-        fig.update_layout(
-            template=tokens["plotly_template"],
-            separators=".,",
-            title_text="",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(family='Poppins', color=tokens["plot_text"]),
-            margin=dict(l=40, r=40, t=20, b=40),
-            height=height,
-            xaxis=dict(showgrid=False, zeroline=False, color=tokens["plot_text"]),
-            yaxis=dict(showgrid=True, gridcolor=tokens["plot_grid"], zeroline=False, color=tokens["plot_text"]),
-            legend=dict(font=dict(family='Poppins', color=tokens["plot_text"]))
-        )
         st.markdown(f"""
         <div class="chart-container">
             <div style="font-weight: 700; font-size: 1.1em; margin-bottom: 15px; text-transform: uppercase; border-bottom: 2px solid var(--border-theme); padding-bottom: 10px;">
@@ -617,6 +789,7 @@ def render_chart_card(title, fig, height=450):
         st.plotly_chart(fig, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+
 def apply_table_theme(styler, gradient_subset=None, cmap="Blues"):
     """Make pandas Styler tables readable in both dark and light modes.
 
@@ -680,7 +853,8 @@ def render_theme_table(df_to_show, formatters=None, gradient_subset=None, cmap="
     isi tabel bisa terlihat putih/kosong. HTML table lebih stabil karena seluruh
     warna dikontrol lewat CSS token tema.
     """
-    styled_df = df_to_show.copy()
+    # Salinan dangkal: dengan Copy-on-Write, kolom yang diformat tidak menyentuh frame asal.
+    styled_df = df_to_show.copy(deep=False)
 
     if formatters:
         for col, fmt in formatters.items():
@@ -688,7 +862,7 @@ def render_theme_table(df_to_show, formatters=None, gradient_subset=None, cmap="
                 if callable(fmt):
                     styled_df[col] = styled_df[col].apply(fmt)
                 elif isinstance(fmt, str):
-                    styled_df[col] = styled_df[col].apply(lambda x, f=fmt: f.format(x))
+                    styled_df[col] = format_with_pattern(styled_df[col].to_numpy(), fmt)
 
     html_table = styled_df.to_html(escape=False, index=True, classes="theme-html-table")
     st.markdown(f"""
@@ -697,79 +871,118 @@ def render_theme_table(df_to_show, formatters=None, gradient_subset=None, cmap="
     </div>
     """, unsafe_allow_html=True)
 
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+TABLE_DEFAULT_ORDER = "Urutan awal"
+
+
+def sort_positions(values, ascending=True):
+    """Urutan posisi (stabil) untuk satu kolom; kategori diurutkan menurut kodenya."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.codes
+    values = values.to_numpy()
+    if ascending:
+        return np.argsort(values, kind='stable')
+    # Turun tetap stabil: nilai yang sama mempertahankan urutan awalnya
+    return (len(values) - 1 - np.argsort(values[::-1], kind='stable'))[::-1]
+
+
+def render_paginated_table(data, key, rows=None, columns=None, formatters=None, gradient_subset=None, cmap="Blues", height=360, page_sizes=TABLE_PAGE_SIZES):
+    """Render tabel bertema per halaman; hanya baris di halaman aktif yang diambil, diformat, dan dikirim.
+
+    `rows` (row id / posisi, None = semua baris) dan `columns` memilih isi tabel
+    tanpa menyalin `data`. Pengurutan dan pemotongan halaman dilakukan di server
+    pada row id, lalu potongan halaman dirender dengan render_theme_table sehingga
+    token tema gelap/terang tetap sama.
+    """
+    columns = list(data.columns) if columns is None else columns
+    total_rows = len(data) if rows is None else len(rows)
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+    with c1:
+        sort_col = st.selectbox("Urutkan", [TABLE_DEFAULT_ORDER] + columns, key=f"{key}_sort")
+    with c2:
+        direction = st.selectbox("Arah", ["Naik", "Turun"], key=f"{key}_dir", disabled=sort_col == TABLE_DEFAULT_ORDER)
+    with c3:
+        page_size = st.selectbox("Baris / halaman", page_sizes, index=min(1, len(page_sizes) - 1), key=f"{key}_size")
+
+    n_pages = max(1, -(-total_rows // page_size))
+    page_key = f"{key}_page"
+    # Filter bisa memperkecil jumlah halaman; jepit halaman aktif sebelum widget dibuat
+    if st.session_state.setdefault(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    with c4:
+        page = st.number_input("Halaman", min_value=1, max_value=n_pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    positions = np.arange(len(data)) if rows is None else np.asarray(rows)
+    if sort_col != TABLE_DEFAULT_ORDER:
+        # Hanya satu kolom kunci urut yang diambil untuk row id terpilih.
+        values = data[sort_col] if rows is None else data[sort_col].take(positions)
+        positions = positions[sort_positions(values, ascending=direction == "Naik")]
+    page_df = data.take(positions[start:start + page_size])[columns]
+
+    render_theme_table(page_df, formatters=formatters, gradient_subset=gradient_subset, cmap=cmap, height=height)
+    end = min(start + page_size, total_rows)
+    st.caption(f"Baris {start + 1 if total_rows else 0:,}–{end:,} dari {total_rows:,} · Halaman {page} dari {n_pages}")
+
+def tab_is_open(tab):
+    """True jika tab aktif. Tanpa pelacakan state (.open None) semua tab dianggap aktif."""
+    return getattr(tab, 'open', None) is not False
+
+
+def render_time_controls(key, aggregate_rows):
+    """Pilihan granularitas & rentang tanggal timeline. Return (granularitas, (awal, akhir))."""
+    has_dates = aggregate_rows(has_daily_dates)
+    options = list(TIME_GRANULARITIES) if has_dates else ['Bulanan']
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        granularity = st.selectbox(
+            "Granularitas", options, key=f"{key}_granularity",
+            help=None if has_dates else "Data belum memiliki kolom Tanggal; hanya tersedia Bulanan."
+        )
+    start, end = aggregate_rows(date_bounds, granularity)
+    if start >= end:
+        return granularity, (start, end)
+    with c2:
+        date_range = st.slider(
+            "Rentang tanggal", min_value=start, max_value=end, value=(start, end),
+            format="DD MMM YYYY", key=f"{key}_range_{granularity}_{start}_{end}"
+        )
+    return granularity, tuple(date_range)
+
 # ==========================================
-# ANALYSIS FUNCTIONS
+# AGGREGATE CUBE, FILTER INDEX & MEMO
 # ==========================================
-def calculate_yearly_summary(df):
-    summary = df.groupby('Tahun').agg({'Total Biaya': ['sum', 'mean', 'count']}).round(0)
-    summary.columns = ['Total_Pengeluaran', 'Rata_Rata', 'Jumlah_Transaksi']
-    return summary
+# Cube, FilterIndex, AggregateMemo, dan fungsi analisis ada di analytics.py (dipakai juga
+# oleh batch_report.py & api.py); di sini hanya instance per proses worker. Cube dan
+# index disimpan di memo biasa (bukan cache_resource per fungsi) supaya thread latar
+# (warm-up, API) bisa mengisinya tanpa konteks skrip Streamlit.
+RESOURCE_CACHE_ENTRIES = 3 * SHARED_DATASET_ENTRIES
 
-def get_top_vendors(df, top_n=10):
-    return df.groupby('Vendor_Clean')['Total Biaya'].sum().sort_values(ascending=False).head(top_n)
 
-def get_top_units(df, top_n=10):
-    top_units = df.groupby(['Nopol', 'Type']).agg({'Total Biaya': 'sum', 'Bulan': 'count'})
-    top_units.columns = ['Total_Biaya', 'Frekuensi_Servis']
-    return top_units.sort_values(by='Total_Biaya', ascending=False).head(top_n)
-
-def calculate_monthly_category_trend(df):
-    trend = df.groupby(['Tahun', 'Month_Num', 'Bulan', 'Keterangan'])['Total Biaya'].sum().reset_index()
-    
-    if not trend.empty:
-        tahuns = trend['Tahun'].unique()
-        kategoris = trend['Keterangan'].unique()
-        month_map_local = {
-            'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4, 'Mei': 5, 'Juni': 6,
-            'Juli': 7, 'Agustus': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
-        }
-        
-        all_combinations = []
-        for y in tahuns:
-            for name, num in month_map_local.items():
-                for k in kategoris:
-                    all_combinations.append({'Tahun': y, 'Month_Num': num, 'Bulan': name, 'Keterangan': k})
-                    
-        all_df = pd.DataFrame(all_combinations)
-        trend = pd.merge(all_df, trend, on=['Tahun', 'Month_Num', 'Bulan', 'Keterangan'], how='left')
-        trend['Total Biaya'] = trend['Total Biaya'].fillna(0)
-        
-    return trend.sort_values(['Tahun', 'Month_Num'])
+@st.cache_resource
+def get_resource_cache():
+    """Cube & FilterIndex per fingerprint dataset, dipakai bersama semua sesi."""
+    return AggregateMemo(max_entries=RESOURCE_CACHE_ENTRIES, max_bytes=SHARED_DATASET_BYTES)
 
 
-def calculate_monthly_trend(df):
-    monthly = df.groupby(['Tahun', 'Month_Num', 'Bulan'])['Total Biaya'].sum().reset_index()
-    
-    if not monthly.empty:
-        tahuns = monthly['Tahun'].unique()
-        month_map_local = {
-            'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4, 'Mei': 5, 'Juni': 6,
-            'Juli': 7, 'Agustus': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
-        }
-        all_months = pd.DataFrame([{ 'Tahun': y, 'Month_Num': num, 'Bulan': name } for y in tahuns for name, num in month_map_local.items()])
-        monthly = pd.merge(all_months, monthly, on=['Tahun', 'Month_Num', 'Bulan'], how='left')
-        monthly['Total Biaya'] = monthly['Total Biaya'].fillna(0)
-        
-    return monthly.sort_values(['Tahun', 'Month_Num'])
+def get_aggregate_cube(df, fingerprint, resources=None):
+    """Cube untuk seluruh dataset, dibangun sekali per dataset (per fingerprint)."""
+    resources = get_resource_cache() if resources is None else resources
+    return resources.get(('cube', fingerprint), lambda: build_aggregate_cube(df))
 
-def calculate_category_distribution(df):
-    return df.groupby('Keterangan')['Total Biaya'].agg(['sum', 'count']).sort_values('sum', ascending=False)
 
-def calculate_type_statistics(df):
-    type_stats = df.groupby('Type').agg({'Total Biaya': ['sum', 'mean', 'count'], 'Nopol': 'nunique'})
-    type_stats.columns = ['Total_Biaya', 'Avg_Biaya', 'Transaksi', 'Jumlah_Unit']
-    return type_stats.sort_values('Total_Biaya', ascending=False)
+def get_filter_index(frame, fingerprint, resources=None):
+    """FilterIndex per dataset (atau per cube), dibangun sekali per fingerprint."""
+    resources = get_resource_cache() if resources is None else resources
+    return resources.get(('index', fingerprint), lambda: FilterIndex(frame))
 
 
-def detect_duplicates(df):
-    return df[df.duplicated(subset=['Bulan', 'Tahun', 'Nopol', 'Total Biaya', 'Vendor_Clean'], keep=False)]
+@st.cache_resource
+def get_aggregate_memo():
+    """Satu memo per proses worker, dipakai bersama oleh semua sesi."""
+    return AggregateMemo()
 
 # --- Chart Creators ---
-def format_currency_text(val):
-    if val >= 1e9:
-        return f"Rp {val/1e9:,.1f} Miliar"
-    return f"Rp {val/1e6:,.0f} Juta"
-
 def generate_tick_labels(max_value, num_ticks=6):
     '''Generates specific tick values and texts to avoid 1000 Juta and B/Billion'''
     if max_value <= 0:
@@ -782,25 +995,14 @@ def generate_tick_labels(max_value, num_ticks=6):
     if step == 0: step = magnitude
     
     tickvals = []
-    ticktext = []
     
     current = 0
     while current <= max_value * 1.1:
         tickvals.append(current)
-        if current == 0:
-            ticktext.append("0 Juta")
-        elif current >= 1e9:
-            # Format to Miliar, remove trailing .0 if integer Miliar
-            val_m = current / 1e9
-            text = f"{val_m:.1f} Miliar".replace(".0 Miliar", " Miliar")
-            ticktext.append(text)
-        else:
-            val_j = current / 1e6
-            text = f"{val_j:.0f} Juta"
-            ticktext.append(text)
         current += step
 
-    return tickvals, ticktext
+    # Juta / Miliar (tanpa .0 untuk Miliar bulat)
+    return tickvals, format_axis_amount(tickvals).tolist()
 
 def create_yearly_trend_chart(summary_df):
     if summary_df.empty: return None
@@ -811,7 +1013,7 @@ def create_yearly_trend_chart(summary_df):
     fig.add_trace(go.Scatter(
         x=years, y=costs, customdata=costs, mode='lines+markers',
         line=dict(color='#667eea', width=3), marker=dict(size=10, color='#764ba2'),
-        text=[format_currency_text(val) for val in costs], textposition='top center',
+        text=format_currency(costs).tolist(), textposition='top center',
         hovertemplate='<b>Tahun %{x}</b><br>Total: %{text}<extra></extra>'
     ))
     
@@ -831,16 +1033,20 @@ def create_vendor_pie_chart(vendor_df):
     )])
     return fig
 
-def create_timeline_chart(monthly_df):
+def timeline_hover_date(granularity):
+    return '%{x|%B %Y}' if granularity == 'Bulanan' else '%{x|%d %B %Y}'
+
+def create_timeline_chart(monthly_df, granularity='Bulanan', max_points=MAX_TIMELINE_POINTS):
     if monthly_df.empty: return None
-    monthly_df = monthly_df.copy()
-    monthly_df['Date'] = pd.to_datetime(monthly_df['Tahun'].astype(str) + '-' + monthly_df['Month_Num'].astype(str) + '-01')
+    if 'Date' not in monthly_df.columns:
+        monthly_df = monthly_df.assign(Date=pd.to_datetime(monthly_df['Tahun'].astype(str) + '-' + monthly_df['Month_Num'].astype(str) + '-01'))
+    monthly_df = downsample_series(monthly_df, max_points)
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=monthly_df['Date'], y=monthly_df['Total Biaya'], customdata=monthly_df['Total Biaya'],
-        mode='lines+markers', line=dict(color='#667eea', width=3), marker=dict(size=8, color='#764ba2'),
-        hovertemplate='<b>%{x|%B %Y}</b><br>Rp %{customdata:,.0f}<extra></extra>'
+        mode='lines+markers' if len(monthly_df) <= 120 else 'lines', line=dict(color='#667eea', width=3), marker=dict(size=8, color='#764ba2'),
+        hovertemplate=f'<b>{timeline_hover_date(granularity)}</b><br>Rp %{{customdata:,.0f}}<extra></extra>'
     ))
 
     max_cost = monthly_df['Total Biaya'].max() if not monthly_df.empty else 0
@@ -848,33 +1054,25 @@ def create_timeline_chart(monthly_df):
     fig.update_yaxes(tickvals=t_vals, ticktext=t_text, range=[0, t_vals[-1] if t_vals else max_cost * 1.2])
     return fig
 
-def create_category_timeline_chart(trend_df, top_n=5):
+def create_category_timeline_chart(trend_df, top_n=5, granularity='Bulanan', max_points=MAX_TIMELINE_POINTS):
     if trend_df.empty: return None
-    trend_df = trend_df.copy()
-    
     # Filter to top N categories to avoid spaghetti chart
-    top_cats = trend_df.groupby('Keterangan')['Total Biaya'].sum().nlargest(top_n).index
+    top_cats = trend_df.groupby('Keterangan', observed=True)['Total Biaya'].sum().nlargest(top_n).index
     trend_df = trend_df[trend_df['Keterangan'].isin(top_cats)]
     
-    # Ensure every month has a data point for every top category
-    tahuns = trend_df['Tahun'].unique()
-    month_map_local = {
-        'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4, 'Mei': 5, 'Juni': 6,
-        'Juli': 7, 'Agustus': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
-    }
-    
-    all_combinations = []
-    for y in tahuns:
-        for name, num in month_map_local.items():
-            for k in top_cats:
-                all_combinations.append({'Tahun': y, 'Month_Num': num, 'Bulan': name, 'Keterangan': k})
-                
-    all_df = pd.DataFrame(all_combinations)
-    trend_df = pd.merge(all_df, trend_df, on=['Tahun', 'Month_Num', 'Bulan', 'Keterangan'], how='left')
-    trend_df['Total Biaya'] = trend_df['Total Biaya'].fillna(0)
-    trend_df = trend_df.sort_values(['Tahun', 'Month_Num'])
+    if 'Date' not in trend_df.columns:
+        # Ensure every month has a data point for every top category
+        totals = trend_df.groupby(['Tahun', 'Month_Num', 'Keterangan'], observed=True)['Total Biaya'].sum()
+        trend_df = complete_month_grid(totals, top_cats)
+        trend_df['Date'] = pd.to_datetime(trend_df['Tahun'].astype(str) + '-' + trend_df['Month_Num'].astype(str) + '-01')
+    else:
+        # Seri sudah lengkap (calculate_time_series); urutkan trace sesuai top_cats
+        trend_df = trend_df.set_index('Keterangan').loc[top_cats].reset_index()
     
-    trend_df['Date'] = pd.to_datetime(trend_df['Tahun'].astype(str) + '-' + trend_df['Month_Num'].astype(str) + '-01')
+    if trend_df.groupby('Keterangan', observed=True).size().max() > max_points:
+        trend_df = pd.concat(
+            [downsample_series(group, max_points, method='minmax') for _, group in trend_df.groupby('Keterangan', sort=False, observed=True)]
+        )
     
     max_cost = trend_df['Total Biaya'].max() if not trend_df.empty else 0
     t_vals, t_text = generate_tick_labels(max_cost)
@@ -883,16 +1081,25 @@ def create_category_timeline_chart(trend_df, top_n=5):
         trend_df, x='Date', y='Total Biaya', color='Keterangan', markers=True,
         color_discrete_sequence=px.colors.qualitative.Bold, custom_data=['Total Biaya']
     )
-    fig.update_traces(hovertemplate='<b>%{x|%B %Y}</b><br>Kategori: %{data.name}<br>Rp %{customdata[0]:,.0f}<extra></extra>')
+    fig.update_traces(hovertemplate=f'<b>{timeline_hover_date(granularity)}</b><br>Kategori: %{{data.name}}<br>Rp %{{customdata[0]:,.0f}}<extra></extra>')
+    if len(trend_df) > 120 * max(len(top_cats), 1):
+        fig.update_traces(mode='lines')
     fig.update_yaxes(tickvals=t_vals, ticktext=t_text, range=[0, t_vals[-1] if t_vals else max_cost*1.2])
     return fig
 
 def create_monthly_heatmap(df):
-    pivot = df.pivot_table(values='Total Biaya', index='Bulan', columns='Tahun', aggfunc='sum', fill_value=0)
-    order = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
-    pivot = pivot.reindex(order, axis=0, fill_value=0)
+    totals = as_cube(df).groupby(['Tahun', 'Month_Num'], observed=True)['Total Biaya'].sum()
+    if totals.empty:
+        pivot = pd.DataFrame(0.0, index=pd.Index(MONTH_ORDER, name='Bulan'), columns=pd.Index([], name='Tahun'))
+    else:
+        grid = complete_month_grid(totals)
+        pivot = pd.DataFrame(
+            grid['Total Biaya'].to_numpy().reshape(-1, 12).T,
+            index=pd.Index(MONTH_ORDER, name='Bulan'),
+            columns=pd.Index(grid['Tahun'].unique(), name='Tahun'),
+        )
     
-    texts = [[(f'{val/1e9:.1f} Miliar'.replace('.0 Miliar', ' Miliar') if val>=1e9 else f'{val/1e6:.1f} Juta') if val>0 else '0' for val in row] for row in pivot.values]
+    texts = format_short_amount(pivot.values).reshape(pivot.shape).tolist()
         
     fig = go.Figure(data=go.Heatmap(
         z=pivot.values, x=pivot.columns, y=pivot.index, colorscale='Blues',
@@ -928,7 +1135,7 @@ def create_vendor_comparison_chart(vendor_df, top_n=10):
     fig = go.Figure(data=[go.Bar(
         y=top.index, x=top.values, customdata=top.values, orientation='h',
         marker=dict(color=top.values, colorscale='Plasma', showscale=False),
-        text=[format_currency_text(val) for val in top.values], 
+        text=format_currency(top.values).tolist(), 
         textposition='outside', cliponaxis=False,
         hovertemplate='<b>%{y}</b><br>Rp %{customdata:,.0f}<extra></extra>'
     )])
@@ -942,27 +1149,95 @@ def create_vendor_comparison_chart(vendor_df, top_n=10):
     )
     return fig
 
-def create_scatter_plot(df):
-    stats = df.groupby('Nopol').agg({'Total Biaya': 'sum', 'Bulan': 'count', 'Type': 'first'}).reset_index()
+SCATTER_HOVER_TEMPLATE = '<b>Nopol: %{customdata[0]}</b><br>Tipe: %{customdata[1]}<br>Frekuensi: %{x}x<br>Total: Rp %{customdata[2]:,.0f}<br>Rata-rata/Servis: Rp %{customdata[3]:,.0f}<extra></extra>'
+# Di atas jumlah titik ini scatter memakai WebGL (Scattergl) alih-alih SVG
+SCATTER_WEBGL_THRESHOLD = int(os.environ.get("DASHBOARD_WEBGL_POINTS", 2000))
+SCATTER_DENSITY_BINS = 60
+# Mode density hanya mengirim grid bin ditambah titik kendaraan berbiaya terbesar ini
+SCATTER_DENSITY_POINTS = int(os.environ.get("DASHBOARD_DENSITY_POINTS", 500))
+
+
+def count_scatter_points(df):
+    """Jumlah titik scatter (satu per Nopol) untuk memilih mode render."""
+    return as_cube(df)['Nopol'].nunique()
+
+
+def density_heatmap(x, y, bins=SCATTER_DENSITY_BINS):
+    """Histogram 2D yang dihitung di server: payload grid bins x bins, bukan semua titik."""
+    x = np.asarray(x, dtype='int64')
+    # Frekuensi servis berupa bilangan bulat: lebar bin x dibulatkan ke atas ke 1, 2, 3, ...
+    x_min, x_max = (int(x.min()), int(x.max())) if len(x) else (0, 0)
+    x_step = max(1, -(-(x_max - x_min + 1) // bins))
+    x_edges = np.arange(x_min, x_max + x_step + 1, x_step) - 0.5
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=[x_edges, bins])
+    z = counts.T
+    x_low, x_high = format_with_pattern(x_edges[:-1] + 0.5, '{:.0f}'), format_with_pattern(x_edges[1:] - 0.5, '{:.0f}')
+    x_labels = np.where(x_low == x_high, x_low, x_low + '–' + x_high)
+    y_labels = format_currency(y_edges[:-1]) + ' – ' + format_currency(y_edges[1:])
+    customdata = np.stack(np.broadcast_arrays(x_labels[None, :], y_labels[:, None]), axis=-1)
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(z > 0, z, np.nan), customdata=customdata,
+        colorscale='Blues', colorbar=dict(title="Kendaraan"),
+        hovertemplate='Frekuensi: %{customdata[0]}x<br>Total: %{customdata[1]}<br>%{z} kendaraan<extra></extra>'
+    )
+
+
+def create_scatter_plot(df, density=False, webgl_threshold=SCATTER_WEBGL_THRESHOLD):
+    """Scatter frekuensi vs total biaya per kendaraan.
+
+    Armada besar (> webgl_threshold titik) dirender dengan WebGL, satu trace per
+    Type seperti px.scatter. Mode `density` menampilkan histogram 2D sebagai
+    ikhtisar dan hanya menyertakan SCATTER_DENSITY_POINTS kendaraan berbiaya
+    terbesar (pencilan di bin yang jarang) sebagai titik dengan hover per kendaraan.
+    """
+    stats = as_cube(df).groupby('Nopol', observed=True).agg({'Total Biaya': 'sum', 'Jumlah': 'sum', 'Type': 'first'}).reset_index()
+    stats = stats.rename(columns={'Jumlah': 'Bulan'})
     stats['Avg Biaya'] = stats['Total Biaya'] / stats['Bulan']
+    hover_cols = ['Nopol', 'Type', 'Total Biaya', 'Avg Biaya']
     
-    fig = px.scatter(
-        stats, x='Bulan', y='Total Biaya', hover_data=['Nopol', 'Type', 'Total Biaya', 'Avg Biaya'], color='Type',
-        size='Avg Biaya', color_discrete_sequence=px.colors.qualitative.Vivid, title=None
-    )
+    if density:
+        fig = go.Figure(density_heatmap(stats['Bulan'], stats['Total Biaya']))
+        top = stats.nlargest(SCATTER_DENSITY_POINTS, 'Total Biaya')
+        fig.add_trace(go.Scattergl(
+            x=top['Bulan'], y=top['Total Biaya'], mode='markers', customdata=top[hover_cols].to_numpy(),
+            marker=dict(size=4, color='#764ba2', opacity=0.6), showlegend=False,
+            hovertemplate=SCATTER_HOVER_TEMPLATE
+        ))
+    elif len(stats) > webgl_threshold:
+        # Satu trace WebGL per Type (urutan & warna sama dengan px.scatter) agar legenda tetap ada
+        palette = px.colors.qualitative.Vivid
+        sizeref = 2.0 * (stats['Avg Biaya'].max() if not stats.empty else 1) / (20 ** 2)
+        fig = go.Figure()
+        for i, (vehicle_type, group) in enumerate(stats.groupby('Type', observed=True, sort=False)):
+            fig.add_trace(go.Scattergl(
+                x=group['Bulan'], y=group['Total Biaya'], mode='markers', name=str(vehicle_type),
+                legendgroup=str(vehicle_type), customdata=group[hover_cols].to_numpy(),
+                marker=dict(
+                    color=palette[i % len(palette)], size=group['Avg Biaya'],
+                    sizemode='area', sizeref=sizeref, sizemin=2, opacity=0.8
+                ),
+                hovertemplate=SCATTER_HOVER_TEMPLATE
+            ))
+        fig.update_layout(legend_title_text='Type')
+    else:
+        fig = px.scatter(
+            stats, x='Bulan', y='Total Biaya', hover_data=hover_cols, color='Type',
+            size='Avg Biaya', color_discrete_sequence=px.colors.qualitative.Vivid, title=None
+        )
+        fig.update_traces(hovertemplate=SCATTER_HOVER_TEMPLATE)
     
     max_cost = stats['Total Biaya'].max() if not stats.empty else 0
     t_vals, t_text = generate_tick_labels(max_cost)
     
     fig.update_layout(xaxis_title="Frekuensi Servis", yaxis_title="Total Biaya")
-    fig.update_traces(hovertemplate='<b>Nopol: %{customdata[0]}</b><br>Tipe: %{customdata[1]}<br>Frekuensi: %{x}x<br>Total: Rp %{customdata[2]:,.0f}<br>Rata-rata/Servis: Rp %{customdata[3]:,.0f}<extra></extra>')
     fig.update_yaxes(tickvals=t_vals, ticktext=t_text, range=[0, t_vals[-1] if t_vals else max_cost*1.2])
     return fig
 
 def create_type_distribution_chart(type_stats):
     if type_stats.empty: return None
     
-    hover_texts = [format_currency_text(val) for val in type_stats['Total_Biaya']]
+    hover_texts = format_currency(type_stats['Total_Biaya']).tolist()
     
     fig = go.Figure(data=[go.Pie(
         labels=type_stats.index,
@@ -979,7 +1254,7 @@ def create_category_chart(category_df):
     fig = go.Figure(data=[go.Bar(
         y=category_df.index, x=category_df['sum'], customdata=category_df['sum'], orientation='h',
         marker=dict(color=category_df['sum'], colorscale='Viridis', showscale=False),
-        text=[format_currency_text(val) for val in category_df['sum']], 
+        text=format_currency(category_df['sum']).tolist(), 
         textposition='outside', cliponaxis=False,
         hovertemplate='<b>%{y}</b><br>Rp %{customdata:,.0f}<extra></extra>'
     )])
@@ -995,8 +1270,8 @@ def create_category_chart(category_df):
     return fig
 
 def render_footer():
-    sby_logo = get_image_as_base64('SBY.png') or ''
-    its_logo = get_image_as_base64('ITS.png') or ''
+    sby_logo = get_image_data_uri('SBY.png')
+    its_logo = get_image_data_uri('ITS.png')
     
     st.markdown("""
     <div class="footer">
@@ -1017,10 +1292,669 @@ def render_footer():
         <div style="font-size: 0.7em; margin-top: 20px; opacity: 0.5;">© 2026 - Analisis Biaya Kendaraan</div>
     </div>
     """.format(
-        sby_logo_html=f'<img src="data:image/png;base64,{sby_logo}" width="60">' if sby_logo else '',
-        its_logo_html=f'<img src="data:image/png;base64,{its_logo}" width="180">' if its_logo else ''
+        sby_logo_html=f'<img src="{sby_logo}" width="60">' if sby_logo else '',
+        its_logo_html=f'<img src="{its_logo}" width="180">' if its_logo else ''
     ), unsafe_allow_html=True)
 
+# ==========================================
+# EXPORT
+# ==========================================
+# Unduhan dibuat hanya saat tombol diklik (download_button menerima callable) dan
+# ditulis per potongan baris langsung dari dataset lewat daftar row id filter,
+# jadi rerun biasa tidak lagi membangun CSV yang belum tentu diunduh.
+# Batasnya: Streamlit menyimpan hasil callable sebagai bytes utuh di media file
+# manager, jadi file hasil tetap ada lengkap di memori (sekali per klik). Yang
+# dipotong hanya serialisasinya; tidak ada salinan frame terfilter penuh.
+def export_csv(data, rows, columns, compress=False):
+    """CSV (opsional gzip) yang ditulis per potongan ke satu buffer; hasilnya bytes utuh."""
+    buffer = io.BytesIO()
+    raw = gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) if compress else buffer
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    for i, chunk in enumerate(iter_row_chunks(data, rows, columns)):
+        chunk.to_csv(text, index=False, header=(i == 0))
+    if len(rows) == 0:
+        data.iloc[:0][columns].to_csv(text, index=False)
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()
+    return buffer.getvalue()
+
+
+def export_parquet(data, rows, columns):
+    """Parquet dengan satu row group per potongan, ditulis ke satu buffer; hasilnya bytes utuh."""
+    buffer = io.BytesIO()
+    schema = pa.Schema.from_pandas(data.iloc[:0][columns], preserve_index=False)
+    with pq.ParquetWriter(buffer, schema, compression='zstd') as writer:
+        for chunk in iter_row_chunks(data, rows, columns):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv', export_csv),
+    'CSV (gzip)': ('.csv.gz', 'application/gzip', lambda data, rows, columns: export_csv(data, rows, columns, compress=True)),
+}
+if pq is not None:
+    EXPORT_FORMATS['Parquet'] = ('.parquet', 'application/vnd.apache.parquet', export_parquet)
+
+
+def render_export_button(data, rows, columns, file_stem, key):
+    """Pilihan format + tombol unduh yang baru membangun file saat diklik."""
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        fmt = st.selectbox("Format", list(EXPORT_FORMATS), key=f"{key}_format", label_visibility="collapsed")
+    suffix, mime, export = EXPORT_FORMATS[fmt]
+    with c2:
+        st.download_button(
+            label=f"📥 Download Data {fmt}",
+            data=lambda: export(data, rows, columns),
+            file_name=f"{file_stem}{suffix}",
+            mime=mime,
+            on_click="ignore",
+            key=f"{key}_download",
+        )
+
+# ==========================================
+# AUDIT WORKBOOK
+# ==========================================
+# Workbook lengkap Laporan Audit dibangun hanya saat diunduh, baris demi baris
+# (xlsxwriter constant_memory, atau openpyxl write_only sebagai cadangan), lalu
+# disimpan per (fingerprint dataset, filter) agar unduhan berikutnya instan. Isi sheet
+# dan penulisnya (audit_sheets, write_workbook) ada di analytics.py.
+REPORT_CACHE_ENTRIES = int(os.environ.get("DASHBOARD_REPORT_ENTRIES", 8))
+REPORT_CACHE_BYTES = int(os.environ.get("DASHBOARD_REPORT_MB", 64)) * 1024 * 1024
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@st.cache_resource
+def get_report_cache():
+    """Cache workbook Laporan Audit (bytes) per proses worker."""
+    return AggregateMemo(max_entries=REPORT_CACHE_ENTRIES, max_bytes=REPORT_CACHE_BYTES)
+
+
+def build_audit_workbook(ctx):
+    """Workbook Laporan Audit untuk filter sidebar aktif (dari cache bila ada)."""
+    def build():
+        rows = np.arange(len(ctx.dataset)) if ctx.rows is None else ctx.rows
+        audit = ctx.aggregate(compute_audit_summary)
+        return write_workbook(audit_sheets(audit, ctx.cube, ctx.dataset, rows))
+
+    return get_report_cache().get(ctx.chart_key + ('audit_workbook',), build)
+
+# ==========================================
+# PAGES
+# ==========================================
+@dataclass(frozen=True)
+class PageContext:
+    """Data yang sudah difilter sidebar, dibagikan ke fungsi halaman dan fragment.
+
+    Fragment menyimpan argumen ini per sesi, jadi isinya hanya referensi ke dataset
+    bersama, row id, dan cube terfilter (kecil); baris mentah diambil lewat `df`.
+    """
+    dataset: pd.DataFrame
+    dataset_index: FilterIndex
+    rows: object  # row id hasil filter sidebar (np.ndarray), None = semua baris
+    cube: pd.DataFrame
+    aggregate: object
+    aggregate_rows: object
+    active_filters: dict
+    chart_key: tuple
+
+    @property
+    def df(self):
+        """Baris dataset yang lolos filter sidebar, diambil saat dipakai (tidak disimpan)."""
+        return take_rows(self.dataset, self.rows)
+
+
+# Grafik Dashboard Utama per jenis (bagian akhir cache_key); dipakai juga oleh warm-up.
+DASHBOARD_FIGURES = {
+    'timeline': lambda aggregate: create_timeline_chart(aggregate(calculate_monthly_trend)),
+    'vendor_pie': lambda aggregate: create_vendor_pie_chart(aggregate(get_top_vendors)),
+}
+
+
+def render_dashboard_page(ctx):
+    """Halaman Dashboard Utama: header, kartu metrik, timeline, top unit & vendor."""
+    cube, aggregate, chart_key = ctx.cube, ctx.aggregate, ctx.chart_key
+    # 1. IDENTITAS HEADER
+    logo_uri = get_image_data_uri("bpkad.png")
+    logo_html = f'<img src="{logo_uri}">' if logo_uri else ''
+    st.markdown(f"""
+    <div class="kp-header-container">
+        <div class="kp-logo-section">{logo_html}</div>
+        <div class="kp-text-section">
+            <div class="kp-subtitle">KERJA PRAKTIK - BPKAD KOTA SURABAYA</div>
+            <div class="kp-name">Rafi Satrio Pratama - 5052231007</div>
+            <div class="kp-name">Rahardian Putra - 5052231018</div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # 2. DASHBOARD HEADER
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>🚗 Dashboard Analisis Biaya</h1>
+        <p>Monitoring & Evaluasi Pemeliharaan Kendaraan Dinas</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("<div class='section-header'>📊 Ringkasan Eksekutif</div>", unsafe_allow_html=True)
+
+    c1, c2, c3, c4 = st.columns(4)
+
+    monthly_avg_cost = aggregate(calculate_monthly_costs).mean()
+
+    metrics = [
+        ("💰 Total Pengeluaran", format_currency_text(cube['Total Biaya'].sum()).replace('Rp ', ''), "Rupiah"),
+        ("📈 Rata-rata / Bulan", format_currency_text(monthly_avg_cost).replace('Rp ', ''), "Pengeluaran per Bulan"),
+        ("📋 Total Transaksi", f"{int(cube['Jumlah'].sum()):,}", "Service Record"),
+        ("🚗 Jumlah Unit", f"{cube['Nopol'].nunique()}", "Kendaraan Aktif")
+    ]
+
+    for col, (label, val, sub) in zip([c1, c2, c3, c4], metrics):
+        with col:
+            st.markdown(f"""
+            <div class="metric-card slide-left">
+                <div class="metric-label">{label}</div>
+                <div class="metric-value">{val}</div>
+                <div style="font-size: 0.8em; opacity: 0.7;">{sub}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+    render_chart_card(
+        "Timeline Pengeluaran Bulanan",
+        lambda: DASHBOARD_FIGURES['timeline'](aggregate),
+        cache_key=chart_key + ('timeline',),
+    )
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("""
+        <div class="table-card">
+            <div class="table-card-title">🏆 10 Kendaraan Biaya Tertinggi</div>
+        """, unsafe_allow_html=True)
+        top_units = aggregate(get_top_units, 10)
+
+        if not top_units.empty:
+            display_units = top_units.reset_index()
+            display_units.index = display_units.index + 1
+            display_units.columns = ['Nopol', 'Tipe', 'Total Biaya', 'Frekuensi']
+
+            render_theme_table(
+                display_units,
+                formatters={'Total Biaya': 'Rp {:,.0f}', 'Frekuensi': '{:.0f}x'},
+                gradient_subset=['Total Biaya'],
+                cmap='Reds',
+                height=360
+            )
+        else:
+            st.info("Data kendaraan (TOP 10) belum tersedia.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    with c2:
+        render_chart_card(
+            "Distribusi Vendor Utama",
+            lambda: DASHBOARD_FIGURES['vendor_pie'](aggregate),
+            cache_key=chart_key + ('vendor_pie',),
+        )
+
+
+@st.fragment
+def render_temporal_tab(ctx):
+    """Tab Temporal: timeline, heatmap, box plot, dan bulan termahal/termurah."""
+    cube, aggregate, aggregate_rows, chart_key = ctx.cube, ctx.aggregate, ctx.aggregate_rows, ctx.chart_key
+    granularity, date_range = render_time_controls("temporal", aggregate_rows)
+    series_source = aggregate if granularity == 'Bulanan' else aggregate_rows
+    render_chart_card(
+        f"Timeline Pengeluaran {granularity}",
+        lambda: create_timeline_chart(series_source(calculate_time_series, granularity, date_range), granularity),
+        cache_key=chart_key + ('timeline', granularity, date_range),
+    )
+
+    render_chart_card("Heatmap Pengeluaran Bulanan", lambda: create_monthly_heatmap(cube), height=500, cache_key=chart_key + ('heatmap',))
+
+    c1, c2 = st.columns(2)
+    with c1:
+        render_chart_card("Distribusi Biaya per Tahun", lambda: create_box_plot(ctx.df), cache_key=chart_key + ('box',))
+    with c2:
+        monthly_data = aggregate(calculate_monthly_trend)
+        if not monthly_data.empty:
+            max_month = monthly_data.loc[monthly_data['Total Biaya'].idxmax()]
+            min_month = monthly_data.loc[monthly_data['Total Biaya'].idxmin()]
+
+            st.markdown(f"""
+            <div class="alert-box alert-danger">
+                <h4 style="margin:0;">🔝 Bulan Termahal</h4>
+                <div style="font-size: 1.2em; margin-top:5px;">{max_month['Bulan']} {int(max_month['Tahun'])}</div>
+                <div style="font-size: 1.5em; font-weight: 800;">Rp {max_month['Total Biaya']:,.0f}</div>
+            </div>
+            <div class="alert-box alert-success">
+                <h4 style="margin:0;">📉 Bulan Termurah</h4>
+                <div style="font-size: 1.2em; margin-top:5px;">{min_month['Bulan']} {int(min_month['Tahun'])}</div>
+                <div style="font-size: 1.5em; font-weight: 800;">Rp {min_month['Total Biaya']:,.0f}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+def render_vendor_tab(ctx):
+    """Tab Vendor: peringkat dan konsentrasi biaya vendor."""
+    cube, aggregate, chart_key = ctx.cube, ctx.aggregate, ctx.chart_key
+    c1, c2 = st.columns([2,1])
+    with c1:
+        render_chart_card("Peringkat Pengeluaran Service Kendaraan Dinas BPKAD per Vendor", lambda: create_vendor_comparison_chart(aggregate(get_top_vendors, 15), 15), height=600, cache_key=chart_key + ('vendor_rank', 15))
+
+    with c2:
+        total_vendor = cube['Vendor_Clean'].nunique()
+        vendor_costs = aggregate(get_top_vendors, None)
+        top_3_pct = (vendor_costs.head(3).sum() / vendor_costs.sum() * 100) if vendor_costs.sum() > 0 else 0
+
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-label">Total Vendor</div>
+            <div class="metric-value" style="font-size: 2.5em;">{total_vendor}</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-label">Konsentrasi Top 3</div>
+            <div class="metric-value" style="font-size: 2.5em; color: #764ba2;">{top_3_pct:.1f}%</div>
+            <div style="width: 100%; background: rgba(128,128,128,0.2); height: 8px; border-radius: 4px; margin-top: 5px;">
+                <div style="width: {top_3_pct}%; background: linear-gradient(90deg, #667eea, #764ba2); height: 100%; border-radius: 4px;"></div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment
+def render_vehicle_tab(ctx):
+    """Tab Kendaraan: scatter, proporsi tipe, dan tabel efisiensi."""
+    cube, aggregate, chart_key = ctx.cube, ctx.aggregate, ctx.chart_key
+    c1, c2 = st.columns([2,1])
+    with c1:
+        n_points = aggregate(count_scatter_points)
+        density = st.toggle(
+            "Ikhtisar kepadatan (density)", value=n_points > SCATTER_WEBGL_THRESHOLD,
+            help=f"{n_points:,} kendaraan. Di atas {SCATTER_WEBGL_THRESHOLD:,} titik grafik memakai WebGL."
+        )
+        render_chart_card("Korelasi Frekuensi vs Biaya", lambda: create_scatter_plot(cube, density), cache_key=chart_key + ('scatter', density))
+    with c2:
+        render_chart_card("Proporsi Tipe", lambda: create_type_distribution_chart(aggregate(calculate_type_statistics).head(10)), cache_key=chart_key + ('type_pie', 10))
+
+    st.markdown("""
+    <div class="table-card">
+        <div class="table-card-title">📋 Tabel Efisiensi</div>
+    """, unsafe_allow_html=True)
+    render_paginated_table(
+        aggregate(calculate_vehicle_efficiency),
+        key="tabel_efisiensi",
+        formatters={'Total_Biaya': 'Rp {:,.0f}', 'Rata_Rata': 'Rp {:,.0f}', 'Frekuensi': '{:.0f}'},
+        gradient_subset=['Total_Biaya'],
+        cmap='Reds',
+        height=420
+    )
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+def render_category_tab(ctx):
+    """Tab Kategori: biaya dan tren per kategori kerusakan."""
+    aggregate, aggregate_rows, chart_key = ctx.aggregate, ctx.aggregate_rows, ctx.chart_key
+    render_chart_card(
+        "Biaya per Kategori Kerusakan",
+        lambda: create_category_chart(aggregate(calculate_category_distribution)),
+        cache_key=chart_key + ('category',),
+    )
+
+    granularity, date_range = render_time_controls("kategori", aggregate_rows)
+    series_source = aggregate if granularity == 'Bulanan' else aggregate_rows
+    render_chart_card(
+        "Tren Pengeluaran per Kategori",
+        lambda: create_category_timeline_chart(
+            series_source(calculate_time_series, granularity, date_range, 'Keterangan', 5), 5, granularity
+        ),
+        height=500,
+        cache_key=chart_key + ('category_timeline', 5, granularity, date_range),
+    )
+
+
+def render_analysis_page(ctx):
+    """Halaman Analisis Detail; hanya tab yang terbuka yang dirender."""
+    st.markdown("""
+    <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
+        <h1 style="font-size: 2em;">📈 Analisis Detail</h1>
+        <p>Eksplorasi Data Mendalam</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Hanya tab yang sedang dibuka yang dihitung & dikirim; tab lain tetap
+    # cepat saat dibuka karena agregat dan figurenya sudah ada di cache.
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["📅 Temporal", "🏢 Vendor", "🚗 Kendaraan", "📊 Kategori"], key="analisis_tab", on_change="rerun"
+    )
+
+    with tab1:
+        if tab_is_open(tab1):
+            render_temporal_tab(ctx)
+    with tab2:
+        if tab_is_open(tab2):
+            render_vendor_tab(ctx)
+    with tab3:
+        if tab_is_open(tab3):
+            render_vehicle_tab(ctx)
+    with tab4:
+        if tab_is_open(tab4):
+            render_category_tab(ctx)
+
+
+@st.fragment
+def render_transaction_explorer(ctx):
+    """Filter, tabel, dan unduhan Detail Transaksi.
+
+    Berjalan sebagai fragment: perubahan filter di sini hanya menjalankan ulang bagian
+    ini, dengan data yang sudah difilter sidebar pada run penuh terakhir.
+    """
+    cube, dataset, dataset_index, active_filters = ctx.cube, ctx.dataset, ctx.dataset_index, ctx.active_filters
+    c1, c2, c3 = st.columns(3)
+    with c1: filter_keterangan = st.multiselect("Kategori Kerusakan", sorted(cube['Keterangan'].unique()))
+    with c2: filter_tipe = st.multiselect("Tipe Kendaraan", sorted(cube['Type'].unique()))
+    with c3: filter_nopol = st.multiselect("Nopol", sorted(cube['Nopol'].unique()))
+
+    rows = dataset_index.select(
+        **active_filters,
+        Keterangan=filter_keterangan or None, Type=filter_tipe or None, Nopol=filter_nopol or None,
+    )
+    if rows is None:
+        rows = np.arange(len(dataset))
+    # Urutkan row id (stabil, sama dengan sort_values(['Tahun', 'Month_Num'])) agar
+    # tabel dan unduhan memakai urutan yang sama tanpa menyalin frame.
+    rows = rows[np.lexsort((dataset['Month_Num'].to_numpy()[rows], dataset['Tahun'].to_numpy()[rows]))]
+
+    cols_display = ['Tahun', 'Bulan', 'Nopol', 'Type', 'Vendor_Clean', 'Keterangan', 'Total Biaya']
+
+    st.markdown(f"""
+    <div class="table-card">
+        <div class="table-card-title">🗃️ Detail Transaksi</div>
+        <div class="table-card-caption">Menampilkan {len(rows):,} baris data terfilter</div>
+    """, unsafe_allow_html=True)
+    render_paginated_table(
+        dataset,
+        key="detail_transaksi",
+        rows=rows,
+        columns=cols_display,
+        formatters={'Total Biaya': 'Rp {:,.0f}'},
+        gradient_subset=['Total Biaya'],
+        cmap='Blues',
+        height=500
+    )
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    render_export_button(dataset, rows, cols_display, 'Data_Eksplorasi', key="detail_transaksi_export")
+
+
+def render_transactions_page(ctx):
+    """Halaman Detail Transaksi."""
+    st.markdown("""
+    <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
+        <h1 style="font-size: 2em;">🗃️ Detail Transaksi</h1>
+        <p>Filter & Unduh Data Mentah Sesuai Kebutuhan</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    render_transaction_explorer(ctx)
+
+
+def render_audit_page(ctx):
+    """Halaman Laporan Audit: statistik utama, rekomendasi, dan ekspor Excel."""
+    aggregate = ctx.aggregate
+    st.markdown("""
+    <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
+        <h1 style="font-size: 2em;">📋 Laporan Audit</h1>
+        <p>Ringkasan Eksekutif & Rekomendasi</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    audit = aggregate(compute_audit_summary)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("<div class='section-header'>📊 Statistik Utama</div>", unsafe_allow_html=True)
+        st.markdown(f"""
+        <div class="metric-card">
+            <ul style="line-height: 2.2; list-style: none; padding: 0; color: var(--text-color);">
+                <li>💰 <b>Total Pengeluaran:</b> {format_currency_text(audit.total_biaya)}</li>
+                <li>🧾 <b>Total Transaksi:</b> {audit.total_transaksi:,}</li>
+                <li>🚘 <b>Rata-rata per Unit:</b> {format_currency_text(audit.avg_per_unit)}</li>
+                <li>🏢 <b>Vendor Terbesar:</b> {audit.top_vendor}</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with c2:
+        st.markdown("<div class='section-header'>💡 Rekomendasi Tindakan</div>", unsafe_allow_html=True)
+
+        # --- Data dinamis dari ringkasan audit ---
+        top_3_pct = audit.top_3_vendor_pct
+        top_vendor = audit.top_vendor
+        top_unit, top_unit_cost = audit.top_unit
+        top_cat, top_cat_pct = audit.top_category
+        top_month_idx, top_month_cost = audit.top_month
+        top_type, top_type_avg = audit.top_type
+
+        # --- Bangun rekomendasi ---
+        if top_3_pct > 50:
+            vendor_rec = f"Top 3 Vendor menguasai <b>{top_3_pct:.1f}%</b> total biaya. Lakukan negosiasi ulang kontrak dengan <b>{top_vendor}</b> dan pertimbangkan membuka tender terbuka untuk menciptakan kompetisi harga yang lebih sehat."
+        else:
+            vendor_rec = f"Distribusi vendor relatif sehat (Top 3 menguasai <b>{top_3_pct:.1f}%</b> biaya). Pertahankan keberagaman vendor untuk menjaga kompetisi dan efisiensi harga."
+
+        unit_rec = f"Kendaraan <b>{top_unit[0]}</b> (Tipe: {top_unit[1]}) mencatatkan total biaya perawatan tertinggi sebesar <b>{format_currency_text(top_unit_cost)}</b>. Lakukan evaluasi kelayakan operasional dan pertimbangkan peremajaan unit tersebut."
+
+        cat_rec = f"Kategori <b>{top_cat}</b> mendominasi {top_cat_pct:.1f}% dari seluruh transaksi. Tinjau apakah jenis kerusakan ini dapat dicegah melalui perawatan berkala (preventive maintenance) yang lebih terstruktur."
+
+        month_rec = f"Pengeluaran tertinggi terjadi pada bulan <b>{top_month_idx[1]} {top_month_idx[0]}</b> sebesar <b>{format_currency_text(top_month_cost)}</b>. Pertimbangkan perencanaan anggaran yang lebih matang menjelang periode tersebut."
+
+        type_rec = f"Tipe kendaraan <b>{top_type}</b> memiliki rata-rata biaya servis tertinggi sebesar <b>{format_currency_text(top_type_avg)}</b> per transaksi. Kaji ulang kebijakan pemeliharaan berkala untuk tipe kendaraan ini."
+
+        recs = [
+            ("🏢", "Evaluasi Vendor", vendor_rec),
+            ("�", "Peremajaan Unit", unit_rec),
+            ("📂", "Preventive Maintenance", cat_rec),
+            ("📅", "Perencanaan Anggaran", month_rec),
+            ("🚌", "Efisiensi Tipe Kendaraan", type_rec),
+        ]
+        for icon, title, desc in recs:
+            st.markdown(f"""
+            <div style="display:flex; align-items:flex-start; margin-bottom:12px; padding:12px 14px; background-color:var(--secondary-background-color); border-radius:10px; border-left:4px solid #764ba2; border:1px solid rgba(128,128,128,0.1);">
+                <div style="font-size:1.6em; margin-right:14px; margin-top:2px;">{icon}</div>
+                <div>
+                    <div style="font-weight:700; color:var(--text-color); margin-bottom:3px;">{title}</div>
+                    <div style="font-size:0.88em; opacity:0.85; line-height:1.5;">{desc}</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+    st.download_button(
+        label="📥 Download Laporan Excel",
+        data=lambda: build_audit_workbook(ctx),
+        file_name="Laporan_Audit.xlsx",
+        mime=XLSX_MIME,
+        on_click="ignore",
+        use_container_width=True
+    )
+
+def render_about_page(ctx):
+    """Halaman Tentang Kami."""
+    st.markdown("""
+    <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
+        <h1 style="font-size: 2em;">👥 Tentang Kami</h1>
+        <p>Informasi Pengembang dan Aplikasi</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    c1, c2 = st.columns([1, 2])
+
+    with c1:
+        logo_uri = get_image_data_uri("bpkad.png")
+        if logo_uri:
+            st.markdown(f'<div style="text-align: center; margin-bottom: 20px;"><img src="{logo_uri}" width="150" style="border-radius: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);"></div>', unsafe_allow_html=True)
+
+        its_logo = get_image_data_uri('ITS.png')
+        if its_logo:
+            st.markdown(f'<div style="text-align: center;"><img src="{its_logo}" width="200"></div>', unsafe_allow_html=True)
+
+    with c2:
+        st.markdown("""
+        <div class="chart-container" style="animation: slideInUp 0.8s ease-out;">
+            <div style="font-weight: 700; font-size: 1.2em; margin-bottom: 15px; border-bottom: 2px solid #667eea; padding-bottom: 10px; color: #667eea; text-transform: uppercase;">🎓 Tim Pengembang</div>
+            <p style="text-align: justify; margin-bottom: 10px;">Aplikasi ini dikembangkan sebagai bagian dari tugas <b>Kerja Praktik</b> di Badan Pengelolaan Keuangan dan Aset Daerah (BPKAD) Kota Surabaya oleh mahasiswa dari <b>Institut Teknologi Sepuluh Nopember (ITS)</b>.</p>
+            <ul style="line-height: 1.8; margin-bottom: 25px;">
+                <li><b>Rafi Satrio Pratama</b> (5052231007)</li>
+                <li><b>Rahardian Putra</b> (5052231018)</li>
+            </ul>
+            <div style="font-weight: 700; font-size: 1.2em; margin-top: 30px; margin-bottom: 15px; border-bottom: 2px solid #667eea; padding-bottom: 10px; color: #667eea; text-transform: uppercase;">🚗 Tentang Aplikasi</div>
+            <p style="text-align: justify; margin-bottom: 10px;"><b>Dashboard Analisis Biaya Kendaraan</b> adalah sebuah aplikasi cerdas yang dirancang untuk membantu instansi dalam memonitoring, dan mengevaluasi pengeluaran biaya pemeliharaan kendaraan dinas secara otomatis di lingkungan Pemerintah Kota Surabaya.</p>
+            <div style="margin-top: 15px; margin-bottom: 5px; font-weight: 600;">Fitur Utama:</div>
+            <ul style="line-height: 1.8; margin-bottom: 0;">
+                <li>Analisis komprehensif tren biaya secara hierarkis (Tahun/Bulan).</li>
+                <li>Perbandingan kinerja dan transparansi pengeluaran tiap vendor servis.</li>
+                <li>Pemantauan efektivitas pemeliharaan kendaraan.</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+PAGES = {
+    "Dashboard Utama": render_dashboard_page,
+    "Analisis Detail": render_analysis_page,
+    "Detail Transaksi": render_transactions_page,
+    "Laporan Audit": render_audit_page,
+    "Tentang Kami": render_about_page,
+}
+
+
+# ==========================================
+# WARM-UP
+# ==========================================
+# Streamlit tidak punya hook saat server start, jadi warm-up dimulai pada run skrip
+# pertama di proses ini dan berjalan di thread latar. Sesi yang datang sebelum selesai
+# tetap berjalan normal; kunci memo yang sedang dihitung warm-up cukup ditunggu.
+# Thread latar tidak punya ScriptRunContext, jadi tidak memanggil fungsi st.* (termasuk
+# getter cache_resource): store, memo, dan cache yang dipakai diambil dulu di thread skrip.
+WARMUP_ENABLED = os.environ.get("DASHBOARD_WARMUP", "1") != "0"
+
+# Agregat filter default (semua tahun, vendor 'Semua') yang dipakai tiap halaman.
+WARMUP_AGGREGATES = [
+    (calculate_monthly_costs,),
+    (calculate_monthly_trend,),
+    (get_top_units, 10),
+    (get_top_vendors,),
+    (get_top_vendors, 15),
+    (get_top_vendors, None),
+    (count_scatter_points,),
+    (calculate_type_statistics,),
+    (calculate_vehicle_efficiency,),
+    (calculate_category_distribution,),
+    (compute_audit_summary,),
+]
+
+
+@dataclass
+class WarmupStatus:
+    """Progres warm-up; durasi per tahap dalam detik."""
+    steps: dict = field(default_factory=dict)
+    duration: float = None
+    error: str = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+def warm_up_caches(status, store, memo, resources, figures):
+    """Isi cache proses: dataset bawaan, cube/index, agregat default, dan grafik Dashboard."""
+    start = clock = time.perf_counter()
+
+    def mark(step):
+        nonlocal clock
+        now = time.perf_counter()
+        status.steps[step] = now - clock
+        clock = now
+
+    try:
+        df, error = load_default_data(store=store)
+        if error or df is None:
+            raise RuntimeError(error or "Data belum dimuat")
+        mark('dataset')
+
+        # Langkah yang sama dengan sidebar di main() agar kunci cache identik.
+        fingerprint = dataset_fingerprint(df)
+        full_cube = get_aggregate_cube(df, fingerprint, resources)
+        dataset_index = get_filter_index(df, fingerprint, resources)
+        cube_index = get_filter_index(full_cube, f"{fingerprint}_cube", resources)
+        years = sorted(df['Tahun'].unique())
+        active_filters = sidebar_filters(years, 'Semua')
+        cube = filter_transactions(full_cube, cube_index, **active_filters)
+        rows = dataset_index.select(**active_filters)
+        aggregate = make_aggregator(memo, cube, fingerprint, years, 'Semua')
+        aggregate_rows = make_aggregator(memo, lambda: take_rows(df, rows), fingerprint, years, 'Semua', scope='rows')
+        mark('cube & index')
+
+        for func, *args in WARMUP_AGGREGATES:
+            aggregate(func, *args)
+        aggregate_rows(has_daily_dates)
+        mark('agregat')
+
+        tokens = get_theme_tokens()
+        for name, build in DASHBOARD_FIGURES.items():
+            get_figure_spec(lambda: build(aggregate), aggregate.filter_key + (name,), tokens, figures=figures)
+        mark('grafik')
+    except Exception as e:
+        status.error = f"Error: {str(e)}"
+    finally:
+        status.duration = time.perf_counter() - start
+        status.done.set()
+
+
+@st.cache_resource
+def start_warmup():
+    """Mulai warm-up di thread latar, sekali per proses."""
+    status = WarmupStatus()
+    # Aset murah dan sebagian besar dipakai run ini juga; dibuat di thread skrip.
+    clock = time.perf_counter()
+    for mode in THEME_MODES:
+        build_custom_css(mode)
+    for image_path in LOGO_MAX_WIDTHS:
+        get_image_data_uri(image_path)
+    status.steps['aset'] = time.perf_counter() - clock
+
+    caches = (get_dataset_store(), get_aggregate_memo(), get_resource_cache(), get_figure_cache())
+    threading.Thread(target=warm_up_caches, args=(status, *caches), name="dashboard-warmup", daemon=True).start()
+    return status
+
+
+# ==========================================
+# JSON API
+# ==========================================
+# API JSON (api.py) ikut berjalan di proses ini jika DASHBOARD_API_PORT diisi, sehingga
+# memakai dataset bersama dan memo agregat yang sama dengan UI.
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")
+API_PORT = os.environ.get("DASHBOARD_API_PORT")
+
+
+@st.cache_resource
+def start_api_server(host, port):
+    """Jalankan server API di thread latar, sekali per proses. None jika port terpakai."""
+    import api
+    # Cache diambil di thread skrip (cache_resource butuh ScriptRunContext); thread HTTP
+    # hanya memakai objeknya, seperti api.make_standalone_engine.
+    store, memo, resources = get_dataset_store(), get_aggregate_memo(), get_resource_cache()
+    engine = types.SimpleNamespace(
+        get_dataset_store=lambda: store,
+        get_aggregate_memo=lambda: memo,
+        load_default_data=lambda: load_default_data(store=store),
+        get_aggregate_cube=lambda df, fingerprint: get_aggregate_cube(df, fingerprint, resources),
+        get_filter_index=lambda frame, fingerprint: get_filter_index(frame, fingerprint, resources),
+    )
+    try:
+        return api.serve_in_background(host, port, engine=engine)
+    except OSError:
+        return None
+
+
 # ==========================================
 # MAIN APPLICATION
 # ==========================================
@@ -1029,12 +1963,16 @@ def main():
     with st.sidebar:
         theme_mode = st.selectbox(
             "🎨 Tema Tampilan",
-            ["Ikuti Tema Pengguna", "Terang", "Gelap"],
+            THEME_MODES,
             index=0,
             help="Pilih Terang/Gelap manual, atau Ikuti Tema Pengguna agar menyesuaikan preferensi perangkat/browser."
         )
         st.session_state["theme_mode"] = theme_mode
 
+    warmup = start_warmup() if WARMUP_ENABLED else None
+    if API_PORT:
+        start_api_server(API_HOST, int(API_PORT))
+
     load_custom_css(st.session_state.get("theme_mode", "Ikuti Tema Pengguna"))
     
     # --- SIDEBAR ---
@@ -1048,12 +1986,17 @@ def main():
         """, unsafe_allow_html=True)
         
         uploaded_file = st.file_uploader("📁 Upload CSV", type=['csv'])
+        prefer_specific_type = st.checkbox(
+            "Utamakan tipe spesifik",
+            value=False,
+            help="Jika satu Nopol tercatat dengan beberapa Type, pilih Type spesifik dan hindari OTHER/OTHERS."
+        )
         page = st.radio("Navigasi", ["Dashboard Utama", "Analisis Detail", "Detail Transaksi", "Laporan Audit", "Tentang Kami"])
         
         if uploaded_file:
-            df, error = load_and_process_data(uploaded_file)
+            df, error = load_uploaded_data(uploaded_file, prefer_specific_type)
         else:
-            df, error = load_and_process_data()
+            df, error = load_default_data(prefer_specific_type)
             
         if error:
             st.error(error)
@@ -1096,369 +2039,79 @@ def main():
         st.markdown("<hr style='border-top: 1px solid rgba(128,128,128,0.2);'>", unsafe_allow_html=True)
         st.subheader("Filter Data")
         
+        # Cube dan index filter dibangun sekali per dataset; filter sidebar cukup
+        # mengiris posisi baris lalu mengambilnya sekali
+        fingerprint = dataset_fingerprint(df)
+        dataset = df
+        full_cube = get_aggregate_cube(dataset, fingerprint)
+        dataset_index = get_filter_index(dataset, fingerprint)
+        cube_index = get_filter_index(full_cube, f"{fingerprint}_cube")
+
         years = sorted(df['Tahun'].unique())
         selected_years = st.multiselect("Tahun", years, default=years)
-        if selected_years: 
-            df = df[df['Tahun'].isin(selected_years)]
+        year_cube = filter_transactions(full_cube, cube_index, Tahun=selected_years or None)
             
-        vendors = ['Semua'] + sorted(df['Vendor_Clean'].unique().tolist())
+        vendors = ['Semua'] + sorted(year_cube['Vendor_Clean'].unique().tolist())
         selected_vendor = st.selectbox("Vendor", vendors)
-        if selected_vendor != 'Semua': 
-            df = df[df['Vendor_Clean'] == selected_vendor]
-
-        st.caption(f"Menampilkan: {len(df):,} baris")
-
-    # --- DASHBOARD UTAMA ---
-    if page == "Dashboard Utama":
-        # 1. IDENTITAS HEADER
-        logo_base64 = get_image_as_base64("bpkad.png")
-        logo_html = f'<img src="data:image/png;base64,{logo_base64}">' if logo_base64 else ''
-        st.markdown(f"""
-        <div class="kp-header-container">
-            <div class="kp-logo-section">{logo_html}</div>
-            <div class="kp-text-section">
-                <div class="kp-subtitle">KERJA PRAKTIK - BPKAD KOTA SURABAYA</div>
-                <div class="kp-name">Rafi Satrio Pratama - 5052231007</div>
-                <div class="kp-name">Rahardian Putra - 5052231018</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # 2. DASHBOARD HEADER
-        st.markdown("""
-        <div class="dashboard-header">
-            <h1>🚗 Dashboard Analisis Biaya</h1>
-            <p>Monitoring & Evaluasi Pemeliharaan Kendaraan Dinas</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("<div class='section-header'>📊 Ringkasan Eksekutif</div>", unsafe_allow_html=True)
-        
-        c1, c2, c3, c4 = st.columns(4)
-        
-        monthly_avg_cost = df.groupby(['Tahun', 'Bulan'])['Total Biaya'].sum().mean()
-        
-        metrics = [
-            ("💰 Total Pengeluaran", format_currency_text(df['Total Biaya'].sum()).replace('Rp ', ''), "Rupiah"),
-            ("📈 Rata-rata / Bulan", format_currency_text(monthly_avg_cost).replace('Rp ', ''), "Pengeluaran per Bulan"),
-            ("📋 Total Transaksi", f"{len(df):,}", "Service Record"),
-            ("🚗 Jumlah Unit", f"{df['Nopol'].nunique()}", "Kendaraan Aktif")
-        ]
-        
-        for col, (label, val, sub) in zip([c1, c2, c3, c4], metrics):
-            with col:
-                st.markdown(f"""
-                <div class="metric-card slide-left">
-                    <div class="metric-label">{label}</div>
-                    <div class="metric-value">{val}</div>
-                    <div style="font-size: 0.8em; opacity: 0.7;">{sub}</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-        monthly_trend = calculate_monthly_trend(df)
-        render_chart_card("Timeline Pengeluaran Bulanan", create_timeline_chart(monthly_trend))
-        
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("""
-            <div class="table-card">
-                <div class="table-card-title">🏆 10 Kendaraan Biaya Tertinggi</div>
-            """, unsafe_allow_html=True)
-            top_units = get_top_units(df, 10)
+        active_filters = sidebar_filters(selected_years, selected_vendor)
+        # Sesi hanya memegang row id; baris mentah diambil dari dataset bersama saat dipakai.
+        rows = dataset_index.select(**active_filters)
+        cube = filter_transactions(full_cube, cube_index, **active_filters)
+        aggregate = make_aggregator(get_aggregate_memo(), cube, fingerprint, selected_years, selected_vendor)
+        aggregate_rows = make_aggregator(get_aggregate_memo(), lambda: take_rows(dataset, rows), fingerprint, selected_years, selected_vendor, scope='rows')
+
+        st.caption(f"Menampilkan: {len(dataset) if rows is None else len(rows):,} baris")
+
+        with st.expander("💾 Memori Dataset"):
+            store_stats = get_dataset_store().stats()
+            session_bytes = (0 if rows is None else rows.nbytes) + (0 if cube is full_cube else estimate_nbytes(cube))
+            session_bytes += sum(estimate_nbytes(value) for value in st.session_state.to_dict().values())
+            rss = process_rss_bytes()
+            st.caption(
+                f"Dataset bersama: {store_stats['nbytes'] / 1024**2:,.1f} MB ({store_stats['entries']} dataset) · "
+                f"sesi ini: {session_bytes / 1024:,.1f} KB"
+                + (f" · proses: {rss / 1024**2:,.0f} MB" if rss is not None else "")
+            )
 
-            if not top_units.empty:
-                display_units = top_units.reset_index().copy()
-                display_units.index = display_units.index + 1
-                display_units.columns = ['Nopol', 'Tipe', 'Total Biaya', 'Frekuensi']
-                
+            memory_report = get_memory_report(dataset)
+            if memory_report is not None:
+                total = memory_report.loc['TOTAL']
+                st.caption(f"{total['Sebelum (KB)']:,.0f} KB → {total['Sesudah (KB)']:,.0f} KB (hemat {total['Hemat']:.0%})")
                 render_theme_table(
-                    display_units,
-                    formatters={'Total Biaya': 'Rp {:,.0f}', 'Frekuensi': '{:.0f}x'},
-                    gradient_subset=['Total Biaya'],
-                    cmap='Reds',
-                    height=360
+                    memory_report,
+                    formatters={'Sebelum (KB)': '{:,.1f}', 'Sesudah (KB)': '{:,.1f}', 'Hemat': '{:.0%}'},
+                    height=320
                 )
-            else:
-                st.info("Data kendaraan (TOP 10) belum tersedia.")
-            st.markdown("</div>", unsafe_allow_html=True)
-        with c2:
-            vendors = get_top_vendors(df)
-            render_chart_card("Distribusi Vendor Utama", create_vendor_pie_chart(vendors))
-
-    # --- ANALISIS DETAIL ---
-    elif page == "Analisis Detail":
-        st.markdown("""
-        <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
-            <h1 style="font-size: 2em;">📈 Analisis Detail</h1>
-            <p>Eksplorasi Data Mendalam</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        tab1, tab2, tab3, tab4 = st.tabs(["📅 Temporal", "🏢 Vendor", "🚗 Kendaraan", "📊 Kategori"])
-        
-        with tab1:
-            render_chart_card("Heatmap Pengeluaran Bulanan", create_monthly_heatmap(df), height=500)
-            
-            c1, c2 = st.columns(2)
-            with c1:
-                render_chart_card("Distribusi Biaya per Tahun", create_box_plot(df))
-            with c2:
-                monthly_data = calculate_monthly_trend(df)
-                if not monthly_data.empty:
-                    max_month = monthly_data.loc[monthly_data['Total Biaya'].idxmax()]
-                    min_month = monthly_data.loc[monthly_data['Total Biaya'].idxmin()]
-                    
-                    st.markdown(f"""
-                    <div class="alert-box alert-danger">
-                        <h4 style="margin:0;">🔝 Bulan Termahal</h4>
-                        <div style="font-size: 1.2em; margin-top:5px;">{max_month['Bulan']} {int(max_month['Tahun'])}</div>
-                        <div style="font-size: 1.5em; font-weight: 800;">Rp {max_month['Total Biaya']:,.0f}</div>
-                    </div>
-                    <div class="alert-box alert-success">
-                        <h4 style="margin:0;">📉 Bulan Termurah</h4>
-                        <div style="font-size: 1.2em; margin-top:5px;">{min_month['Bulan']} {int(min_month['Tahun'])}</div>
-                        <div style="font-size: 1.5em; font-weight: 800;">Rp {min_month['Total Biaya']:,.0f}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-        with tab2:
-            c1, c2 = st.columns([2,1])
-            with c1:
-                render_chart_card("Peringkat Pengeluaran Service Kendaraan Dinas BPKAD per Vendor", create_vendor_comparison_chart(get_top_vendors(df, 15), 15), height=600)
-            
-            with c2:
-                total_vendor = df['Vendor_Clean'].nunique()
-                vendor_costs = df.groupby('Vendor_Clean')['Total Biaya'].sum().sort_values(ascending=False)
-                top_3_pct = (vendor_costs.head(3).sum() / vendor_costs.sum() * 100) if vendor_costs.sum() > 0 else 0
-                
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">Total Vendor</div>
-                    <div class="metric-value" style="font-size: 2.5em;">{total_vendor}</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Konsentrasi Top 3</div>
-                    <div class="metric-value" style="font-size: 2.5em; color: #764ba2;">{top_3_pct:.1f}%</div>
-                    <div style="width: 100%; background: rgba(128,128,128,0.2); height: 8px; border-radius: 4px; margin-top: 5px;">
-                        <div style="width: {top_3_pct}%; background: linear-gradient(90deg, #667eea, #764ba2); height: 100%; border-radius: 4px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-        with tab3:
-            c1, c2 = st.columns([2,1])
-            with c1:
-                render_chart_card("Korelasi Frekuensi vs Biaya", create_scatter_plot(df))
-            with c2:
-                render_chart_card("Proporsi Tipe", create_type_distribution_chart(calculate_type_statistics(df).head(10)))
-            
-            st.markdown("""
-            <div class="table-card">
-                <div class="table-card-title">📋 Tabel Efisiensi</div>
-            """, unsafe_allow_html=True)
-            eff = df.groupby(['Nopol', 'Type']).agg({'Total Biaya': ['sum', 'mean', 'count']})
-            eff.columns = ['Total_Biaya', 'Rata_Rata', 'Frekuensi']
-            
-            render_theme_table(
-                eff.sort_values('Total_Biaya', ascending=False),
-                formatters={'Total_Biaya': 'Rp {:,.0f}', 'Rata_Rata': 'Rp {:,.0f}', 'Frekuensi': '{:.0f}'},
-                gradient_subset=['Total_Biaya'],
-                cmap='Reds',
-                height=420
-            )
-            st.markdown("</div>", unsafe_allow_html=True)
-
-        with tab4:
-            cat_dist = calculate_category_distribution(df)
-            render_chart_card("Biaya per Kategori Kerusakan", create_category_chart(cat_dist))
-            
-            cat_trend = calculate_monthly_category_trend(df)
-            render_chart_card("Tren Pengeluaran per Kategori", create_category_timeline_chart(cat_trend), height=500)
-
 
-    # --- EKSPLORASI DATA ---
-    elif page == "Detail Transaksi":
-        st.markdown("""
-        <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
-            <h1 style="font-size: 2em;">🗃️ Detail Transaksi</h1>
-            <p>Filter & Unduh Data Mentah Sesuai Kebutuhan</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        c1, c2, c3 = st.columns(3)
-        with c1: filter_keterangan = st.multiselect("Kategori Kerusakan", sorted(df['Keterangan'].unique()))
-        with c2: filter_tipe = st.multiselect("Tipe Kendaraan", sorted(df['Type'].unique()))
-        with c3: filter_nopol = st.multiselect("Nopol", sorted(df['Nopol'].unique()))
-        
-        filtered_df = df.copy()
-        if filter_keterangan: filtered_df = filtered_df[filtered_df['Keterangan'].isin(filter_keterangan)]
-        if filter_tipe: filtered_df = filtered_df[filtered_df['Type'].isin(filter_tipe)]
-        if filter_nopol: filtered_df = filtered_df[filtered_df['Nopol'].isin(filter_nopol)]
-        
-        filtered_df = filtered_df.sort_values(['Tahun', 'Month_Num'])
-        
-        cols_display = ['Tahun', 'Bulan', 'Nopol', 'Type', 'Vendor_Clean', 'Keterangan', 'Total Biaya']
-        
-        st.markdown(f"""
-        <div class="table-card">
-            <div class="table-card-title">🗃️ Detail Transaksi</div>
-            <div class="table-card-caption">Menampilkan {len(filtered_df):,} baris data terfilter</div>
-        """, unsafe_allow_html=True)
-        render_theme_table(
-            filtered_df[cols_display],
-            formatters={'Total Biaya': 'Rp {:,.0f}'},
-            gradient_subset=['Total Biaya'],
-            cmap='Blues',
-            height=500
+        memo_stats = get_aggregate_memo().stats()
+        figure_stats = get_figure_cache().stats()
+        st.caption(
+            f"Cache agregat: {memo_stats['hits']:,} hit / {memo_stats['misses']:,} miss "
+            f"({memo_stats['hit_rate']:.0%}), {memo_stats['entries']} entri · "
+            f"grafik: {figure_stats['hits']:,} hit / {figure_stats['misses']:,} miss, "
+            f"{figure_stats['nbytes'] / 1024:,.0f} KB"
         )
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        csv = filtered_df[cols_display].to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download Data CSV",
-            data=csv,
-            file_name='Data_Eksplorasi.csv',
-            mime='text/csv',
-        )
-
-    # --- LAPORAN AUDIT ---
-    elif page == "Laporan Audit":
-        st.markdown("""
-        <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
-            <h1 style="font-size: 2em;">📋 Laporan Audit</h1>
-            <p>Ringkasan Eksekutif & Rekomendasi</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("<div class='section-header'>📊 Statistik Utama</div>", unsafe_allow_html=True)
-            st.markdown(f"""
-            <div class="metric-card">
-                <ul style="line-height: 2.2; list-style: none; padding: 0; color: var(--text-color);">
-                    <li>💰 <b>Total Pengeluaran:</b> {format_currency_text(df['Total Biaya'].sum())}</li>
-                    <li>🧾 <b>Total Transaksi:</b> {len(df):,}</li>
-                    <li>🚘 <b>Rata-rata per Unit:</b> {format_currency_text(df.groupby('Nopol')['Total Biaya'].sum().mean())}</li>
-                    <li>🏢 <b>Vendor Terbesar:</b> {get_top_vendors(df,1).index[0]}</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-            
-        with c2:
-            st.markdown("<div class='section-header'>💡 Rekomendasi Tindakan</div>", unsafe_allow_html=True)
-            
-            # --- Hitung data dinamis ---
-            vendor_costs = df.groupby('Vendor_Clean')['Total Biaya'].sum().sort_values(ascending=False)
-            top_3_pct = (vendor_costs.head(3).sum() / vendor_costs.sum() * 100) if vendor_costs.sum() > 0 else 0
-            top_vendor = vendor_costs.index[0] if not vendor_costs.empty else '-'
-            
-            unit_costs = df.groupby(['Nopol', 'Type'])['Total Biaya'].sum().sort_values(ascending=False)
-            top_unit = unit_costs.index[0] if not unit_costs.empty else ('-', '-')
-            top_unit_cost = unit_costs.iloc[0] if not unit_costs.empty else 0
-            
-            cat_counts = df['Keterangan'].value_counts()
-            top_cat = cat_counts.index[0] if not cat_counts.empty else '-'
-            top_cat_pct = (cat_counts.iloc[0] / len(df) * 100) if not cat_counts.empty else 0
-
-            monthly_cost = df.groupby(['Tahun', 'Bulan'])['Total Biaya'].sum()
-            top_month_idx = monthly_cost.idxmax() if not monthly_cost.empty else (0, '-')
-            top_month_cost = monthly_cost.max() if not monthly_cost.empty else 0
-            
-            type_avg = df.groupby('Type')['Total Biaya'].mean().sort_values(ascending=False)
-            top_type = type_avg.index[0] if not type_avg.empty else '-'
-            top_type_avg = type_avg.iloc[0] if not type_avg.empty else 0
-
-            # --- Bangun rekomendasi ---
-            if top_3_pct > 50:
-                vendor_rec = f"Top 3 Vendor menguasai <b>{top_3_pct:.1f}%</b> total biaya. Lakukan negosiasi ulang kontrak dengan <b>{top_vendor}</b> dan pertimbangkan membuka tender terbuka untuk menciptakan kompetisi harga yang lebih sehat."
+        if warmup is not None:
+            if not warmup.done.is_set():
+                st.caption("Warm-up cache: berjalan...")
+            elif warmup.error:
+                st.caption(f"Warm-up cache gagal setelah {warmup.duration:.2f} dtk ({warmup.error})")
             else:
-                vendor_rec = f"Distribusi vendor relatif sehat (Top 3 menguasai <b>{top_3_pct:.1f}%</b> biaya). Pertahankan keberagaman vendor untuk menjaga kompetisi dan efisiensi harga."
-
-            unit_rec = f"Kendaraan <b>{top_unit[0]}</b> (Tipe: {top_unit[1]}) mencatatkan total biaya perawatan tertinggi sebesar <b>{format_currency_text(top_unit_cost)}</b>. Lakukan evaluasi kelayakan operasional dan pertimbangkan peremajaan unit tersebut."
-
-            cat_rec = f"Kategori <b>{top_cat}</b> mendominasi {top_cat_pct:.1f}% dari seluruh transaksi. Tinjau apakah jenis kerusakan ini dapat dicegah melalui perawatan berkala (preventive maintenance) yang lebih terstruktur."
-
-            month_rec = f"Pengeluaran tertinggi terjadi pada bulan <b>{top_month_idx[1]} {top_month_idx[0]}</b> sebesar <b>{format_currency_text(top_month_cost)}</b>. Pertimbangkan perencanaan anggaran yang lebih matang menjelang periode tersebut."
-
-            type_rec = f"Tipe kendaraan <b>{top_type}</b> memiliki rata-rata biaya servis tertinggi sebesar <b>{format_currency_text(top_type_avg)}</b> per transaksi. Kaji ulang kebijakan pemeliharaan berkala untuk tipe kendaraan ini."
-
-            recs = [
-                ("🏢", "Evaluasi Vendor", vendor_rec),
-                ("�", "Peremajaan Unit", unit_rec),
-                ("📂", "Preventive Maintenance", cat_rec),
-                ("📅", "Perencanaan Anggaran", month_rec),
-                ("🚌", "Efisiensi Tipe Kendaraan", type_rec),
-            ]
-            for icon, title, desc in recs:
-                st.markdown(f"""
-                <div style="display:flex; align-items:flex-start; margin-bottom:12px; padding:12px 14px; background-color:var(--secondary-background-color); border-radius:10px; border-left:4px solid #764ba2; border:1px solid rgba(128,128,128,0.1);">
-                    <div style="font-size:1.6em; margin-right:14px; margin-top:2px;">{icon}</div>
-                    <div>
-                        <div style="font-weight:700; color:var(--text-color); margin-bottom:3px;">{title}</div>
-                        <div style="font-size:0.88em; opacity:0.85; line-height:1.5;">{desc}</div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-        try:
-            import xlsxwriter
-            engine = 'xlsxwriter'
-        except ImportError:
-            engine = 'openpyxl'
-
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine=engine) as writer:
-            calculate_yearly_summary(df).to_excel(writer, sheet_name='Ringkasan')
-            get_top_vendors(df, 20).to_excel(writer, sheet_name='Vendor')
-        
-        st.download_button(
-            label="📥 Download Laporan Excel",
-            data=buffer.getvalue(),
-            file_name="Laporan_Audit.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
+                steps = ", ".join(f"{step} {seconds:.2f}" for step, seconds in warmup.steps.items())
+                st.caption(f"Warm-up cache: {warmup.duration:.2f} dtk ({steps})")
+
+    ctx = PageContext(
+        dataset=dataset,
+        dataset_index=dataset_index,
+        rows=rows,
+        cube=cube,
+        aggregate=aggregate,
+        aggregate_rows=aggregate_rows,
+        active_filters=active_filters,
+        chart_key=aggregate.filter_key,
+    )
+    PAGES[page](ctx)
 
-    # --- TENTANG KAMI ---
-    elif page == "Tentang Kami":
-        st.markdown("""
-        <div class="dashboard-header" style="padding: 20px; margin-bottom: 20px;">
-            <h1 style="font-size: 2em;">👥 Tentang Kami</h1>
-            <p>Informasi Pengembang dan Aplikasi</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        c1, c2 = st.columns([1, 2])
-        
-        with c1:
-            logo_base64 = get_image_as_base64("bpkad.png")
-            if logo_base64:
-                st.markdown(f'<div style="text-align: center; margin-bottom: 20px;"><img src="data:image/png;base64,{logo_base64}" width="150" style="border-radius: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);"></div>', unsafe_allow_html=True)
-            
-            its_logo = get_image_as_base64('ITS.png')
-            if its_logo:
-                st.markdown(f'<div style="text-align: center;"><img src="data:image/png;base64,{its_logo}" width="200"></div>', unsafe_allow_html=True)
-        
-        with c2:
-            st.markdown("""
-            <div class="chart-container" style="animation: slideInUp 0.8s ease-out;">
-                <div style="font-weight: 700; font-size: 1.2em; margin-bottom: 15px; border-bottom: 2px solid #667eea; padding-bottom: 10px; color: #667eea; text-transform: uppercase;">🎓 Tim Pengembang</div>
-                <p style="text-align: justify; margin-bottom: 10px;">Aplikasi ini dikembangkan sebagai bagian dari tugas <b>Kerja Praktik</b> di Badan Pengelolaan Keuangan dan Aset Daerah (BPKAD) Kota Surabaya oleh mahasiswa dari <b>Institut Teknologi Sepuluh Nopember (ITS)</b>.</p>
-                <ul style="line-height: 1.8; margin-bottom: 25px;">
-                    <li><b>Rafi Satrio Pratama</b> (5052231007)</li>
-                    <li><b>Rahardian Putra</b> (5052231018)</li>
-                </ul>
-                <div style="font-weight: 700; font-size: 1.2em; margin-top: 30px; margin-bottom: 15px; border-bottom: 2px solid #667eea; padding-bottom: 10px; color: #667eea; text-transform: uppercase;">🚗 Tentang Aplikasi</div>
-                <p style="text-align: justify; margin-bottom: 10px;"><b>Dashboard Analisis Biaya Kendaraan</b> adalah sebuah aplikasi cerdas yang dirancang untuk membantu instansi dalam memonitoring, dan mengevaluasi pengeluaran biaya pemeliharaan kendaraan dinas secara otomatis di lingkungan Pemerintah Kota Surabaya.</p>
-                <div style="margin-top: 15px; margin-bottom: 5px; font-weight: 600;">Fitur Utama:</div>
-                <ul style="line-height: 1.8; margin-bottom: 0;">
-                    <li>Analisis komprehensif tren biaya secara hierarkis (Tahun/Bulan).</li>
-                    <li>Perbandingan kinerja dan transparansi pengeluaran tiap vendor servis.</li>
-                    <li>Pemantauan efektivitas pemeliharaan kendaraan.</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-                
     render_footer()
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""Generator laporan batch per vendor dan per kendaraan, tanpa membuka dashboard.
+
+Memakai fungsi analisis yang sama dengan app.py (analytics.py: get_top_units,
+get_top_vendors, calculate_monthly_trend, calculate_category_distribution, ...) dan
+menulis satu laporan Excel dan/atau HTML untuk setiap vendor dan setiap Nopol.
+Pekerjaan dibagi ke beberapa proses; setiap worker membuka cache Feather dataset bersih lewat
+memory-map (read-only), jadi dataset tidak dikirim ulang ke setiap proses.
+
+Contoh:
+    python batch_report.py
+    python batch_report.py --by vendor --format xlsx html --workers 8
+    python batch_report.py --year 2024 2025 --output laporan/2025
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analytics import (
+    FilterIndex,
+    TRANSACTION_COLUMNS,
+    calculate_category_distribution,
+    calculate_monthly_trend,
+    calculate_yearly_summary,
+    frame_rows,
+    get_top_units,
+    get_top_vendors,
+    write_workbook,
+)
+from cleaning import DEFAULT_DATA_FILE, feather, get_cache_path, load_and_process_data
+from formatting import format_rupiah
+
+# ==========================================
+# KONFIGURASI
+# ==========================================
+DEFAULT_OUTPUT_DIR = 'laporan_batch'
+REPORT_KINDS = {
+    # jenis laporan -> (kolom filter, subfolder output)
+    'vendor': ('Vendor_Clean', 'vendor'),
+    'kendaraan': ('Nopol', 'kendaraan'),
+}
+REPORT_FORMATS = ['xlsx', 'html']
+# Kolom biaya di tabel laporan; di HTML ditampilkan sebagai rupiah apa pun dtype-nya.
+MONEY_COLUMNS = ['Total Biaya', 'Total_Biaya', 'Total_Pengeluaran', 'Rata_Rata']
+
+# State per proses worker, diisi sekali oleh init_worker.
+_DATASET = None
+_INDEX = None
+
+# ==========================================
+# DATASET BERSAMA
+# ==========================================
+def open_shared_dataset(cache_path, dataset_path):
+    """Buka dataset bersih dari cache Feather (memory-mapped); fallback ke load biasa."""
+    if feather is not None and cache_path and os.path.exists(cache_path):
+        df = feather.read_table(cache_path, memory_map=True).to_pandas(split_blocks=True)
+    else:
+        df, error = load_and_process_data(dataset_path)
+        if error:
+            raise RuntimeError(error)
+    # attrs (laporan memori) disalin pandas di setiap operasi; worker tidak memakainya.
+    df.attrs = {}
+    return df
+
+
+def init_worker(cache_path, dataset_path):
+    global _DATASET, _INDEX
+    _DATASET = open_shared_dataset(cache_path, dataset_path)
+    _INDEX = FilterIndex(_DATASET)
+
+
+# ==========================================
+# ISI LAPORAN
+# ==========================================
+def report_tables(rows, kind):
+    """Tabel (nama sheet, DataFrame) untuk satu vendor atau satu kendaraan."""
+    columns = (['Tanggal'] if 'Tanggal' in rows else []) + TRANSACTION_COLUMNS
+    monthly = calculate_monthly_trend(rows)
+    tables = [('Ringkasan', calculate_yearly_summary(rows).reset_index())]
+    if kind == 'vendor':
+        tables.append(('Kendaraan', get_top_units(rows, None).reset_index()))
+    else:
+        tables.append(('Vendor', get_top_vendors(rows, None).reset_index()))
+    tables += [
+        ('Bulanan', monthly.drop(columns='Month_Num') if 'Month_Num' in monthly else monthly),
+        ('Kategori', calculate_category_distribution(rows).rename(columns={'sum': 'Total_Biaya', 'count': 'Transaksi'}).reset_index()),
+        ('Transaksi', rows.sort_values(['Tahun', 'Month_Num'])[columns]),
+    ]
+    return tables
+
+
+def write_html_report(path, title, tables):
+    title = html.escape(title)
+    parts = [f"<h1>{title}</h1>"]
+    for name, frame in tables:
+        money = [col for col in MONEY_COLUMNS if col in frame.columns]
+        frame = frame.assign(**{col: format_rupiah(frame[col]) for col in money})
+        parts.append(f"<h2>{name}</h2>")
+        parts.append(frame.to_html(index=False, border=0, na_rep='', float_format='{:,.0f}'.format))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            "<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+            f"<title>{title}</title>"
+            "<style>body{font-family:sans-serif;margin:24px}table{border-collapse:collapse;margin-bottom:24px}"
+            "th,td{padding:4px 10px;border-bottom:1px solid #ddd;text-align:left}</style>"
+            "</head><body>\n" + "\n".join(parts) + "\n</body></html>\n"
+        )
+
+
+def generate_report(task):
+    """Tulis laporan untuk satu (jenis, nilai); dijalankan di proses worker."""
+    kind, value, base_path, formats, filters = task
+    column, _ = REPORT_KINDS[kind]
+    positions = _INDEX.select(**filters, **{column: [value]})
+    rows = _DATASET.take(positions)
+    tables = report_tables(rows, kind)
+
+    title = f"Laporan {kind.title()} {value}"
+    if 'xlsx' in formats:
+        sheets = [(name, list(frame.columns), frame_rows(frame, index=False)) for name, frame in tables]
+        # Tabel satu laporan sudah ada di memori; workbook disusun tanpa file sementara.
+        with open(f"{base_path}.xlsx", 'wb') as f:
+            f.write(write_workbook(sheets, constant_memory=False))
+    if 'html' in formats:
+        write_html_report(f"{base_path}.html", title, tables)
+    return len(rows)
+
+
+def safe_file_name(value):
+    return re.sub(r'[^\w.-]+', '_', str(value)).strip('_') or 'tanpa_nama'
+
+
+def plan_tasks(df, kinds, output_dir, formats, filters):
+    """Daftar tugas (jenis, nilai, path tanpa ekstensi, format, filter) untuk semua laporan."""
+    index = FilterIndex(df)
+    rows = index.select(**filters)
+    subset = df if rows is None else df.take(rows)
+
+    tasks = []
+    for kind in kinds:
+        column, folder = REPORT_KINDS[kind]
+        os.makedirs(os.path.join(output_dir, folder), exist_ok=True)
+        used = set()
+        for value in sorted(pd.unique(subset[column].dropna()).tolist(), key=str):
+            name = safe_file_name(value)
+            # Nama berbeda bisa menjadi nama file yang sama setelah dibersihkan.
+            candidate, n = name, 2
+            while candidate.lower() in used:
+                candidate, n = f"{name}_{n}", n + 1
+            used.add(candidate.lower())
+            tasks.append((kind, value, os.path.join(output_dir, folder, candidate), formats, filters))
+    return tasks
+
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def run(args):
+    start = time.perf_counter()
+    df, error = load_and_process_data(args.dataset)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+
+    filters = {'Tahun': args.year} if args.year else {}
+    tasks = plan_tasks(df, args.by, args.output, args.format, filters)
+    cache_path = get_cache_path(df.attrs['fingerprint'])
+    workers = args.workers or os.cpu_count() or 1
+
+    if workers == 1:
+        init_worker(cache_path, args.dataset)
+        results = [generate_report(task) for task in tasks]
+    else:
+        # Dataset tidak ikut dikirim ke worker; masing-masing membuka cache memory-map.
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cache_path, args.dataset)) as pool:
+            results = list(pool.map(generate_report, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+
+    counts = {kind: sum(1 for task in tasks if task[0] == kind) for kind in args.by}
+    print(
+        f"{len(tasks):,} laporan ({', '.join(f'{n:,} {kind}' for kind, n in counts.items())}; "
+        f"{sum(results):,} baris) ditulis ke {args.output} dengan {workers} proses "
+        f"dalam {time.perf_counter() - start:.2f} detik"
+    )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Laporan batch per vendor dan per kendaraan.")
+    parser.add_argument('--dataset', default=DEFAULT_DATA_FILE, help="Dataset bersih yang dibaca app.py.")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help="Folder hasil (subfolder vendor/ dan kendaraan/).")
+    parser.add_argument('--by', nargs='+', choices=list(REPORT_KINDS), default=list(REPORT_KINDS), help="Jenis laporan.")
+    parser.add_argument('--format', nargs='+', choices=REPORT_FORMATS, default=['xlsx'], help="Format file laporan.")
+    parser.add_argument('--year', nargs='+', type=int, help="Batasi ke tahun tertentu.")
+    parser.add_argument('--workers', type=int, default=0, help="Jumlah proses (default: jumlah CPU; 1 = tanpa pool).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
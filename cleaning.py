@@ -0,0 +1,470 @@
+"""Pemuatan dan pembersihan dataset transaksi, tanpa ketergantungan ke Streamlit.
+
+Dipakai bersama oleh app.py (dashboard), etl.py, batch_report.py, dan api.py, jadi
+aturan pembersihan, skema ringkas, dan cache Feather di disk hanya ada di satu tempat.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Dataset bersih dipakai bersama lintas sesi tanpa disalin (lihat DATASET BERSAMA).
+# Itu hanya aman dengan Copy-on-Write: bawaan sejak pandas 3, opsional di pandas 2.x.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# ==========================================
+# DATA LOADING & PROCESSING
+# ==========================================
+DEFAULT_DATA_FILE = 'Data_Kendaraan_Bersih.csv'
+
+# Naikkan angka ini setiap kali aturan pembersihan di clean_transactions berubah,
+# supaya cache hasil pembersihan yang lama otomatis tidak terpakai lagi.
+CLEANING_VERSION = "3"
+DATA_CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", ".cache")
+
+
+def get_source_digest(source):
+    """Hitung hash SHA-256 isi file sumber (path lokal atau file hasil upload)."""
+    hasher = hashlib.sha256()
+    if hasattr(source, "getbuffer"):
+        # BytesIO/UploadedFile: hash langsung dari buffer tanpa menyalin isinya.
+        with source.getbuffer() as view:
+            hasher.update(view)
+    elif hasattr(source, "read"):
+        source.seek(0)
+        for block in iter(lambda: source.read(1 << 20), b""):
+            hasher.update(block if isinstance(block, bytes) else block.encode("utf-8"))
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(block)
+    return hasher.hexdigest()
+
+
+def get_cache_key(digest, prefer_specific_type=False, keep_columns=None):
+    """Kunci cache: isi file + opsi pembersihan yang memengaruhi hasil."""
+    key = f"{digest[:32]}_{'spesifik' if prefer_specific_type else 'modus'}"
+    if keep_columns:
+        key += "_" + hashlib.sha256("|".join(sorted(keep_columns)).encode("utf-8")).hexdigest()[:8]
+    return key
+
+
+def get_cache_path(cache_key):
+    """Lokasi file cache kolumnar untuk kombinasi (isi file, versi pembersihan)."""
+    return os.path.join(DATA_CACHE_DIR, f"cleaned_v{CLEANING_VERSION}_{cache_key}.feather")
+
+
+def read_cached_dataset(cache_key):
+    """Baca dataset bersih dari cache Arrow IPC (memory-mapped). None jika belum ada."""
+    if feather is None:
+        return None
+    path = get_cache_path(cache_key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return feather.read_table(path, memory_map=True).to_pandas()
+    except (OSError, ValueError):
+        # File cache rusak/terpotong: abaikan dan bangun ulang dari CSV.
+        return None
+
+
+def get_type_counts_path(cache_key):
+    """Lokasi tabel hitungan (Nopol, Type) mentah milik satu entri cache."""
+    return os.path.join(DATA_CACHE_DIR, f"cleaned_v{CLEANING_VERSION}_{cache_key}.types.feather")
+
+
+def read_cached_type_counts(cache_key):
+    """Baca hitungan (Nopol, Type) mentah yang disimpan bersama cache. None jika tidak ada."""
+    path = get_type_counts_path(cache_key)
+    if feather is None or not os.path.exists(path):
+        return None
+    try:
+        return feather.read_table(path).to_pandas()
+    except (OSError, ValueError):
+        return None
+
+
+def _write_feather_atomic(df, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        # os.replace atomik, jadi worker lain tidak pernah membaca file setengah jadi.
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_cached_dataset(df, cache_key, type_counts=None):
+    """Simpan dataset bersih ke cache. Gagal menulis cache tidak boleh menggagalkan load.
+
+    type_counts (hitungan Type mentah per Nopol) ikut disimpan agar data baru bisa
+    ditambahkan belakangan tanpa membangun ulang seluruh cache (lihat etl.py append).
+    """
+    if feather is None:
+        return
+    try:
+        os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+        if type_counts is not None:
+            _write_feather_atomic(type_counts.astype({'Nopol': str, 'Type': str}), get_type_counts_path(cache_key))
+        _write_feather_atomic(df, get_cache_path(cache_key))
+    except OSError:
+        pass
+
+
+def remove_cached_dataset(cache_key):
+    """Hapus entri cache (dataset + hitungan Type) yang sudah tidak berlaku."""
+    for path in (get_cache_path(cache_key), get_type_counts_path(cache_key)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_source_csv(file_path):
+    """Baca CSV mentah dengan fallback delimiter ';' -> ',' -> default."""
+    def _read(**kwargs):
+        if hasattr(file_path, "seek"):
+            file_path.seek(0)
+        return pd.read_csv(file_path, **kwargs)
+
+    try:
+        return _read(sep=';')
+    except pd.errors.ParserError:
+        try:
+            return _read(sep=',')
+        except pd.errors.ParserError:
+            return _read()
+    except Exception:
+        return _read()
+
+
+MONTH_ORDER = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+
+# Skema ringkas frame transaksi di memori. Teks berkardinalitas rendah disimpan
+# sebagai categorical, angka sebagai integer kecil, dan biaya sebagai rupiah int64.
+COMPACT_SCHEMA = {
+    'Bulan': pd.CategoricalDtype(MONTH_ORDER),
+    'Tahun': 'int16',
+    'Month_Num': 'int8',
+    'Nopol': 'category',
+    'Type': 'category',
+    'Vendor_Clean': 'category',
+    'Keterangan': 'category',
+    'Total Biaya': 'int64',
+    # Opsional: tanggal transaksi lengkap (data.csv / hasil ETL) untuk timeline harian/mingguan
+    'Tanggal': 'datetime64[ns]',
+}
+
+
+def apply_compact_schema(df, keep_columns=None):
+    """Terapkan COMPACT_SCHEMA dan buang kolom mentah yang tidak dipakai dashboard.
+
+    Kolom seperti Vendor / Vendor_TextMining hanya dipertahankan jika disebut
+    di keep_columns.
+    """
+    keep_columns = keep_columns or []
+    drop_cols = [col for col in df.columns if col not in COMPACT_SCHEMA and col not in keep_columns]
+    df = df.drop(columns=drop_cols)
+    df['Total Biaya'] = df['Total Biaya'].round()
+    return df.astype({col: dtype for col, dtype in COMPACT_SCHEMA.items() if col in df.columns})
+
+
+def build_memory_report(before, after):
+    """Ringkas pemakaian memori per kolom (byte) sebelum & sesudah skema ringkas."""
+    return {
+        'sebelum': {col: int(n) for col, n in before.memory_usage(deep=True).items()},
+        'sesudah': {col: int(n) for col, n in after.memory_usage(deep=True).items()},
+        'baris': len(after),
+    }
+
+
+def get_memory_report(df):
+    """Tabel laporan memori (KB) dari dataset yang dimuat lewat load_and_process_data."""
+    report = df.attrs.get('memory_report')
+    if not report:
+        return None
+    table = pd.DataFrame({'Sebelum (KB)': pd.Series(report['sebelum']), 'Sesudah (KB)': pd.Series(report['sesudah'])}).fillna(0) / 1024
+    table.loc['TOTAL'] = table.sum()
+    table['Hemat'] = (1 - table['Sesudah (KB)'] / table['Sebelum (KB)']).where(table['Sebelum (KB)'] > 0, 0)
+    return table
+
+
+# Tipe generik yang dihindari oleh logika "anti-OTHER" (pilih_tipe_terbaik di benerinData.ipynb).
+GENERIC_TYPES = ['OTHER', 'OTHERS', 'OTHER D', 'NAN', 'UNKNOWN']
+
+
+def count_vehicle_types(df):
+    """Hitung kemunculan setiap pasangan (Nopol, Type) sebelum Type dinormalisasi."""
+    pairs = df[['Nopol', 'Type']].dropna()
+    return pairs.groupby(['Nopol', 'Type'], sort=False, observed=True).size().rename('Jumlah').reset_index()
+
+
+def merge_type_counts(*tables):
+    """Jumlahkan beberapa tabel hasil count_vehicle_types (misalnya data lama + batch baru)."""
+    merged = pd.concat([t.astype({'Nopol': str, 'Type': str}) for t in tables], ignore_index=True)
+    return merged.groupby(['Nopol', 'Type'], sort=False)['Jumlah'].sum().reset_index()
+
+
+def normalize_vehicle_type(df, prefer_specific=False, type_counts=None):
+    """Tentukan satu Type per Nopol secara tervektorisasi.
+
+    Hasilnya sama dengan groupby('Nopol')['Type'].transform(mode): Type paling
+    sering muncul, seri dipecah secara alfabetis, dan "UNKNOWN" jika Nopol
+    tidak punya Type sama sekali. Dengan prefer_specific=True, Type spesifik
+    selalu didahulukan dari tipe generik (OTHER, OTHERS, ...) seperti di notebook.
+    type_counts bisa diberikan jika hitungan (Nopol, Type) sudah tersedia.
+    """
+    counts = count_vehicle_types(df) if type_counts is None else type_counts.copy()
+
+    sort_cols, ascending = ['Nopol', 'Jumlah', 'Type'], [True, False, True]
+    if prefer_specific:
+        counts['Generik'] = counts['Type'].astype(str).str.strip().str.upper().isin(GENERIC_TYPES)
+        sort_cols.insert(1, 'Generik')
+        ascending.insert(1, True)
+
+    best_type = counts.sort_values(sort_cols, ascending=ascending).drop_duplicates('Nopol').set_index('Nopol')['Type']
+    if isinstance(df['Nopol'].dtype, pd.CategoricalDtype):
+        # Nopol categorical (jalur streaming): petakan per kategori, lalu sebar lewat kode.
+        per_category = best_type.reindex(df['Nopol'].cat.categories).astype(object).fillna("UNKNOWN")
+        return pd.Series(per_category.to_numpy()[df['Nopol'].cat.codes], index=df.index, dtype='category')
+    return df['Nopol'].map(best_type).fillna("UNKNOWN")
+
+
+REQUIRED_COLUMNS = ['Total Biaya', 'Nopol', 'Bulan', 'Tahun', 'Keterangan']
+DEDUP_KEY = ['Bulan', 'Tahun', 'Nopol', 'Total Biaya', 'Vendor_Clean']
+
+
+def validate_columns(df):
+    """Rapikan nama kolom dan cek kolom wajib. Return pesan error atau None."""
+    df.columns = df.columns.str.strip()
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        return f"Data tidak valid: Kolom wajib yang hilang - {', '.join(missing_cols)}"
+    return None
+
+
+def get_dedup_columns(df):
+    """Kolom kunci duplikat yang tersedia (Vendor_Clean boleh tidak ada di file upload)."""
+    return [col for col in DEDUP_KEY if col in df.columns]
+
+
+def hash_dedup_keys(df):
+    """Hash 64-bit per baris atas kolom DEDUP_KEY, stabil antar-chunk maupun antar-file."""
+    # Samakan tipe dulu: file/chunk yang sama bisa terbaca int di satu tempat dan float di tempat lain.
+    keys = df[get_dedup_columns(df)].astype({'Total Biaya': 'float64', 'Tahun': 'float64'})
+    keys = keys.astype({col: object for col in keys.columns if col not in ('Total Biaya', 'Tahun')})
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def normalize_transaction_rows(df):
+    """Langkah pembersihan per baris: rapikan teks, vendor, bulan, biaya, dan tahun."""
+    df['Bulan'] = df['Bulan'].str.strip().str.capitalize()
+    df['Keterangan'] = df['Keterangan'].str.strip().str.upper()
+    df['Nopol'] = df['Nopol'].str.strip().str.upper()
+
+    if 'Vendor_Clean' in df.columns:
+        df['Vendor_Clean'] = df['Vendor_Clean'].fillna(df.get('Vendor', '')).str.strip().str.upper()
+    elif 'Vendor' in df.columns:
+        df['Vendor_Clean'] = df['Vendor'].str.strip().str.upper()
+    else:
+        df['Vendor_Clean'] = 'UNKNOWN'
+
+    month_map = {
+        'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4, 'Mei': 5, 'Juni': 6,
+        'Juli': 7, 'Agustus': 8, 'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12, 'Nopember': 11
+    }
+    df['Bulan'] = df['Bulan'].replace({'Nopember': 'November'})
+    df['Month_Num'] = df['Bulan'].map(month_map)
+    # Baris dengan nama bulan yang tidak dikenali tidak bisa ditempatkan di timeline.
+    df = df[df['Month_Num'].notna() & (df['Total Biaya'] > 1)]
+    df['Tahun'] = df['Tahun'].astype(int)
+    if 'Tanggal' in df.columns:
+        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce', format='ISO8601')
+    return df
+
+
+def clean_transactions(df):
+    """Jalankan rantai pembersihan pada frame mentah. Return (df, error).
+
+    Type dibiarkan apa adanya; normalisasi per Nopol (normalize_vehicle_type)
+    butuh seluruh dataset dan dijalankan oleh pemanggil.
+    """
+    error = validate_columns(df)
+    if error:
+        return None, error
+
+    df = df.dropna(subset=REQUIRED_COLUMNS)
+    df = df.drop_duplicates(subset=get_dedup_columns(df))
+    df = normalize_transaction_rows(df)
+
+    if 'Type' not in df.columns:
+        df['Type'] = 'UNKNOWN'
+
+    return df, None
+
+
+def load_and_process_data(file_path=None, prefer_specific_type=False, keep_columns=None):
+    try:
+        if file_path is None: 
+            file_path = DEFAULT_DATA_FILE
+
+        # Cache kolumnar di disk: file yang sama (isi + versi pembersihan) cukup
+        # dibaca ulang lewat memory-map, tanpa parse CSV dan pembersihan lagi.
+        cache_key = get_cache_key(get_source_digest(file_path), prefer_specific_type, keep_columns)
+        df = read_cached_dataset(cache_key)
+        if df is not None:
+            df.attrs['fingerprint'] = cache_key
+            return df, None
+
+        df, error = clean_transactions(read_source_csv(file_path))
+        if error:
+            return None, error
+
+        type_counts = count_vehicle_types(df)
+        df['Type'] = normalize_vehicle_type(df, prefer_specific_type, type_counts)
+
+        compact_df = apply_compact_schema(df, keep_columns)
+        compact_df.attrs['memory_report'] = build_memory_report(df, compact_df)
+        df = compact_df
+
+        write_cached_dataset(df, cache_key, type_counts)
+        df.attrs['fingerprint'] = cache_key
+        return df, None
+    except Exception as e: 
+        return None, f"Error: {str(e)}"
+
+# Upload di atas ambang ini dibaca bertahap (chunk) agar memori puncak tetap terbatas.
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+STREAMING_CHUNK_ROWS = 200_000
+
+
+def sniff_delimiter(source, sample_size=64 * 1024):
+    """Tebak delimiter sekali saja dari baris header di potongan awal file."""
+    source.seek(0)
+    sample = source.read(sample_size)
+    source.seek(0)
+    if isinstance(sample, bytes):
+        sample = sample.decode('utf-8', errors='ignore')
+    header = sample.splitlines()[0] if sample else ''
+    return max([';', ',', '\t', '|'], key=header.count)
+
+
+def concat_compact_frames(frames):
+    """Gabungkan potongan frame berskema ringkas tanpa kehilangan dtype categorical."""
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = frames[0][col].cat.categories
+            for frame in frames[1:]:
+                categories = categories.union(frame[col].cat.categories)
+            dtype = pd.CategoricalDtype(categories)
+            for frame in frames:
+                frame[col] = frame[col].astype(dtype)
+    return pd.concat(frames)
+
+
+def load_csv_streaming(source, prefer_specific_type=False, keep_columns=None, chunk_rows=STREAMING_CHUNK_ROWS, on_progress=None):
+    """Versi bertahap dari load_and_process_data untuk file CSV berukuran besar.
+
+    Delimiter ditebak sekali, lalu file dibaca per chunk. Setiap chunk dibersihkan
+    dengan aturan yang sama dan langsung diringkas ke COMPACT_SCHEMA, sehingga
+    yang tertahan di memori hanya satu chunk mentah ditambah hasil ringkasnya.
+    Duplikat antar-chunk dibuang lewat array terurut hash kunci DEDUP_KEY (8 byte per kunci).
+    """
+    try:
+        total_bytes = getattr(source, 'size', 0)
+        sep = sniff_delimiter(source)
+        seen_keys = np.empty(0, dtype=np.uint64)
+        frames = []
+        before_bytes, after_bytes = pd.Series(dtype='int64'), pd.Series(dtype='int64')
+
+        for chunk in pd.read_csv(source, sep=sep, chunksize=chunk_rows):
+            error = validate_columns(chunk)
+            if error:
+                return None, error
+
+            chunk = chunk.dropna(subset=REQUIRED_COLUMNS)
+            key_hashes = hash_dedup_keys(chunk)
+            is_new = ~pd.Series(key_hashes).duplicated().to_numpy() & ~np.isin(key_hashes, seen_keys)
+            # Kunci baru sudah unik dan belum ada di seen_keys; sort stabil menggabungkan dua run terurut.
+            seen_keys = np.concatenate([seen_keys, key_hashes[is_new]])
+            seen_keys.sort(kind='stable')
+
+            chunk = normalize_transaction_rows(chunk[is_new])
+            if 'Type' not in chunk.columns:
+                chunk['Type'] = 'UNKNOWN'
+            compact = apply_compact_schema(chunk, keep_columns)
+            before_bytes = before_bytes.add(chunk.memory_usage(deep=True), fill_value=0)
+            after_bytes = after_bytes.add(compact.memory_usage(deep=True), fill_value=0)
+            frames.append(compact)
+
+            if on_progress and total_bytes:
+                on_progress(min(source.tell() / total_bytes, 1.0))
+
+        if not frames:
+            return None, "Data tidak valid: file kosong"
+
+        df = concat_compact_frames(frames)
+        del frames
+        df['Type'] = normalize_vehicle_type(df, prefer_specific=prefer_specific_type)
+        df.attrs['memory_report'] = {
+            'sebelum': before_bytes.astype(int).to_dict(),
+            'sesudah': after_bytes.astype(int).to_dict(),
+            'baris': len(df),
+        }
+        return df, None
+    except Exception as e:
+        return None, f"Error: {str(e)}"
+
+
+# ==========================================
+# DATASET BERSAMA
+# ==========================================
+# Dataset bersih disimpan sekali per proses (store = AggregateMemo milik pemanggil) dan
+# dipakai bersama semua sesi/permintaan. Dengan Copy-on-Write (diaktifkan di atas untuk
+# pandas 2.x), frame turunan tidak pernah menulis ke buffer dataset bersama, jadi
+# dataset ini praktis read-only.
+SHARED_DATASET_ENTRIES = int(os.environ.get("DASHBOARD_DATASET_ENTRIES", 4))
+SHARED_DATASET_BYTES = int(os.environ.get("DASHBOARD_DATASET_MB", 1024)) * 1024 * 1024
+
+
+class DatasetLoadError(Exception):
+    """Load dataset gagal; pesan berisi error yang ditampilkan ke pengguna."""
+
+
+def load_into_store(store, key, load):
+    """Ambil dataset dari store, atau jalankan `load` (-> (df, error)) saat belum ada.
+
+    Hanya dataset yang berhasil dimuat yang disimpan. Error dijadikan exception di
+    dalam store (tidak ikut tersimpan) lalu dikembalikan sebagai pesan, jadi load
+    berikutnya mencoba lagi setelah file diperbaiki. Return (df, error).
+    """
+    def build():
+        df, error = load()
+        if error or df is None:
+            raise DatasetLoadError(error or "Data belum dimuat")
+        return df
+
+    try:
+        return store.get(key, build), None
+    except DatasetLoadError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"Error: {str(e)}"
+
+
+def load_dataset_file(store, file_path=DEFAULT_DATA_FILE, prefer_specific_type=False):
+    """Dataset dari file lokal lewat store; berganti otomatis jika file di disk berubah."""
+    try:
+        stat = os.stat(file_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    key = ('file', os.path.abspath(file_path), version, prefer_specific_type)
+    return load_into_store(store, key, lambda: load_and_process_data(file_path, prefer_specific_type))
@@ -0,0 +1,518 @@
+"""ETL pembersihan data pemeliharaan kendaraan (versi produksi dari benerinData.ipynb).
+
+Menggabungkan file "Pemeliharaan Kendaraan 20xx.csv" (dan data.csv jika ada),
+membersihkan nilai biaya, melengkapi Type/Jenis Kendaraan berdasarkan Nopol,
+menyeragamkan nama vendor, dan mengelompokkan kategori kerusakan. Semua langkah
+dibuat tervektorisasi (regex / tabel lookup / matriks TF-IDF), tanpa df.apply per baris.
+
+Contoh:
+    python etl.py build --data data.csv
+    python etl.py build --output /tmp/Data_Tahunan.csv    # tanpa data.csv, file baru
+    python etl.py append "Pemeliharaan Kendaraan 2026.csv"
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cleaning import (
+    DATA_CACHE_DIR,
+    DEFAULT_DATA_FILE,
+    MONTH_ORDER,
+    apply_compact_schema,
+    clean_transactions,
+    concat_compact_frames,
+    count_vehicle_types,
+    get_cache_key,
+    get_source_digest,
+    hash_dedup_keys,
+    merge_type_counts,
+    normalize_vehicle_type,
+    read_cached_dataset,
+    read_cached_type_counts,
+    read_source_csv,
+    remove_cached_dataset,
+    write_cached_dataset,
+)
+
+# ==========================================
+# KONFIGURASI
+# ==========================================
+YEARLY_FILE_PATTERN = 'Pemeliharaan Kendaraan *.csv'
+
+OUTPUT_COLUMNS = ['Bulan', 'Vendor', 'Type', 'Total Biaya', 'Keterangan', 'Nopol', 'Tahun', 'Vendor_Clean']
+# Ditulis hanya jika ada sumber yang membawanya (data.csv punya TANGGAL lengkap).
+OPTIONAL_OUTPUT_COLUMNS = ['Tanggal']
+
+# Rename kolom data.csv ke skema file tahunan (langkah 4 di notebook).
+DATA_CSV_COLUMNS = {
+    'NOPOL': 'Nopol',
+    'REKANAN': 'Vendor',
+    'NILAI': 'Total Biaya',
+    'JENIS PEMELIHARAAN': 'Keterangan',
+    'MERK': 'Type',
+    'KETERANGAN': 'Status Proses',
+    'TANGGAL': 'Tanggal_Full',
+}
+
+# Pengganti ganti_vendor_by_type: urutan aturan menentukan prioritas.
+TYPE_VENDOR_RULES = [
+    (['INNOVA', 'HIACE', 'CAMRY', 'FORTUNER', 'KIJANG'], 'TOYOTA SERVICE CENTER (ASTRA)'),
+    (['PANTHER', 'ISUZU', 'NMR', 'NKR'], 'ISUZU SERVICE CENTER (ASTRA)'),
+    (['APV', 'SUZUKI'], 'SUZUKI SERVICE CENTER (UMC)'),
+    (['HINO'], 'HINO SERVICE CENTER (DUTA CEMERLANG)'),
+    (['MITSUBISHI'], 'MITSUBISHI SERVICE CENTER'),
+]
+
+# Pengganti kategori_kerusakan. Teks yang tidak cocok dianggap perawatan rutin (TUNE UP).
+DAMAGE_RULES = [
+    ('BERAT', 'RUSAK BERAT'),
+    ('SEDANG', 'RUSAK SEDANG'),
+    ('RINGAN', 'RUSAK RINGAN'),
+]
+DEFAULT_DAMAGE_CATEGORY = 'TUNE UP'
+
+# Pengelompokan nama vendor (langkah text mining di notebook): TF-IDF n-gram huruf
+# dan cosine similarity. Nama baru dicocokkan dulu ke pasangan Vendor -> Vendor_Clean
+# yang sudah ada di dataset; sisanya dikelompokkan di antara mereka sendiri.
+VENDOR_NGRAM = 3
+VENDOR_SIMILARITY_THRESHOLD = 0.55
+# Bentuk badan usaha tidak membedakan vendor, jadi dibuang sebelum dibandingkan.
+VENDOR_NOISE_PATTERN = r'\b(?:PT|CV|UD|TBK)\b|[^\w\s]'
+# Batas sel (nama x bobot n-gram) per blok kemiripan; sekitar 32 MB float64.
+VENDOR_BLOCK_CELLS = 1 << 22
+
+
+# ==========================================
+# LANGKAH TRANSFORMASI
+# ==========================================
+def read_yearly_file(path, tahun):
+    """Baca satu file tahunan dan tambahkan kolom Tahun & Sumber."""
+    df = pd.read_csv(path, sep=';', encoding='utf-8-sig')
+    df.columns = df.columns.str.strip()
+    if 'Bulan' not in df.columns:
+        # Beberapa ekspor memiliki header kolom pertama yang rusak; urutan kolom tetap sama.
+        df = df.rename(columns={df.columns[0]: 'Bulan'})
+    df['Tahun'] = tahun
+    df['Sumber'] = os.path.basename(path)
+    return df
+
+
+def read_data_csv(path):
+    """Baca data.csv (format sistem lama) dan samakan kolomnya dengan file tahunan."""
+    df = pd.read_csv(path, sep=';', encoding='utf-8-sig').rename(columns=DATA_CSV_COLUMNS)
+    df['Total Biaya'] = df['Total Biaya'].astype(str).str.replace('Rp ', '', regex=False)
+    tanggal = pd.to_datetime(df['Tanggal_Full'], dayfirst=True)
+    df['Bulan'] = tanggal.dt.month.map(dict(enumerate(MONTH_ORDER, start=1)))
+    df['Tahun'] = tanggal.dt.year
+    df['Tanggal'] = tanggal.dt.strftime('%Y-%m-%d')
+    df['Sumber'] = os.path.basename(path)
+    return df
+
+
+def parse_rupiah(values):
+    """Ubah teks rupiah ('Rp3.017.500', '900.000', '3145683') menjadi angka."""
+    text = values.astype(str).str.replace(r'Rp|\s', '', regex=True).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').fillna(0)
+
+
+def fill_from_nopol_reference(df, col):
+    """Isi nilai kosong dengan nilai pertama yang tersedia untuk Nopol yang sama."""
+    return df[col].fillna(df.groupby('Nopol')[col].transform('first'))
+
+
+def normalize_vendor_names(vendors):
+    """Uppercase dan rapikan spasi; bentuk inilah yang dipakai sebagai kunci vendor."""
+    return vendors.astype(str).str.upper().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def vendor_match_text(names):
+    """Teks pembanding: tanpa badan usaha dan tanda baca (preprocess_text di notebook)."""
+    return names.str.replace(VENDOR_NOISE_PATTERN, ' ', regex=True).str.replace(r'\s+', ' ', regex=True).str.strip().str.lower()
+
+
+def char_ngram_tfidf(texts, n=VENDOR_NGRAM):
+    """TF-IDF n-gram huruf, setara TfidfVectorizer(analyzer='char'), baris ter-normalisasi L2.
+
+    Disimpan jarang (CSR: indptr, kolom, bobot per baris) karena tiap nama hanya
+    memuat belasan dari ribuan n-gram; tidak ada matriks padat nama x n-gram.
+    """
+    grams = [[text[i:i + n] for i in range(len(text) - n + 1)] or [text] for text in texts]
+    codes, vocab = pd.factorize(pd.Series([gram for row in grams for gram in row], dtype=object))
+    rows = np.repeat(np.arange(len(grams), dtype=np.int64), [len(row) for row in grams])
+    # n-gram yang sama dalam satu nama digabung: jumlah kemunculannya = tf
+    cells, tf = np.unique(rows * len(vocab) + codes, return_counts=True)
+    rows, columns = np.divmod(cells, len(vocab))
+    doc_freq = np.bincount(columns, minlength=len(vocab))
+    weights = tf * (np.log((1 + len(grams)) / (1 + doc_freq[columns])) + 1)
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(grams)))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(grams)))])
+    return indptr, columns, weights / norms[rows], len(vocab)
+
+
+def cosine_similarity_rows(matrix, rows):
+    """Kemiripan kosinus baris `rows` terhadap semua baris `matrix` (hasil char_ngram_tfidf).
+
+    Hanya blok len(rows) x jumlah nama yang dibuat padat; pemanggil memotong `rows`
+    per blok (lihat similarity_blocks) agar memori tetap kecil.
+    """
+    indptr, columns, weights, n_features = matrix
+    starts, lengths = indptr[rows], np.diff(indptr)[rows]
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    query = np.zeros((len(rows), n_features))
+    query[np.repeat(np.arange(len(rows)), lengths), columns[positions]] = weights[positions]
+    # Setiap baris punya minimal satu n-gram, jadi reduceat per baris tidak pernah kosong
+    return np.add.reduceat(query[:, columns] * weights, indptr[:-1], axis=1)
+
+
+def similarity_blocks(matrix, rows):
+    """Iterasi (potongan rows, blok kemiripan) dengan ukuran blok <= VENDOR_BLOCK_CELLS."""
+    block_rows = max(1, VENDOR_BLOCK_CELLS // max(len(matrix[1]), 1))
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        yield block, cosine_similarity_rows(matrix, block)
+
+
+def read_vendor_reference(path):
+    """Pasangan Vendor -> Vendor_Clean dari dataset bersih yang sudah ada (None jika tidak ada)."""
+    if not path or not os.path.exists(path):
+        return None
+    df = read_source_csv(path)
+    df.columns = df.columns.str.strip()
+    return vendor_reference(df)
+
+
+def vendor_reference(df):
+    """Peta nama vendor (ternormalisasi) -> Vendor_Clean; Vendor_Clean juga memetakan ke dirinya."""
+    if 'Vendor_Clean' not in df.columns:
+        return None
+    pairs = df.dropna(subset=['Vendor_Clean'])
+    labels = pairs['Vendor_Clean'].astype(str)
+    parts = [pd.Series(labels.to_numpy(), index=normalize_vendor_names(labels).to_numpy())]
+    if 'Vendor' in pairs.columns:
+        named = pairs['Vendor'].notna()
+        parts.insert(0, pd.Series(labels[named].to_numpy(), index=normalize_vendor_names(pairs['Vendor'][named]).to_numpy()))
+    reference = pd.concat(parts)
+    return reference[~reference.index.duplicated()]
+
+
+def group_vendor_names(names, counts, reference=None, threshold=VENDOR_SIMILARITY_THRESHOLD):
+    """Label Vendor_Clean untuk setiap nama unik (`names` sudah dinormalisasi).
+
+    Nama yang sama persis dengan nama di `reference` memakai labelnya; nama lain
+    memakai label nama referensi paling mirip jika kemiripannya di atas threshold.
+    Sisanya dikelompokkan seperti notebook: nama paling sering menjadi ketua grup
+    dan menarik semua nama lain yang mirip dengannya.
+    """
+    names = pd.Index(names)
+    labels = np.full(len(names), None, dtype=object)
+    if reference is not None and len(reference):
+        labels[:] = names.map(reference).to_numpy(dtype=object)
+        pending = np.flatnonzero(pd.isna(labels))
+        if len(pending):
+            matrix = char_ngram_tfidf(vendor_match_text(pd.Series(names[pending].append(reference.index))).tolist())
+            for block, similarity in similarity_blocks(matrix, np.arange(len(pending))):
+                similarity = similarity[:, len(pending):]
+                best = similarity.argmax(axis=1)
+                matched = similarity[np.arange(len(block)), best] > threshold
+                labels[pending[block[matched]]] = reference.to_numpy()[best[matched]]
+
+    pending = np.flatnonzero(pd.isna(labels))
+    if len(pending):
+        matrix = char_ngram_tfidf(vendor_match_text(pd.Series(names[pending])).tolist())
+        grouped = np.zeros(len(pending), dtype=bool)
+        order = np.argsort(-np.asarray(counts)[pending], kind='stable')
+        for block, similarity in similarity_blocks(matrix, order):
+            for leader, row in zip(block, similarity):
+                if grouped[leader]:
+                    continue
+                members = ~grouped & (row > threshold)
+                members[leader] = True
+                labels[pending[members]] = names[pending[leader]]
+                grouped |= members
+    return labels
+
+
+def clean_vendor_names(vendors, reference=None):
+    """Seragamkan nama vendor lewat kemiripan teks (lihat group_vendor_names)."""
+    codes, uniques = pd.factorize(normalize_vendor_names(vendors))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    labels = group_vendor_names(uniques, counts, reference)
+    return pd.Series(labels[codes], index=vendors.index)
+
+
+def vendor_by_type(types, vendors):
+    """Versi tervektorisasi ganti_vendor_by_type: vendor utama berdasarkan kata di Type."""
+    conditions = [types.str.contains('|'.join(map(re.escape, words)), regex=True, na=False) for words, _ in TYPE_VENDOR_RULES]
+    return pd.Series(np.select(conditions, [label for _, label in TYPE_VENDOR_RULES], default=vendors.to_numpy()), index=types.index)
+
+
+def categorize_damage(keterangan):
+    """Versi tervektorisasi kategori_kerusakan."""
+    text = keterangan.astype(str).str.upper()
+    conditions = [text.str.contains(word, regex=False) for word, _ in DAMAGE_RULES]
+    return pd.Series(np.select(conditions, [label for _, label in DAMAGE_RULES], default=DEFAULT_DAMAGE_CATEGORY), index=keterangan.index)
+
+
+def transform(raw, map_vendor_by_type=False, known_vendors=None):
+    """Jalankan seluruh langkah notebook pada frame gabungan mentah.
+
+    known_vendors (lihat vendor_reference) menjaga label Vendor_Clean yang
+    sudah dipakai dataset agar vendor lama tidak berganti nama setelah build/append.
+    """
+    df = raw.copy()
+    df['Nopol'] = df['Nopol'].astype(str).str.strip().str.upper().replace('NAN', np.nan)
+
+    df['Total Biaya'] = parse_rupiah(df['Total Biaya'])
+    df = df[~df['Total Biaya'].isin([0, 1])]
+
+    for col in ['Type', 'Jenis Kendaraan']:
+        if col in df.columns:
+            df[col] = fill_from_nopol_reference(df, col)
+
+    df = df[df['Keterangan'].notna() & (df['Keterangan'].astype(str).str.strip() != '')]
+    df = df.dropna(subset=['Bulan', 'Vendor', 'Type', 'Nopol', 'Tahun'])
+
+    df['Bulan'] = df['Bulan'].str.strip().str.capitalize()
+    df['Type'] = df['Type'].astype(str).str.strip().str.upper()
+    df['Type'] = normalize_vehicle_type(df, prefer_specific=True)
+    df['Keterangan'] = categorize_damage(df['Keterangan'])
+    df['Vendor_Clean'] = clean_vendor_names(df['Vendor'], known_vendors)
+    if map_vendor_by_type:
+        df['Vendor_Clean'] = vendor_by_type(df['Type'], df['Vendor_Clean'])
+
+    df['Total Biaya'] = df['Total Biaya'].round().astype('int64')
+    df['Tahun'] = df['Tahun'].astype(int)
+    columns = OUTPUT_COLUMNS + [col for col in OPTIONAL_OUTPUT_COLUMNS if col in df.columns]
+    return df[columns].reset_index(drop=True)
+
+
+def tahun_from_filename(path):
+    """Ambil tahun dari nama file seperti 'Pemeliharaan Kendaraan 2025.csv'."""
+    match = re.search(r'(19|20)\d{2}', os.path.basename(path))
+    if not match:
+        raise ValueError(f"Tahun tidak ditemukan di nama file: {path}")
+    return int(match.group(0))
+
+
+def load_sources(yearly_files, data_file=None):
+    """Baca dan gabungkan semua file sumber."""
+    frames = [read_yearly_file(path, tahun_from_filename(path)) for path in yearly_files]
+    if data_file:
+        frames.append(read_data_csv(data_file))
+    if not frames:
+        raise ValueError("Tidak ada file sumber yang ditemukan.")
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_output(df, output):
+    """Tulis CSV hasil (separator ';') secara atomik."""
+    tmp_path = f"{output}.tmp"
+    df.to_csv(tmp_path, index=False, sep=';')
+    os.replace(tmp_path, output)
+
+
+# ==========================================
+# INDEX KUNCI & APPEND INKREMENTAL
+# ==========================================
+def get_key_index_path(dataset):
+    """Lokasi index kunci duplikat untuk satu file dataset."""
+    name = hashlib.sha256(os.path.abspath(dataset).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DATA_CACHE_DIR, f"keys_{name}.npz")
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_key_index(dataset):
+    """Bangun index dari isi dataset: hash kunci DEDUP_KEY, jumlah baris, digest file, dan vendor."""
+    raw = read_source_csv(dataset)
+    raw.columns = raw.columns.str.strip()
+    return {
+        'keys': np.unique(hash_dedup_keys(raw)),
+        'rows': len(raw),
+        'digest': get_source_digest(dataset),
+        'vendors': vendor_reference(raw),
+    }
+
+
+def save_key_index(dataset, index):
+    """Simpan index beserta ukuran & mtime dataset sebagai penanda kesegarannya."""
+    size, mtime_ns = _file_signature(dataset)
+    path = get_key_index_path(dataset)
+    os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+    with open(f"{path}.tmp", 'wb') as f:
+        vendors = index['vendors'] if index['vendors'] is not None else pd.Series(dtype=str)
+        np.savez(
+            f, keys=index['keys'], rows=index['rows'], digest=index['digest'], size=size, mtime_ns=mtime_ns,
+            vendor_names=vendors.index.to_numpy(dtype=str), vendor_labels=vendors.to_numpy(dtype=str),
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+def load_key_index(dataset):
+    """Baca index kunci; bangun ulang sekali jika belum ada atau dataset diubah di luar ETL."""
+    path = get_key_index_path(dataset)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            # Index versi lama belum menyimpan vendor; dibangun ulang sekali.
+            if 'vendor_names' in data.files and (int(data['size']), int(data['mtime_ns'])) == _file_signature(dataset):
+                return {
+                    'keys': data['keys'],
+                    'rows': int(data['rows']),
+                    'digest': str(data['digest']),
+                    'vendors': pd.Series(data['vendor_labels'].astype(object), index=data['vendor_names'].astype(object)),
+                }
+    index = build_key_index(dataset)
+    save_key_index(dataset, index)
+    return index
+
+
+def append_rows_to_csv(rows, dataset):
+    """Tambahkan baris ke akhir CSV dataset mengikuti urutan kolom header yang ada."""
+    with open(dataset, 'r', encoding='utf-8-sig') as f:
+        header = f.readline().rstrip('\n').split(';')
+    with open(dataset, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) != b'\n'
+    with open(dataset, 'a', encoding='utf-8', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        rows.reindex(columns=header).to_csv(f, header=False, index=False, sep=';', lineterminator='\n')
+
+
+def update_cached_datasets(old_digest, new_digest, rows, first_row):
+    """Perbarui cache kolumnar app.py dengan baris baru, tanpa parse ulang riwayat.
+
+    Hitungan Type mentah per Nopol yang tersimpan di cache ditambah hitungan batch,
+    lalu Type dipilih ulang untuk seluruh dataset dari hitungan gabungan tersebut.
+    Entri cache yang belum ada dibiarkan; app.py akan membangunnya saat load.
+    """
+    batch, error = clean_transactions(rows.set_axis(pd.RangeIndex(first_row, first_row + len(rows))))
+    if error:
+        raise ValueError(error)
+
+    updated = 0
+    for prefer_specific in (False, True):
+        old_key = get_cache_key(old_digest, prefer_specific)
+        cached, type_counts = read_cached_dataset(old_key), read_cached_type_counts(old_key)
+        if cached is None or type_counts is None:
+            continue
+
+        type_counts = merge_type_counts(type_counts, count_vehicle_types(batch))
+        compact_batch = apply_compact_schema(batch)
+        merged = concat_compact_frames([cached, compact_batch])
+        merged['Type'] = normalize_vehicle_type(merged, prefer_specific, type_counts)
+
+        report = cached.attrs.get('memory_report')
+        if report:
+            before = pd.Series(report['sebelum']).add(batch.memory_usage(deep=True), fill_value=0)
+            merged.attrs['memory_report'] = {
+                'sebelum': before.astype(int).to_dict(),
+                'sesudah': {col: int(n) for col, n in merged.memory_usage(deep=True).items()},
+                'baris': len(merged),
+            }
+
+        write_cached_dataset(merged, get_cache_key(new_digest, prefer_specific), type_counts)
+        remove_cached_dataset(old_key)
+        updated += 1
+    return updated
+
+
+def append_to_dataset(new_files, dataset=DEFAULT_DATA_FILE, map_vendor_by_type=False):
+    """Bersihkan file baru saja, buang baris yang sudah ada, lalu tambahkan ke dataset."""
+    index = load_key_index(dataset)
+    batch = transform(load_sources(new_files), map_vendor_by_type=map_vendor_by_type, known_vendors=index['vendors'])
+
+    key_hashes = hash_dedup_keys(batch)
+    is_new = ~np.isin(key_hashes, index['keys']) & ~pd.Series(key_hashes).duplicated().to_numpy()
+    new_rows = batch[is_new]
+    if new_rows.empty:
+        return 0, len(batch), 0
+
+    append_rows_to_csv(new_rows, dataset)
+    new_digest = get_source_digest(dataset)
+    updated = update_cached_datasets(index['digest'], new_digest, new_rows.reset_index(drop=True), index['rows'])
+    vendors = vendor_reference(new_rows)
+    if index['vendors'] is not None:
+        vendors = pd.concat([index['vendors'], vendors])
+    save_key_index(dataset, {
+        'keys': np.union1d(index['keys'], key_hashes[is_new]),
+        'rows': index['rows'] + len(new_rows),
+        'digest': new_digest,
+        'vendors': vendors[~vendors.index.duplicated()],
+    })
+    return len(new_rows), len(batch) - len(new_rows), updated
+
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def cmd_build(args):
+    start = time.perf_counter()
+    yearly_files = args.files or sorted(glob.glob(YEARLY_FILE_PATTERN))
+    data_file = args.data if args.data and os.path.exists(args.data) else None
+    if data_file is None and os.path.exists(args.output) and not args.force:
+        # Riwayat yang hanya ada di data.csv (2020-2022, sebagian 2024-2025) akan hilang.
+        print(
+            f"{args.data} tidak ditemukan; build tanpa file riwayat ini akan menimpa {args.output} "
+            "dengan data yang lebih sedikit. Sediakan --data, tulis ke --output lain, "
+            "atau tambahkan --force jika memang disengaja.",
+            file=sys.stderr,
+        )
+        return 1
+    # Dibaca sebelum --output ditimpa (biasanya file yang sama).
+    known_vendors = read_vendor_reference(args.reference)
+    raw = load_sources(yearly_files, data_file)
+    df = transform(raw, map_vendor_by_type=args.vendor_by_type, known_vendors=known_vendors)
+    write_output(df, args.output)
+    print(f"{len(df):,} baris ({len(raw):,} mentah) ditulis ke {args.output} dalam {time.perf_counter() - start:.2f} detik")
+    return 0
+
+
+def cmd_append(args):
+    start = time.perf_counter()
+    added, skipped, updated = append_to_dataset(args.files, args.dataset, map_vendor_by_type=args.vendor_by_type)
+    print(
+        f"{added:,} baris baru ditambahkan ke {args.dataset}, {skipped:,} duplikat dilewati, "
+        f"{updated} cache diperbarui dalam {time.perf_counter() - start:.2f} detik"
+    )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ETL data pemeliharaan kendaraan untuk dashboard.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Bangun ulang dataset bersih dari file sumber.")
+    build.add_argument('files', nargs='*', help=f"File tahunan (default: '{YEARLY_FILE_PATTERN}').")
+    build.add_argument('--data', default='data.csv', help="File data.csv format sistem lama (riwayat sebelum file tahunan).")
+    build.add_argument('--output', default=DEFAULT_DATA_FILE, help="File CSV hasil yang dibaca app.py.")
+    build.add_argument('--reference', default=DEFAULT_DATA_FILE, help="Dataset bersih yang label Vendor_Clean-nya dipertahankan.")
+    build.add_argument('--force', action='store_true', help="Tetap timpa --output walaupun file --data tidak ada.")
+    build.add_argument('--vendor-by-type', action='store_true', help="Kelompokkan Vendor_Clean berdasarkan merek pada Type.")
+    build.set_defaults(func=cmd_build)
+
+    append = sub.add_parser('append', help="Tambahkan file bulanan/tahunan baru tanpa membangun ulang.")
+    append.add_argument('files', nargs='+', help="File baru, misalnya 'Pemeliharaan Kendaraan 2026.csv'.")
+    append.add_argument('--dataset', default=DEFAULT_DATA_FILE, help="Dataset bersih yang ditambah.")
+    append.add_argument('--vendor-by-type', action='store_true', help="Kelompokkan Vendor_Clean berdasarkan merek pada Type.")
+    append.set_defaults(func=cmd_append)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
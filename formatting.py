@@ -0,0 +1,114 @@
+"""Formatter angka tervektorisasi untuk label tabel dan grafik dashboard.
+
+Setiap fungsi menerima skalar, list, Series, atau array dan mengembalikan array
+string (dtype object) dengan hasil yang sama persis (byte-identical) dengan
+format Python per nilai, misalnya f"Rp {x:,.0f}" atau format_currency_text.
+printf "%.Nf" dan format "{:.Nf}" sama-sama membulatkan nilai biner secara
+tepat, jadi angka dibentuk sekaligus lewat np.char.mod lalu pemisah ribuan
+disisipkan dengan regex pada bagian bulatnya saja.
+
+Contoh:
+    format_rupiah([1500000, 250])          # ['Rp 1,500,000', 'Rp 250']
+    format_currency([2.5e9, 7.5e8])        # ['Rp 2.5 Miliar', 'Rp 750 Juta']
+    format_with_pattern(df['Frekuensi'], '{:.0f}x')
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+THOUSANDS_PATTERN = r'(\d)(?=(?:\d{3})+$)'
+FORMAT_SPEC_PATTERN = re.compile(r'^(?P<prefix>[^{}]*)\{:(?P<comma>,?)\.(?P<decimals>\d+)(?P<kind>[f%])\}(?P<suffix>[^{}]*)$')
+
+
+def _as_float_array(values):
+    return np.asarray(values, dtype='float64').ravel()
+
+
+def format_decimal(values, decimals=0, thousands=True):
+    """Setara f"{x:,.Nf}" (atau f"{x:.Nf}" jika thousands=False) untuk seluruh array."""
+    arr = _as_float_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=object)
+    text = np.char.mod(f'%.{int(decimals)}f', arr)
+    if not thousands:
+        return text.astype(object)
+
+    whole, dot, frac = np.char.partition(text, '.').T
+    whole = pd.Series(whole, dtype=object).str.replace(THOUSANDS_PATTERN, r'\1,', regex=True).to_numpy(dtype=str)
+    return np.char.add(np.char.add(whole, dot), frac).astype(object)
+
+
+def format_rupiah(values, decimals=0):
+    """Setara f"Rp {x:,.0f}"."""
+    return _affix(format_decimal(values, decimals), 'Rp ', '')
+
+
+def format_currency(values):
+    """Versi array dari format_currency_text: "Rp 1.2 Miliar" atau "Rp 350 Juta"."""
+    arr = _as_float_array(values)
+    miliar = arr >= 1e9
+    out = np.empty(arr.size, dtype=object)
+    out[miliar] = _affix(format_decimal(arr[miliar] / 1e9, 1), 'Rp ', ' Miliar')
+    out[~miliar] = _affix(format_decimal(arr[~miliar] / 1e6, 0), 'Rp ', ' Juta')
+    return out
+
+
+def format_currency_text(val):
+    if val >= 1e9:
+        return f"Rp {val/1e9:,.1f} Miliar"
+    return f"Rp {val/1e6:,.0f} Juta"
+
+
+def format_short_amount(values):
+    """Label sel heatmap: "1.2 Miliar" ("3 Miliar" tanpa .0), "45.6 Juta", atau "0"."""
+    arr = _as_float_array(values)
+    out = np.full(arr.size, '0', dtype=object)
+    miliar = arr >= 1e9
+    juta = (arr > 0) & ~miliar
+    out[miliar] = _miliar_label(arr[miliar])
+    out[juta] = _affix(format_decimal(arr[juta] / 1e6, 1, thousands=False), '', ' Juta')
+    return out
+
+
+def format_axis_amount(values):
+    """Label sumbu biaya: "0 Juta", "500 Juta", "1.5 Miliar" ("2 Miliar" tanpa .0)."""
+    arr = _as_float_array(values)
+    out = np.full(arr.size, '0 Juta', dtype=object)
+    miliar = arr >= 1e9
+    juta = (arr != 0) & ~miliar
+    out[miliar] = _miliar_label(arr[miliar])
+    out[juta] = _affix(format_decimal(arr[juta] / 1e6, 0, thousands=False), '', ' Juta')
+    return out
+
+
+def format_with_pattern(values, pattern):
+    """Terapkan pola format satu placeholder, mis. 'Rp {:,.0f}', '{:.0f}x', '{:.0%}'.
+
+    Pola lain (atau nilai non-numerik) jatuh kembali ke str.format per nilai.
+    """
+    match = FORMAT_SPEC_PATTERN.match(pattern)
+    arr = np.asarray(values)
+    if match is None or not (np.issubdtype(arr.dtype, np.number) or np.issubdtype(arr.dtype, np.bool_)):
+        return np.array([pattern.format(x) for x in arr.ravel()], dtype=object)
+
+    numbers = _as_float_array(arr)
+    suffix = match['suffix']
+    if match['kind'] == '%':
+        numbers = numbers * 100
+        suffix = '%' + suffix
+    text = format_decimal(numbers, int(match['decimals']), thousands=bool(match['comma']))
+    return _affix(text, match['prefix'], suffix)
+
+
+def _miliar_label(values):
+    text = _affix(format_decimal(values / 1e9, 1, thousands=False), '', ' Miliar')
+    if text.size == 0:
+        return text
+    return np.char.replace(text.astype(str), '.0 Miliar', ' Miliar').astype(object)
+
+
+def _affix(text, prefix, suffix):
+    if text.size == 0:
+        return np.empty(0, dtype=object)
+    return np.char.add(np.char.add(prefix, text.astype(str)), suffix).astype(object)
@@ -0,0 +1,379 @@
+"""Uji fungsi analisis di analytics.py (tanpa Streamlit)."""
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import cleaning
+from analytics import (
+    FILTER_COLUMNS,
+    TRANSACTION_COLUMNS,
+    AggregateMemo,
+    FilterIndex,
+    build_aggregate_cube,
+    calculate_time_series,
+    compute_audit_summary,
+    downsample_series,
+    estimate_nbytes,
+    filter_transactions,
+    lttb_indices,
+    minmax_indices,
+    sidebar_filters,
+    write_workbook,
+)
+from cleaning import DEFAULT_DATA_FILE, MONTH_ORDER, load_and_process_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path_factory.mktemp('cache')))
+        df, error = load_and_process_data(DATA_FILE)
+    assert error is None
+    return df
+
+# ==========================================
+# AGGREGATE MEMO
+# ==========================================
+def vendor_series(seed, size=200):
+    """Series hasil agregasi khas: index string (nama vendor), nilai float."""
+    names = [f"Vendor {seed}-{i:04d} Sejahtera Abadi" for i in range(size)]
+    return pd.Series(np.arange(size, dtype='float64'), index=pd.Index(names, dtype=object))
+
+
+def test_estimate_nbytes_counts_series_index():
+    series = vendor_series(0)
+    assert estimate_nbytes(series) == series.memory_usage(index=True, deep=True)
+    assert estimate_nbytes(series) > series.nbytes * 5
+    assert estimate_nbytes(series.to_frame()) == series.to_frame().memory_usage(index=True, deep=True).sum()
+    assert estimate_nbytes(np.zeros(10)) == 80
+    assert estimate_nbytes((series, np.zeros(10))) == estimate_nbytes(series) + 80
+
+
+def test_memo_respects_byte_budget():
+    budget = estimate_nbytes(vendor_series(0)) * 3
+    memo = AggregateMemo(max_entries=100, max_bytes=budget)
+    for seed in range(10):
+        memo.get(('fp', seed), lambda seed=seed: vendor_series(seed))
+        assert memo.nbytes <= memo.max_bytes
+        assert memo.nbytes == sum(estimate_nbytes(value) for value in memo.values())
+    assert memo.stats()['entries'] == 3
+    assert memo.evictions == 7
+
+
+def test_memo_evicts_least_recently_used():
+    memo = AggregateMemo(max_entries=2, max_bytes=10**9)
+    memo.get('a', lambda: 1)
+    memo.get('b', lambda: 2)
+    memo.get('a', lambda: 'ulang')  # hit: 'a' jadi yang terbaru
+    memo.get('c', lambda: 3)
+    assert memo.values() == [1, 3]
+    assert memo.get('b', lambda: 'baru') == 'baru'
+    assert (memo.hits, memo.misses, memo.evictions) == (1, 4, 2)
+
+
+def test_memo_computes_each_key_once_under_concurrency():
+    memo = AggregateMemo()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'hasil'
+
+    def worker():
+        barrier.wait()
+        return memo.get('kunci', compute)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(worker())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['hasil'] * 8
+    assert len(calls) == 1
+    assert memo.misses == 1 and memo.hits == 7
+
+
+def test_memo_failed_compute_does_not_block_retry():
+    memo = AggregateMemo()
+
+    def fail():
+        raise ValueError('gagal')
+
+    try:
+        memo.get('kunci', fail)
+    except ValueError:
+        pass
+    assert memo.get('kunci', lambda: 'ok') == 'ok'
+    assert memo.stats()['entries'] == 1
+
+# ==========================================
+# AGGREGATE CUBE
+# ==========================================
+# Implementasi groupby langsung atas data mentah (versi sebelum cube) sebagai pembanding.
+def raw_yearly_summary(df):
+    summary = df.groupby('Tahun', observed=True).agg({'Total Biaya': ['sum', 'mean', 'count']}).round(0)
+    summary.columns = ['Total_Pengeluaran', 'Rata_Rata', 'Jumlah_Transaksi']
+    return summary
+
+
+def raw_top_units(df, top_n=10):
+    top_units = df.groupby(['Nopol', 'Type'], observed=True).agg({'Total Biaya': 'sum', 'Bulan': 'count'})
+    top_units.columns = ['Total_Biaya', 'Frekuensi_Servis']
+    return top_units.sort_values(by='Total_Biaya', ascending=False).head(top_n)
+
+
+def raw_type_statistics(df):
+    type_stats = df.groupby('Type', observed=True).agg({'Total Biaya': ['sum', 'mean', 'count'], 'Nopol': 'nunique'})
+    type_stats.columns = ['Total_Biaya', 'Avg_Biaya', 'Transaksi', 'Jumlah_Unit']
+    return type_stats.sort_values('Total_Biaya', ascending=False)
+
+
+def assert_same(left, right):
+    if isinstance(left, pd.Series):
+        pd.testing.assert_series_equal(left, right, check_dtype=False, check_names=False, check_index_type=False)
+    else:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_index_type=False, check_column_type=False)
+
+
+@pytest.mark.parametrize('subset', ['semua', 'tahun', 'vendor'])
+def test_cube_matches_raw_groupby(dataset, subset):
+    df = dataset
+    if subset == 'tahun':
+        df = df[df['Tahun'] == 2024]
+    elif subset == 'vendor':
+        df = df[df['Vendor_Clean'] == df['Vendor_Clean'].mode()[0]]
+    cube = build_aggregate_cube(df)
+    assert cube['Total Biaya'].sum() == df['Total Biaya'].sum() and cube['Jumlah'].sum() == len(df)
+
+    assert_same(analytics.calculate_yearly_summary(cube), raw_yearly_summary(df))
+    assert_same(analytics.get_top_vendors(cube), df.groupby('Vendor_Clean', observed=True)['Total Biaya'].sum().sort_values(ascending=False).head(10))
+    assert_same(analytics.get_top_units(cube), raw_top_units(df))
+    assert_same(analytics.calculate_type_statistics(cube), raw_type_statistics(df))
+    assert_same(
+        analytics.calculate_category_distribution(cube),
+        df.groupby('Keterangan', observed=True)['Total Biaya'].agg(['sum', 'count']).sort_values('sum', ascending=False),
+    )
+    # Data mentah juga diterima (diagregasi dulu lewat as_cube)
+    assert_same(analytics.calculate_yearly_summary(df), analytics.calculate_yearly_summary(cube))
+
+# ==========================================
+# FILTER INDEX
+# ==========================================
+def test_filter_index_matches_boolean_masks(dataset):
+    index = FilterIndex(dataset)
+    rng = np.random.default_rng(7)
+    values = {col: dataset[col].unique().tolist() for col in FILTER_COLUMNS}
+    for _ in range(200):
+        filters = {}
+        for col in rng.choice(FILTER_COLUMNS, size=rng.integers(1, 4), replace=False):
+            picks = rng.choice(len(values[col]), size=rng.integers(1, 4), replace=False)
+            filters[col] = [values[col][i] for i in picks]
+        mask = np.ones(len(dataset), dtype=bool)
+        for col, selected in filters.items():
+            mask &= dataset[col].isin(selected).to_numpy()
+        np.testing.assert_array_equal(index.select(**filters), np.flatnonzero(mask))
+
+
+def test_filter_index_edge_cases(dataset):
+    index = FilterIndex(dataset)
+    assert index.select() is None
+    assert index.select(Tahun=None, Vendor_Clean=None) is None
+    assert len(index.select(Tahun=[1999])) == 0
+    assert len(index.select(Tahun=[2024], Vendor_Clean=['TIDAK ADA'])) == 0
+    # sidebar_filters: 'Semua' berarti tanpa filter vendor
+    rows = index.select(**sidebar_filters([2024], 'Semua'))
+    pd.testing.assert_frame_equal(filter_transactions(dataset, index, Tahun=[2024]), dataset[dataset['Tahun'] == 2024])
+    assert len(rows) == int((dataset['Tahun'] == 2024).sum())
+
+# ==========================================
+# LAPORAN AUDIT
+# ==========================================
+@pytest.mark.parametrize('year', [None, 2025])
+def test_audit_summary_matches_separate_aggregations(dataset, year):
+    df = dataset if year is None else dataset[dataset['Tahun'] == year]
+    cube = build_aggregate_cube(df)
+    audit = compute_audit_summary(cube)
+
+    # Nilai yang sebelumnya dihitung satu per satu di halaman Laporan Audit
+    vendor_costs = analytics.get_top_vendors(cube, None)
+    unit_costs = analytics.calculate_vehicle_efficiency(cube)['Total_Biaya']
+    category_counts = analytics.calculate_category_distribution(cube)['count'].sort_values(ascending=False, kind='stable')
+    monthly_costs = analytics.calculate_monthly_costs(cube)
+    type_avg = analytics.calculate_type_statistics(cube)['Avg_Biaya'].sort_values(ascending=False)
+
+    assert audit.total_biaya == df['Total Biaya'].sum()
+    assert audit.total_transaksi == len(df)
+    assert_same(audit.yearly_summary, analytics.calculate_yearly_summary(cube))
+    assert_same(audit.vendor_costs, vendor_costs)
+    assert_same(audit.unit_costs, unit_costs)
+    assert_same(audit.category_counts, category_counts)
+    assert_same(audit.monthly_costs, monthly_costs)
+    assert_same(audit.type_avg, type_avg)
+
+    assert audit.top_vendor == vendor_costs.index[0]
+    assert audit.top_3_vendor_pct == pytest.approx(vendor_costs.head(3).sum() / vendor_costs.sum() * 100)
+    assert audit.top_unit == (unit_costs.index[0], unit_costs.iloc[0])
+    assert audit.avg_per_unit == pytest.approx(unit_costs.mean())
+    assert audit.top_month == (monthly_costs.idxmax(), monthly_costs.max())
+    assert audit.top_type == (type_avg.index[0], type_avg.iloc[0])
+
+
+def test_audit_summary_of_empty_selection(dataset):
+    audit = compute_audit_summary(build_aggregate_cube(dataset.iloc[0:0]))
+    assert audit.total_transaksi == 0
+    assert (audit.top_vendor, audit.top_unit, audit.top_category) == ('-', (('-', '-'), 0), ('-', 0))
+    assert audit.top_3_vendor_pct == 0 and audit.avg_per_unit == 0
+
+# ==========================================
+# GRID BULANAN
+# ==========================================
+def loop_monthly_trend(df, by=None):
+    """Pengisian bulan kosong versi lama (loop + merge) sebagai pembanding."""
+    extra = [by] if by else []
+    trend = df.groupby(['Tahun', 'Month_Num', 'Bulan'] + extra, observed=True)['Total Biaya'].sum().reset_index()
+    combos = [
+        {'Tahun': y, 'Month_Num': num, 'Bulan': name, **({by: k} if by else {})}
+        for y in trend['Tahun'].unique()
+        for num, name in enumerate(MONTH_ORDER, start=1)
+        for k in (trend[by].unique() if by else [None])
+    ]
+    keys = ['Tahun', 'Month_Num', 'Bulan'] + extra
+    full = pd.DataFrame(combos).merge(trend.astype({col: object for col in ['Bulan'] + extra}), on=keys, how='left')
+    full['Total Biaya'] = full['Total Biaya'].fillna(0)
+    return full.sort_values(['Tahun', 'Month_Num'] + extra).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('year', [None, 2024])
+def test_month_grid_matches_loop_version(dataset, year):
+    df = dataset if year is None else dataset[dataset['Tahun'] == year]
+    cube = build_aggregate_cube(df)
+    expected = loop_monthly_trend(df)
+    trend = analytics.calculate_monthly_trend(cube)
+    assert len(trend) == 12 * df['Tahun'].nunique()
+    assert_same(trend[expected.columns].reset_index(drop=True), expected)
+
+    by_category = analytics.calculate_time_series(cube, by='Keterangan')
+    expected = loop_monthly_trend(df, by='Keterangan')
+    got = by_category.astype({'Keterangan': object}).sort_values(['Tahun', 'Month_Num', 'Keterangan']).reset_index(drop=True)
+    assert_same(got[expected.columns], expected)
+    assert (by_category['Date'] == analytics.month_start_dates(by_category)).all()
+
+# ==========================================
+# TIME SERIES & DOWNSAMPLING
+# ==========================================
+def random_walk(seed, n):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype='float64'), rng.normal(size=n).cumsum() + rng.normal(scale=5, size=n) * (rng.random(n) < 0.01)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_lttb_keeps_endpoints_and_returns_sorted_indices(seed):
+    x, y = random_walk(seed, 5000)
+    indices = lttb_indices(x, y, 300)
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert (np.diff(indices) > 0).all()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_minmax_keeps_endpoints_and_extremes(seed):
+    _, y = random_walk(seed, 5000)
+    indices = minmax_indices(y, 300)
+    assert len(indices) <= 300
+    assert {0, len(y) - 1, int(y.argmax()), int(y.argmin())} <= set(indices.tolist())
+    assert (np.diff(indices) > 0).all()
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_series_keeps_global_extremes(method):
+    for seed in range(20):
+        x, y = random_walk(seed, 3000)
+        frame = pd.DataFrame({'Date': pd.date_range('2020-01-01', periods=len(x), freq='D'), 'Total Biaya': y})
+        sampled = downsample_series(frame, max_points=200, method=method)
+        assert len(sampled) <= 200
+        assert sampled['Total Biaya'].max() == y.max() and sampled['Total Biaya'].min() == y.min()
+        assert sampled['Date'].iloc[0] == frame['Date'].iloc[0] and sampled['Date'].iloc[-1] == frame['Date'].iloc[-1]
+    assert len(downsample_series(frame.head(100), max_points=200)) == 100
+
+
+def test_lttb_small_inputs_are_returned_whole():
+    x, y = random_walk(0, 10)
+    np.testing.assert_array_equal(lttb_indices(x, y, 20), np.arange(10))
+    np.testing.assert_array_equal(minmax_indices(y, 3), np.arange(10))
+
+
+def test_weekly_and_daily_series_fill_gaps():
+    df = pd.DataFrame({
+        'Tanggal': pd.to_datetime(['2024-01-01', '2024-01-03', '2024-01-22', None]),
+        'Total Biaya': [100, 200, 400, 800],
+        'Keterangan': pd.Categorical(['A', 'B', 'A', 'A']),
+    })
+    weekly = calculate_time_series(df, 'Mingguan')
+    assert weekly['Date'].tolist() == list(pd.date_range('2024-01-01', '2024-01-22', freq='7D'))
+    assert weekly['Total Biaya'].tolist() == [300, 0, 0, 400]
+
+    daily = calculate_time_series(df, 'Harian', date_range=('2024-01-02', '2024-01-21'))
+    assert daily['Date'].tolist() == list(pd.date_range('2024-01-03', '2024-01-03'))
+    assert daily['Total Biaya'].tolist() == [200]
+
+    by_category = calculate_time_series(df, 'Mingguan', by='Keterangan')
+    assert len(by_category) == 4 * 2 and by_category['Total Biaya'].sum() == 700
+
+# ==========================================
+# WORKBOOK
+# ==========================================
+def read_workbook(content):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(content), read_only=True)
+    return {ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in workbook.worksheets}
+
+
+@pytest.mark.parametrize('writer', ['xlsxwriter', 'openpyxl'])
+@pytest.mark.parametrize('constant_memory', [True, False])
+def test_audit_workbook_sheets(dataset, monkeypatch, writer, constant_memory):
+    if writer == 'openpyxl':
+        monkeypatch.setattr(analytics, 'xlsxwriter', None)
+    rows = np.flatnonzero((dataset['Tahun'] == 2025).to_numpy())
+    cube = build_aggregate_cube(dataset.take(rows))
+    audit = compute_audit_summary(cube)
+    sheets = read_workbook(write_workbook(analytics.audit_sheets(audit, cube, dataset, rows), constant_memory))
+
+    assert list(sheets) == ['Ringkasan', 'Vendor', 'Kendaraan', 'Tipe', 'Kategori', 'Bulanan', 'Transaksi']
+    assert sheets['Ringkasan'] == [
+        ['Tahun', 'Total_Pengeluaran', 'Rata_Rata', 'Jumlah_Transaksi'],
+        [2025] + audit.yearly_summary.loc[2025].tolist(),
+    ]
+    vendors = sheets['Vendor']
+    assert vendors[0] == ['Vendor', 'Total_Biaya', 'Transaksi']
+    assert [row[0] for row in vendors[1:]] == audit.vendor_costs.index.astype(str).tolist()
+    assert sum(row[2] for row in vendors[1:]) == len(rows)
+    assert len(sheets['Bulanan']) == 1 + 12
+
+    transactions = sheets['Transaksi']
+    assert transactions[0] == TRANSACTION_COLUMNS
+    assert len(transactions) == 1 + len(rows)
+    expected = dataset.take(rows)[TRANSACTION_COLUMNS]
+    assert [row[2] for row in transactions[1:]] == expected['Nopol'].astype(str).tolist()
+    assert sum(row[-1] for row in transactions[1:]) == expected['Total Biaya'].sum()
+
+
+def test_oversized_sheet_is_split(monkeypatch):
+    monkeypatch.setattr(analytics, 'EXCEL_MAX_ROWS', 5)
+    rows = [(i, f"baris {i}") for i in range(10)]
+    sheets = read_workbook(write_workbook([('Data', ['No', 'Isi'], iter(rows)), ('Kosong', ['No'], iter([]))]))
+    assert list(sheets) == ['Data', 'Data (2)', 'Data (3)', 'Kosong']
+    assert [len(body) for body in sheets.values()] == [5, 5, 3, 1]
+    assert [row[0] for name in ('Data', 'Data (2)', 'Data (3)') for row in sheets[name][1:]] == list(range(10))
@@ -0,0 +1,125 @@
+"""Uji API JSON lewat HTTP sungguhan (serve_in_background di port bebas + urllib)."""
+import json
+import os
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import pytest
+
+import api
+import cleaning
+from cleaning import DEFAULT_DATA_FILE, load_dataset_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        # Cache Feather hasil load ditulis ke folder sementara, bukan .cache/ milik repo.
+        mp.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path_factory.mktemp('cache')))
+        engine = api.make_standalone_engine(DATA_FILE)
+        srv = api.serve_in_background(port=0, engine=engine)
+        srv.engine = engine
+        yield srv
+        srv.shutdown()
+        srv.server_close()
+
+
+def get(server, path):
+    """(status, body JSON) untuk GET path di server uji."""
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_health_and_filters(server):
+    status, health = get(server, '/api/health')
+    assert status == 200
+    assert health['status'] == 'ok' and health['rows'] > 0 and health['fingerprint']
+
+    status, filters = get(server, '/api/filters')
+    assert status == 200
+    assert filters['tahun'] == sorted(filters['tahun']) and filters['tahun']
+    assert filters['vendor'] == sorted(filters['vendor']) and filters['vendor']
+
+
+@pytest.mark.parametrize('path', sorted(api.ENDPOINTS))
+def test_every_endpoint(server, path):
+    status, body = get(server, path)
+    assert status == 200
+    assert body['filters']['vendor'] == 'Semua'
+    assert isinstance(body['data'], list) and body['data']
+
+
+def test_filters_are_applied(server):
+    _, filters = get(server, '/api/filters')
+    year, vendor = filters['tahun'][-1], filters['vendor'][0]
+
+    status, body = get(server, f"/api/yearly-summary?tahun={year}&vendor={quote(vendor)}")
+    assert status == 200
+    assert body['filters'] == {'tahun': [year], 'vendor': vendor}
+    assert [row['Tahun'] for row in body['data']] in ([year], [])
+
+    status, body = get(server, '/api/top-vendors?n=3')
+    assert status == 200 and len(body['data']) == 3
+
+
+@pytest.mark.parametrize('query', ['tahun=abc', 'tahun=1999', 'n=0', 'n=x'])
+def test_bad_request(server, query):
+    status, body = get(server, f"/api/top-vendors?{query}")
+    assert status == 400
+    assert body['error']
+
+
+@pytest.mark.parametrize('path', [
+    '/api/tidak-ada',
+    '/api/top-units?vendor=VENDOR%20FIKTIF',
+    '/api/health?fingerprint=tidak-ada',
+])
+def test_not_found(server, path):
+    status, body = get(server, path)
+    assert status == 404
+    assert body['error']
+
+
+def test_dataset_by_fingerprint(server, tmp_path):
+    # Dataset kedua (mis. hasil upload) di store bersama dipilih lewat ?fingerprint=.
+    subset = tmp_path / 'subset.csv'
+    with open(DATA_FILE, encoding='utf-8') as src:
+        subset.write_text(''.join(line for _, line in zip(range(201), src)), encoding='utf-8')
+    df, error = load_dataset_file(server.engine.get_dataset_store(), str(subset))
+    assert error is None
+    fingerprint = df.attrs['fingerprint']
+
+    _, listing = get(server, '/api/datasets')
+    assert fingerprint in [item['fingerprint'] for item in listing['datasets']]
+
+    status, health = get(server, f"/api/health?fingerprint={fingerprint}")
+    assert status == 200
+    assert health['fingerprint'] == fingerprint and health['rows'] == len(df)
+    _, default = get(server, '/api/health')
+    assert default['fingerprint'] != fingerprint
+
+
+def test_concurrent_requests(server):
+    # Server baru dengan cache kosong: permintaan serentak pertama ikut menguji single-flight memo.
+    cold = api.serve_in_background(port=0, engine=api.make_standalone_engine(DATA_FILE))
+    paths = sorted(api.ENDPOINTS) + ['/api/health', '/api/filters']
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda path: (path, get(cold, path)), paths * 8))
+    finally:
+        cold.shutdown()
+        cold.server_close()
+
+    expected = {path: get(server, path) for path in paths}
+    assert len(results) == len(paths) * 8
+    for path, result in results:
+        assert result == expected[path]
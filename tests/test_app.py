@@ -0,0 +1,310 @@
+"""Uji komponen dashboard app.py (fungsi murni dan AppTest untuk widget)."""
+import base64
+import contextlib
+import functools
+import io
+import json
+import logging
+import os
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import analytics
+import app
+import cleaning
+from cleaning import DEFAULT_DATA_FILE, load_and_process_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path_factory.mktemp('cache')))
+        df, error = load_and_process_data(DATA_FILE)
+    assert error is None
+    return df
+
+# ==========================================
+# TABEL BERHALAMAN
+# ==========================================
+@pytest.mark.parametrize('ascending', [True, False])
+def test_sort_positions_is_stable(ascending):
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame({
+        'Total Biaya': rng.integers(0, 20, 500),
+        'Keterangan': pd.Categorical(rng.choice(['RUSAK RINGAN', 'RUSAK BERAT', 'SERVIS'], 500)),
+    })
+    for col in frame.columns:
+        expected = frame.sort_values(col, ascending=ascending, kind='stable').index.to_numpy()
+        np.testing.assert_array_equal(app.sort_positions(frame[col], ascending), expected)
+
+
+def paginated_table_script():
+    import numpy as np
+    import pandas as pd
+
+    from app import render_paginated_table
+
+    data = pd.DataFrame({'Nopol': [f"L {i} AB" for i in range(120)], 'Total Biaya': np.arange(120) * 1000})
+    rows = np.arange(0, 120, 2)  # hanya baris genap yang lolos filter
+    render_paginated_table(data, 'uji', rows=rows, formatters={'Total Biaya': 'Rp {:,.0f}'}, page_sizes=[25, 50])
+
+
+def table_html(at):
+    return next(m.value for m in at.markdown if 'theme-html-table' in m.value)
+
+
+def test_paginated_table_pages_and_sorts_selected_rows():
+    at = AppTest.from_function(paginated_table_script).run()
+    assert not at.exception
+    assert at.caption[0].value == "Baris 1–50 dari 60 · Halaman 1 dari 2"
+    html = table_html(at)
+    assert 'L 0 AB' in html and 'L 98 AB' in html and 'L 1 AB' not in html and 'L 100 AB' not in html
+    assert 'Rp 98,000' in html
+
+    at.number_input(key='uji_page').set_value(2).run()
+    assert at.caption[0].value == "Baris 51–60 dari 60 · Halaman 2 dari 2"
+    assert 'L 118 AB' in table_html(at)
+
+    at.selectbox(key='uji_sort').set_value('Total Biaya').run()
+    at.selectbox(key='uji_dir').set_value('Turun').run()
+    html = table_html(at)
+    assert 'L 18 AB' in html and 'L 20 AB' not in html and 'L 118 AB' not in html
+
+    # Halaman aktif dijepit saat ukuran halaman membuat jumlah halaman berkurang
+    at.selectbox(key='uji_size').set_value(25).run()
+    at.number_input(key='uji_page').set_value(3).run()
+    assert at.caption[0].value.endswith("Halaman 3 dari 3")
+    at.selectbox(key='uji_size').set_value(50).run()
+    assert at.caption[0].value.endswith("Halaman 2 dari 2")
+
+# ==========================================
+# CACHE FIGURE
+# ==========================================
+def test_figure_spec_cached_per_key_and_theme():
+    import plotly.graph_objects as go
+
+    app.get_figure_cache().clear()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return go.Figure(go.Bar(x=['A', 'B'], y=[1, 2]))
+
+    dark, light = app.get_theme_tokens("Gelap"), app.get_theme_tokens("Terang")
+    spec = app.get_figure_spec(build, ('fp', 'uji'), dark)
+    assert app.get_figure_spec(build, ('fp', 'uji'), dark) is spec
+    assert len(builds) == 1
+
+    layout = json.loads(spec)['layout']
+    assert layout['font']['color'] == dark['plot_text'] and layout['height'] == 450
+    assert json.loads(app.get_figure_spec(build, ('fp', 'uji'), light))['layout']['font']['color'] == light['plot_text']
+    app.get_figure_spec(build, ('fp', 'lain'), dark)
+    app.get_figure_spec(build, ('fp', 'uji'), dark, height=300)
+    assert len(builds) == 4
+
+    assert app.get_figure_spec(lambda: None, ('fp', 'kosong'), dark) is None
+
+# ==========================================
+# SCATTER KENDARAAN
+# ==========================================
+def test_webgl_scatter_matches_svg_scatter(dataset):
+    svg = app.create_scatter_plot(dataset, webgl_threshold=10**9)
+    webgl = app.create_scatter_plot(dataset, webgl_threshold=0)
+    assert {trace.type for trace in webgl.data} == {'scattergl'}
+    assert [trace.name for trace in webgl.data] == [trace.name for trace in svg.data]
+    for gl_trace, svg_trace in zip(webgl.data, svg.data):
+        assert gl_trace.marker.color == svg_trace.marker.color
+        np.testing.assert_array_equal(gl_trace.x, svg_trace.x)
+        np.testing.assert_array_equal(gl_trace.y, svg_trace.y)
+        assert [row[0] for row in gl_trace.customdata] == [row[0] for row in svg_trace.customdata]
+
+
+def test_density_scatter_bins_every_vehicle(dataset, monkeypatch):
+    monkeypatch.setattr(app, 'SCATTER_DENSITY_POINTS', 50)
+    fig = app.create_scatter_plot(dataset, density=True)
+    heatmap, points = fig.data
+    assert heatmap.type == 'heatmap' and points.type == 'scattergl'
+    assert np.nansum(np.asarray(heatmap.z, dtype='float64')) == dataset['Nopol'].nunique()
+
+    per_vehicle = dataset.groupby('Nopol', observed=True)['Total Biaya'].sum()
+    assert len(points.x) == 50 and min(points.y) == per_vehicle.nlargest(50).min()
+
+    # Frekuensi servis bilangan bulat: setiap bin x mencakup rentang bulat yang tidak tumpang tindih
+    labels = [row[0] for row in heatmap.customdata[0]]
+    bounds = [tuple(map(int, label.split('–'))) if '–' in label else (int(label),) * 2 for label in labels]
+    assert all(low <= high for low, high in bounds)
+    assert all(prev[1] + 1 == cur[0] for prev, cur in zip(bounds, bounds[1:]))
+
+# ==========================================
+# HALAMAN (APPTEST)
+# ==========================================
+@pytest.fixture
+def dashboard(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=120).run()
+    assert not at.exception
+    return at
+
+
+def open_page(at, page):
+    at.sidebar.radio[0].set_value(page).run()
+    assert not at.exception, [e.value for e in at.exception]
+    assert not at.error, [e.value for e in at.error]
+    return at
+
+
+def test_analisis_detail_renders_only_open_tab(dashboard):
+    at = open_page(dashboard, "Analisis Detail")
+    assert [len(tab.children) > 0 for tab in at.tabs] == [True, False, False, False]
+
+    at.session_state['analisis_tab'] = at.tabs[2].label
+    at.run()
+    assert not at.exception
+    assert [len(tab.children) > 0 for tab in at.tabs] == [False, False, True, False]
+
+
+@pytest.mark.parametrize('page', ["Dashboard Utama", "Analisis Detail", "Detail Transaksi", "Laporan Audit", "Tentang Kami"])
+def test_every_page_renders(dashboard, page):
+    open_page(dashboard, page)
+
+
+def test_transaction_explorer_filters(dashboard):
+    at = open_page(dashboard, "Detail Transaksi")
+    total = next(m.value for m in at.markdown if 'baris data' in m.value)
+    vendor = at.multiselect[0]
+    vendor.set_value([vendor.options[0]]).run()
+    assert not at.exception
+    filtered = next(m.value for m in at.markdown if 'baris data' in m.value)
+    assert filtered != total
+    assert at.caption[0].value.startswith("Baris 1–")
+
+# ==========================================
+# ASET & CSS
+# ==========================================
+@pytest.mark.parametrize('name', ['ITS.png', 'SBY.png', 'bpkad.png'])
+def test_logo_data_uri_is_cached_and_not_larger(name):
+    path = os.path.join(ROOT, name)
+    uri = app.get_image_data_uri(path)
+    assert app.get_image_data_uri(path) is uri
+
+    header, payload = uri.split(',', 1)
+    assert header in ('data:image/png;base64', 'data:image/webp;base64')
+    data = base64.b64decode(payload)
+    assert len(data) <= os.path.getsize(path)
+    if app.Image is not None:
+        app.Image.open(io.BytesIO(data)).verify()
+
+
+def test_missing_logo_returns_none(tmp_path):
+    assert app.get_image_data_uri(str(tmp_path / 'tidak-ada.png')) is None
+
+
+def test_stylesheet_built_once_per_theme():
+    dark = app.build_custom_css("Gelap")
+    assert app.build_custom_css("Gelap") is dark
+    assert app.get_theme_tokens("Gelap")['app_bg'] in dark
+    assert app.build_custom_css("Terang") != dark
+
+# ==========================================
+# EXPORT
+# ==========================================
+@pytest.mark.parametrize('fmt', list(app.EXPORT_FORMATS))
+def test_export_matches_selected_rows(dataset, fmt, monkeypatch):
+    # Potongan kecil supaya file terdiri dari beberapa potongan / row group
+    monkeypatch.setattr(app, 'iter_row_chunks', functools.partial(analytics.iter_row_chunks, chunk_rows=100))
+    rows = np.flatnonzero((dataset['Tahun'] == 2024).to_numpy())
+    columns = ['Tahun', 'Bulan', 'Nopol', 'Vendor_Clean', 'Total Biaya']
+    _, _, export = app.EXPORT_FORMATS[fmt]
+    content = export(dataset, rows, columns)
+
+    if fmt == 'Parquet':
+        result = pd.read_parquet(io.BytesIO(content))
+    else:
+        result = pd.read_csv(io.BytesIO(content), compression='gzip' if 'gzip' in fmt else None)
+    expected = dataset.take(rows)[columns].reset_index(drop=True)
+    assert len(result) == len(rows)
+    assert result['Nopol'].astype(str).tolist() == expected['Nopol'].astype(str).tolist()
+    assert result['Total Biaya'].tolist() == expected['Total Biaya'].tolist()
+
+
+def test_export_of_empty_selection_keeps_header(dataset):
+    content = app.export_csv(dataset, np.empty(0, dtype=np.intp), ['Nopol', 'Total Biaya'])
+    assert content.decode('utf-8').strip() == 'Nopol,Total Biaya'
+
+# ==========================================
+# WARM-UP
+# ==========================================
+@contextlib.contextmanager
+def script_context_warnings():
+    """Kumpulkan peringatan 'missing ScriptRunContext' (logger ini tidak propagate ke root)."""
+    messages = []
+    handler = logging.Handler()
+    handler.emit = lambda record: messages.append(record.getMessage())
+    logger = logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context')
+    logger.addHandler(handler)
+    try:
+        yield messages
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_warm_up_fills_shared_caches_without_script_context(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    with script_context_warnings() as messages:
+        store, memo = analytics.AggregateMemo(), analytics.AggregateMemo()
+        resources, figures = analytics.AggregateMemo(), analytics.AggregateMemo()
+        status = app.WarmupStatus()
+        thread = app.threading.Thread(target=app.warm_up_caches, args=(status, store, memo, resources, figures))
+        thread.start()
+        thread.join(timeout=60)
+
+    assert status.done.is_set() and status.error is None, status.error
+    assert list(status.steps) == ['dataset', 'cube & index', 'agregat', 'grafik']
+    assert not [m for m in messages if 'ScriptRunContext' in m]
+
+    # Kunci cache sama dengan yang dipakai main(): run berikutnya tinggal hit
+    df, _ = app.load_default_data(store=store)
+    fingerprint = analytics.dataset_fingerprint(df)
+    hits = resources.hits
+    assert app.get_aggregate_cube(df, fingerprint, resources) is app.get_aggregate_cube(df, fingerprint, resources)
+    assert resources.hits == hits + 2
+    assert memo.stats()['entries'] >= len(app.WARMUP_AGGREGATES)
+    assert figures.stats()['entries'] == len(app.DASHBOARD_FIGURES)
+
+# ==========================================
+# API DALAM PROSES
+# ==========================================
+def test_in_process_api_uses_shared_caches(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    server = app.start_api_server('127.0.0.1', 0)
+    try:
+        engine = server.api.engine
+        assert sorted(vars(engine)) == [
+            'get_aggregate_cube', 'get_aggregate_memo', 'get_dataset_store', 'get_filter_index', 'load_default_data',
+        ]
+        assert engine.get_dataset_store() is app.get_dataset_store()
+        assert engine.get_aggregate_memo() is app.get_aggregate_memo()
+
+        # Thread HTTP hanya memakai objek cache, tanpa memanggil getter cache_resource
+        with script_context_warnings() as messages:
+            url = f"http://127.0.0.1:{server.server_address[1]}/api/yearly-summary"
+            with urllib.request.urlopen(url, timeout=30) as response:
+                assert response.status == 200 and json.loads(response.read())['data']
+        assert not [m for m in messages if 'ScriptRunContext' in m]
+
+        df, _ = app.load_default_data()
+        fingerprint = analytics.dataset_fingerprint(df)
+        assert app.get_resource_cache().get(('cube', fingerprint), pytest.fail) is not None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,70 @@
+"""Uji generator laporan batch (batch_report.py)."""
+import os
+
+import pandas as pd
+import pytest
+
+import batch_report
+import cleaning
+from cleaning import DEFAULT_DATA_FILE, load_and_process_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Cache Feather ditulis ke folder sementara, bukan .cache/ milik repo.
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+
+# ==========================================
+# RENCANA TUGAS
+# ==========================================
+def test_plan_tasks_resolves_file_name_collisions(tmp_path):
+    df = pd.DataFrame({
+        'Tahun': [2024, 2024, 2024, 2024, 2024, 2025],
+        'Vendor_Clean': ['CV. A/B', 'CV. A B', 'cv. a b', 'CV._A_B_2', '///', 'CV. LAIN'],
+        'Nopol': ['L 1 A', 'L 2 B', 'L 3 C', 'L 4 D', 'L 5 E', 'L 6 F'],
+    })
+    tasks = batch_report.plan_tasks(df, ['vendor', 'kendaraan'], str(tmp_path), ['xlsx'], {'Tahun': [2024]})
+
+    vendor_paths = [path for kind, _, path, _, _ in tasks if kind == 'vendor']
+    names = [os.path.basename(path) for path in vendor_paths]
+    # Unik tanpa membedakan huruf besar/kecil (sistem file Windows/macOS)
+    assert len({name.lower() for name in names}) == len(names) == 5
+    assert set(names) == {'tanpa_nama', 'CV._A_B', 'CV._A_B_2', 'CV._A_B_2_2', 'cv._a_b_3'}
+    assert all(os.path.dirname(path) == str(tmp_path / 'vendor') for path in vendor_paths)
+
+    # Filter tahun ikut membatasi nilai yang dilaporkan
+    assert 'CV. LAIN' not in {value for _, value, *_ in tasks}
+    assert sum(kind == 'kendaraan' for kind, *_ in tasks) == 5
+    assert os.path.isdir(tmp_path / 'kendaraan')
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+@pytest.mark.parametrize('workers', [1, 2])
+def test_run_writes_one_report_per_vendor(tmp_path, workers):
+    output = tmp_path / 'laporan'
+    code = batch_report.main([
+        '--dataset', DATA_FILE, '--by', 'vendor', '--year', '2025',
+        '--format', 'xlsx', 'html', '--workers', str(workers), '--output', str(output),
+    ])
+    assert code == 0
+
+    df, _ = load_and_process_data(DATA_FILE)
+    vendors = df.loc[df['Tahun'] == 2025, 'Vendor_Clean'].astype(str).unique()
+    files = sorted(os.listdir(output / 'vendor'))
+    assert len(files) == 2 * len(vendors)
+
+    name = batch_report.safe_file_name(vendors[0])
+    sheets = pd.read_excel(output / 'vendor' / f"{name}.xlsx", sheet_name=None)
+    assert list(sheets) == ['Ringkasan', 'Kendaraan', 'Bulanan', 'Kategori', 'Transaksi']
+    expected = df[(df['Tahun'] == 2025) & (df['Vendor_Clean'] == vendors[0])]
+    assert len(sheets['Transaksi']) == len(expected)
+    assert sheets['Transaksi']['Total Biaya'].sum() == expected['Total Biaya'].sum()
+    assert (sheets['Ringkasan']['Tahun'] == 2025).all()
+
+    with open(output / 'vendor' / f"{name}.html", encoding='utf-8') as f:
+        page = f.read()
+    assert page.count('<table') == 5 and 'Rp ' in page
@@ -0,0 +1,180 @@
+"""Uji pemuatan dan pembersihan dataset di cleaning.py."""
+import io
+import os
+
+import pandas as pd
+import pytest
+
+import cleaning
+from analytics import AggregateMemo, FilterIndex, filter_transactions, take_rows
+from cleaning import (
+    COMPACT_SCHEMA,
+    DEFAULT_DATA_FILE,
+    apply_compact_schema,
+    build_memory_report,
+    clean_transactions,
+    load_and_process_data,
+    load_csv_streaming,
+    load_dataset_file,
+    normalize_vehicle_type,
+    read_source_csv,
+)
+from formatting import format_with_pattern
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Cache Feather ditulis ke folder sementara, bukan .cache/ milik repo.
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+# ==========================================
+# DATASET BERSAMA
+# ==========================================
+def test_copy_on_write_enabled():
+    if int(pd.__version__.split('.')[0]) < 3:
+        assert pd.options.mode.copy_on_write is True
+
+
+def test_session_views_do_not_touch_shared_dataset():
+    store = AggregateMemo()
+    shared, error = load_dataset_file(store, DATA_FILE)
+    assert error is None
+    snapshot = shared.copy(deep=True)
+
+    # Tampilan per sesi: baris terfilter lewat take, lalu diubah di tempat
+    view = filter_transactions(shared, FilterIndex(shared), Tahun=[2024])
+    view['Total Biaya'] = view['Total Biaya'] * 2
+    view.loc[view.index[:5], 'Keterangan'] = view['Keterangan'].iloc[-1]
+
+    # Pola render_theme_table: salinan dangkal lalu kolom diformat
+    styled = take_rows(shared, None).copy(deep=False)
+    styled['Total Biaya'] = format_with_pattern(styled['Total Biaya'].to_numpy(), 'Rp {:,.0f}')
+    nopol = styled['Nopol']
+    nopol.iloc[0] = nopol.iloc[1]
+
+    pd.testing.assert_frame_equal(shared, snapshot)
+    again, _ = load_dataset_file(store, DATA_FILE)
+    assert again is shared
+
+# ==========================================
+# CACHE KOLUMNAR
+# ==========================================
+def test_cleaned_dataset_is_cached_on_disk(cache_dir, monkeypatch):
+    first, error = load_and_process_data(DATA_FILE)
+    assert error is None
+    cache_key = first.attrs['fingerprint']
+    assert os.path.exists(cleaning.get_cache_path(cache_key))
+    assert first.attrs['memory_report']['baris'] == len(first)
+
+    # Load kedua dibaca dari cache, CSV tidak di-parse lagi
+    with monkeypatch.context() as m:
+        m.setattr(cleaning, 'read_source_csv', lambda *_: pytest.fail("CSV dibaca ulang"))
+        cached, error = load_and_process_data(DATA_FILE)
+    assert error is None
+    assert cached.attrs['fingerprint'] == cache_key
+    pd.testing.assert_frame_equal(cached, first)
+
+    # Opsi pembersihan lain = entri cache lain
+    specific, _ = load_and_process_data(DATA_FILE, prefer_specific_type=True)
+    assert specific.attrs['fingerprint'] != cache_key
+
+
+def test_corrupt_cache_is_rebuilt(cache_dir):
+    first, _ = load_and_process_data(DATA_FILE)
+    with open(cleaning.get_cache_path(first.attrs['fingerprint']), 'wb') as f:
+        f.write(b'bukan arrow')
+    rebuilt, error = load_and_process_data(DATA_FILE)
+    assert error is None
+    pd.testing.assert_frame_equal(rebuilt, first)
+
+# ==========================================
+# NORMALISASI TYPE
+# ==========================================
+def type_frame():
+    return pd.DataFrame({
+        'Nopol': ['L 1 A', 'L 1 A', 'L 1 A', 'L 1 A', 'L 2 B', 'L 2 B', 'L 2 B', 'L 3 C'],
+        'Type': ['PICK UP', 'AVANZA', 'AVANZA', 'PICK UP', 'OTHER', 'OTHER', 'HILUX', None],
+    })
+
+
+def test_normalize_vehicle_type_ties_and_unknown():
+    result = normalize_vehicle_type(type_frame())
+    # Seri 2-2 dipecah alfabetis; Nopol tanpa Type sama sekali -> UNKNOWN
+    assert result.tolist() == ['AVANZA'] * 4 + ['OTHER'] * 3 + ['UNKNOWN']
+
+
+def test_normalize_vehicle_type_prefers_specific_types():
+    result = normalize_vehicle_type(type_frame(), prefer_specific=True)
+    assert result.tolist() == ['AVANZA'] * 4 + ['HILUX'] * 3 + ['UNKNOWN']
+
+
+def test_normalize_vehicle_type_categorical_matches_object():
+    df = type_frame()
+    expected = normalize_vehicle_type(df, prefer_specific=True)
+    categorical = normalize_vehicle_type(df.astype({'Nopol': 'category'}), prefer_specific=True)
+    assert isinstance(categorical.dtype, pd.CategoricalDtype)
+    assert categorical.astype(str).tolist() == expected.tolist()
+
+
+def test_normalize_vehicle_type_matches_groupby_mode():
+    df, error = clean_transactions(read_source_csv(DATA_FILE))
+    assert error is None
+    expected = df.groupby('Nopol')['Type'].transform(lambda x: x.mode()[0] if not x.mode().empty else "UNKNOWN")
+    pd.testing.assert_series_equal(normalize_vehicle_type(df), expected, check_names=False)
+
+# ==========================================
+# SKEMA RINGKAS
+# ==========================================
+def test_compact_schema_keeps_values_and_saves_memory():
+    raw, _ = clean_transactions(read_source_csv(DATA_FILE))
+    raw['Type'] = normalize_vehicle_type(raw)
+    compact = apply_compact_schema(raw.copy(), keep_columns=['Vendor'])
+
+    assert compact['Bulan'].dtype == COMPACT_SCHEMA['Bulan']
+    assert compact['Tahun'].dtype == 'int16' and compact['Month_Num'].dtype == 'int8'
+    assert compact['Total Biaya'].dtype == 'int64'
+    for col in ['Nopol', 'Type', 'Vendor_Clean', 'Keterangan']:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype)
+    # Kolom mentah lain dibuang kecuali disebut di keep_columns
+    assert 'Vendor' in compact.columns and 'Vendor_TextMining' not in compact.columns
+
+    for col in ['Bulan', 'Nopol', 'Type', 'Vendor_Clean', 'Keterangan']:
+        assert compact[col].astype(str).tolist() == raw[col].astype(str).tolist()
+    assert (compact['Total Biaya'] == raw['Total Biaya'].round()).all()
+
+    report = build_memory_report(raw, compact)
+    assert sum(report['sesudah'].values()) < sum(report['sebelum'].values()) / 2
+
+# ==========================================
+# STREAMING
+# ==========================================
+def as_plain(df):
+    return df.reset_index(drop=True).astype({col: str for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+@pytest.mark.parametrize('chunk_rows', [97, 1000, 100_000])
+def test_streaming_matches_full_load(chunk_rows):
+    expected, error = load_and_process_data(DATA_FILE)
+    assert error is None
+
+    # File diulang dua kali: semua baris salinan jatuh di chunk lain dan harus dibuang
+    with open(DATA_FILE, 'rb') as f:
+        content = f.read()
+    body = content.split(b'\n', 1)[1]
+    source = io.BytesIO(content.rstrip(b'\n') + b'\n' + body)
+    source.size = len(source.getvalue())  # seperti UploadedFile, untuk progres
+    progress = []
+
+    df, error = load_csv_streaming(source, chunk_rows=chunk_rows, on_progress=progress.append)
+    assert error is None
+    pd.testing.assert_frame_equal(as_plain(df), as_plain(expected), check_like=True)
+    assert progress and progress[-1] == 1.0
+
+
+def test_streaming_reports_missing_columns():
+    df, error = load_csv_streaming(io.BytesIO(b'Bulan;Tahun\nJanuari;2024\n'))
+    assert df is None and error.startswith('Data tidak valid')
@@ -0,0 +1,116 @@
+"""Uji ETL (etl.py) terhadap dataset bersih yang dihasilkan notebook."""
+import glob
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cleaning
+import etl
+from cleaning import DEFAULT_DATA_FILE, load_and_process_data, read_source_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(ROOT, DEFAULT_DATA_FILE)
+YEARLY_FILES = sorted(glob.glob(os.path.join(ROOT, etl.YEARLY_FILE_PATTERN)))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    # etl.py mengimpor DATA_CACHE_DIR langsung, jadi kedua modul diarahkan ke tmp.
+    path = str(tmp_path / 'cache')
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', path)
+    monkeypatch.setattr(etl, 'DATA_CACHE_DIR', path)
+    return path
+
+
+def read_notebook_output():
+    df = read_source_csv(DATA_FILE)
+    df.columns = df.columns.str.strip()
+    return df
+
+# ==========================================
+# TRANSFORM
+# ==========================================
+def test_transform_matches_notebook_output():
+    notebook = read_notebook_output()
+    out = etl.transform(etl.load_sources(YEARLY_FILES), known_vendors=etl.vendor_reference(notebook))
+
+    # Kolom hasil = kolom notebook tanpa kolom perantara Vendor_TextMining
+    assert list(out.columns) == [col for col in notebook.columns if col != 'Vendor_TextMining']
+
+    key = ['Bulan', 'Tahun', 'Nopol', 'Total Biaya', 'Vendor']
+    merged = out.merge(notebook.drop_duplicates(key), on=key, how='left', suffixes=('', '_notebook'), indicator=True)
+    found = merged[merged['_merge'] == 'both']
+    # Beberapa baris file tahunan lebih baru dari dataset notebook
+    assert len(found) >= 0.99 * len(out)
+    assert (found['Vendor_Clean'] == found['Vendor_Clean_notebook']).all()
+    assert (found['Keterangan'] == found['Keterangan_notebook']).all()
+
+
+def test_group_vendor_names_blocks_match_single_block(monkeypatch):
+    names = etl.normalize_vendor_names(read_notebook_output()['Vendor']).drop_duplicates().reset_index(drop=True)
+    counts = np.arange(len(names))[::-1]
+    expected = etl.group_vendor_names(names, counts)
+    monkeypatch.setattr(etl, 'VENDOR_BLOCK_CELLS', 1)
+    np.testing.assert_array_equal(etl.group_vendor_names(names, counts), expected)
+
+# ==========================================
+# APPEND
+# ==========================================
+def test_append_is_idempotent(tmp_path, cache_dir, monkeypatch):
+    dataset = str(tmp_path / 'dataset.csv')
+    shutil.copyfile(DATA_FILE, dataset)
+    load_and_process_data(dataset)  # cache Feather lama yang harus ikut diperbarui
+
+    added, skipped, updated = etl.append_to_dataset([YEARLY_FILES[-1]], dataset)
+    assert added > 0 and skipped > 0 and updated == 1
+    appended, error = load_and_process_data(dataset)
+    assert error is None
+
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', str(tmp_path / 'fresh'))
+    fresh, _ = load_and_process_data(dataset)
+    pd.testing.assert_frame_equal(appended, fresh)
+
+    monkeypatch.setattr(cleaning, 'DATA_CACHE_DIR', cache_dir)
+    assert etl.append_to_dataset([YEARLY_FILES[-1]], dataset)[0] == 0
+    assert len(read_source_csv(dataset)) == len(read_notebook_output()) + added
+
+
+def write_yearly_file(path, rows):
+    header = 'Bulan;Vendor;Jenis Kendaraan;Type;Nopol;Total Biaya;Keterangan'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join([header] + [';'.join(row) for row in rows]) + '\n')
+
+
+def test_append_new_file_updates_both_caches_and_keeps_vendor_labels(tmp_path, cache_dir):
+    dataset = str(tmp_path / 'dataset.csv')
+    shutil.copyfile(DATA_FILE, dataset)
+    load_and_process_data(dataset)
+    load_and_process_data(dataset, prefer_specific_type=True)
+
+    new_file = str(tmp_path / 'Pemeliharaan Kendaraan 2026.csv')
+    write_yearly_file(new_file, [
+        ('Januari', 'PT. ASTRA INTERNATIONAL TOYOTA CABANG  BASUKI RAHMAT', 'Mini Bus', 'Innova', 'L 1929 BP', '1.250.000', 'Rusak Ringan'),
+        ('Januari', 'PT ASTRA INTERNASIONAL TOYOTA CAB. BASUKI RAHMAT', 'Mini Bus', 'Innova', 'L 1929 BP', '2.500.000', 'Rusak Berat'),
+    ])
+    added, skipped, updated = etl.append_to_dataset([new_file], dataset)
+    assert (added, skipped, updated) == (2, 0, 2)
+
+    df, _ = load_and_process_data(dataset)
+    new_rows = df[df['Tahun'] == 2026]
+    assert new_rows['Vendor_Clean'].astype(str).tolist() == ['PT. ASTRA INTERNATIONAL TOYOTA (BASUKI RAHMAT)'] * 2
+    assert new_rows['Total Biaya'].tolist() == [1250000, 2500000]
+
+
+def test_key_index_is_rebuilt_after_external_edit(tmp_path, cache_dir):
+    dataset = str(tmp_path / 'dataset.csv')
+    shutil.copyfile(DATA_FILE, dataset)
+    rows = etl.load_key_index(dataset)['rows']
+
+    with open(dataset, 'a', encoding='utf-8') as f:
+        f.write('Agustus;CV. BARU;AVANZA;1500000;RUSAK RINGAN;L 9 ZZ;2026;CV. BARU;CV. BARU\n')
+    index = etl.load_key_index(dataset)
+    assert index['rows'] == rows + 1
+    assert index['digest'] == cleaning.get_source_digest(dataset)
@@ -0,0 +1,76 @@
+"""Uji formatter tervektorisasi: hasil harus byte-identical dengan format Python per nilai."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from formatting import (
+    format_axis_amount,
+    format_currency,
+    format_currency_text,
+    format_decimal,
+    format_rupiah,
+    format_short_amount,
+    format_with_pattern,
+)
+
+
+def sample_values():
+    rng = np.random.default_rng(11)
+    edge = [0, 0.5, 1.5, 2.5, -0.5, -1, 999.5, 999_999.5, 1e6 - 0.5, 1e9 - 1, 1e9, 1e9 + 5e7, 2.05e9, 9.95e9, 1.234e13, -3_500_000]
+    return np.concatenate([
+        edge,
+        rng.integers(0, 10**11, 2000),
+        rng.uniform(-1e10, 1e10, 2000),
+        rng.integers(0, 2000, 200) + 0.5,
+    ])
+
+
+VALUES = sample_values()
+
+
+def reference(fmt):
+    return [fmt(float(x)) for x in VALUES]
+
+
+@pytest.mark.parametrize('decimals', [0, 1, 2])
+def test_format_decimal_matches_format_spec(decimals):
+    assert format_decimal(VALUES, decimals).tolist() == reference(lambda x: f"{x:,.{decimals}f}")
+    assert format_decimal(VALUES, decimals, thousands=False).tolist() == reference(lambda x: f"{x:.{decimals}f}")
+
+
+def test_format_rupiah_and_currency_match_scalar_versions():
+    assert format_rupiah(VALUES).tolist() == reference(lambda x: 'Rp {:,.0f}'.format(x))
+    assert format_currency(VALUES).tolist() == reference(format_currency_text)
+
+
+@pytest.mark.parametrize('pattern', ['Rp {:,.0f}', '{:.0f}x', '{:.1%}', '{:,.2f} km', '{:.0%}'])
+def test_format_with_pattern_matches_str_format(pattern):
+    assert format_with_pattern(VALUES, pattern).tolist() == reference(pattern.format)
+    series = pd.Series(VALUES[:50].round().astype('int64'))
+    assert format_with_pattern(series, pattern).tolist() == [pattern.format(x) for x in series]
+
+
+def test_format_with_pattern_falls_back_for_other_patterns():
+    assert format_with_pattern(np.array(['L 1 A', 'L 2 B']), '[{}]').tolist() == ['[L 1 A]', '[L 2 B]']
+    assert format_with_pattern([1500, 2500], '{:>8,}').tolist() == ['   1,500', '   2,500']
+
+
+def test_chart_labels_match_previous_comprehensions():
+    def short(val):
+        if val <= 0:
+            return '0'
+        return f'{val/1e9:.1f} Miliar'.replace('.0 Miliar', ' Miliar') if val >= 1e9 else f'{val/1e6:.1f} Juta'
+
+    def axis(val):
+        if val == 0:
+            return '0 Juta'
+        return f"{val/1e9:.1f} Miliar".replace(".0 Miliar", " Miliar") if val >= 1e9 else f"{val/1e6:.0f} Juta"
+
+    assert format_short_amount(VALUES).tolist() == reference(short)
+    assert format_axis_amount(VALUES).tolist() == reference(axis)
+
+
+def test_empty_and_scalar_inputs():
+    assert format_rupiah([]).tolist() == []
+    assert format_currency(np.array([])).tolist() == []
+    assert format_rupiah(1500000).tolist() == ['Rp 1,500,000']